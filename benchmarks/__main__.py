@@ -0,0 +1,116 @@
+"""
+Run every benchmark and write the results to a JSON file, so runs on different
+commits can be compared.
+
+Run from the repository root::
+
+    python -m benchmarks [--quick] [--output results.json] [--compare old.json]
+
+Timings are `_ms`/`_us` values and memory `_kib` values (lower is better) and `per_second` values (higher is better).
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+
+import rest_vlc
+
+from benchmarks import client_latency, fanout, playlist_formats, status_parse
+
+PLAYLIST_ITEMS = (100, 10000, 100000)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "orjson": rest_vlc._json_loads is not json.loads,
+        "aiohttp": rest_vlc.aiohttp_exists,
+    }
+
+
+def run(quick: bool) -> dict:
+    scale = 10 if quick else 1
+    results = {"environment": environment(), "quick": quick}
+    print("client latency ...", file=sys.stderr)
+    results["client"] = client_latency.bench(2000 // scale)
+    if rest_vlc.aiohttp_exists:
+        results["fanout"] = {}
+        for endpoints in fanout.ENDPOINTS:
+            print("fan-out to {} endpoints ...".format(endpoints), file=sys.stderr)
+            results["fanout"][str(endpoints)] = fanout.bench(endpoints, 200 // scale)
+    results["playlist_parse"] = {}
+    for items in PLAYLIST_ITEMS:
+        print("playlist of {} items ...".format(items), file=sys.stderr)
+        results["playlist_parse"][str(items)] = playlist_formats.bench(
+            items, max(1, 100000 // items // scale)
+        )
+    results["status_parse"] = {}
+    for name, streams in (("audio", 1), ("movie", 4), ("many_tracks", 24)):
+        results["status_parse"][name] = status_parse.bench(
+            status_parse.status_document(streams), 2000 // scale
+        )
+    return results
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    values = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, prefix + key + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[prefix + key] = value
+    return values
+
+
+def compare(old: dict, new: dict) -> None:
+    # how much faster (> 1) or slower (< 1) every timing of `new` is than in `old`
+    old_values, new_values = flatten(old), flatten(new)
+    for key, value in new_values.items():
+        before = old_values.get(key)
+        if not before or not value:
+            continue
+        if key.endswith(("_ms", "_us", "_kib")):
+            ratio = before / value
+        elif key.endswith("per_second"):
+            ratio = value / before
+        else:
+            continue
+        marker = "  slower" if ratio < 0.9 else ""
+        print("{:<60} x{:.2f}{}".format(key, ratio, marker))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--quick", action="store_true", help="a tenth of the iterations"
+    )
+    parser.add_argument(
+        "--output", default="benchmark-results.json", help="JSON file to write"
+    )
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare to")
+    args = parser.parse_args()
+    results = run(args.quick)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("results written to " + args.output, file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Measure commands per second and the p50/p99 latency of one command for `VLC`
+and `Async_VLC` against the local VLC simulator: with and without connection
+reuse, over the pipelining transport of `VLC`, and fetching the status as
+`status.xml` and as `status.json`.
+
+Run from the repository root::
+
+    python -m benchmarks.client_latency [commands]
+"""
+
+import concurrent.futures
+import statistics
+import sys
+import time
+
+import rest_vlc
+
+from test.vlc_simulator import VLCSimulator
+
+
+def summary(samples: list, elapsed: float) -> dict:
+    """
+    Throughput and latency percentiles of `samples` seconds measured over `elapsed` seconds
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "per_second": len(ordered) / elapsed,
+        "mean_ms": statistics.fmean(ordered) * 1e3,
+        "p50_ms": ordered[int(len(ordered) * 0.50)] * 1e3,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3,
+    }
+
+
+def timed(call, count: int) -> dict:
+    call(0)  # connect outside of the measurement
+    samples = []
+    begin = time.perf_counter()
+    for i in range(count):
+        start = time.perf_counter()
+        call(i)
+        samples.append(time.perf_counter() - start)
+    return summary(samples, time.perf_counter() - begin)
+
+
+def timed_threads(call, count: int, threads: int) -> dict:
+    call(0)
+    samples = []
+
+    def worker(offset: int) -> None:
+        for i in range(offset, count, threads):
+            start = time.perf_counter()
+            call(i)
+            samples.append(time.perf_counter() - start)
+
+    begin = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        list(executor.map(worker, range(threads)))
+    return summary(samples, time.perf_counter() - begin)
+
+
+async def timed_async(call, count: int, concurrency: int = 1) -> dict:
+    await call(0)
+    samples = []
+
+    async def worker(offset: int) -> None:
+        for i in range(offset, count, concurrency):
+            start = time.perf_counter()
+            await call(i)
+            samples.append(time.perf_counter() - start)
+
+    begin = time.perf_counter()
+    await rest_vlc.asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summary(samples, time.perf_counter() - begin)
+
+
+def bench_sync(simulator: VLCSimulator, count: int) -> dict:
+    results = {}
+    for name, options in (
+        ("reuse", {}),
+        ("no_reuse", {"keep_alive": False}),
+        ("pipeline", {"pipeline": 2}),
+    ):
+        with rest_vlc.VLC(simulator.url, simulator.auth, **options) as vlc:
+            results[name] = timed(lambda i: vlc.set_volume(i % 512), count)
+            if name != "no_reuse":
+                results[name + "_8_threads"] = timed_threads(
+                    lambda i: vlc.set_volume(i % 512), count, 8
+                )
+    for format in ("xml", "json"):
+        with rest_vlc.VLC(simulator.url, simulator.auth, format=format) as vlc:
+            results["status_" + format] = timed(
+                lambda i: vlc.snapshot(refresh=True), count
+            )
+    return results
+
+
+async def bench_async(simulator: VLCSimulator, count: int) -> dict:
+    results = {}
+    async with rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        results["reuse"] = await timed_async(lambda i: vlc.set_volume(i % 512), count)
+        results["reuse_10_concurrent"] = await timed_async(
+            lambda i: vlc.set_volume(i % 512), count, concurrency=10
+        )
+    # a connector that closes every connection after its request
+    session = rest_vlc.aiohttp.ClientSession(
+        connector=rest_vlc.aiohttp.TCPConnector(force_close=True)
+    )
+    async with session:
+        vlc = rest_vlc.Async_VLC(
+            simulator.url, simulator.auth, lazy=True, session=session
+        )
+        results["no_reuse"] = await timed_async(
+            lambda i: vlc.set_volume(i % 512), count
+        )
+    for format in ("xml", "json"):
+        async with rest_vlc.Async_VLC(
+            simulator.url, simulator.auth, lazy=True, format=format
+        ) as vlc:
+            results["status_" + format] = await timed_async(
+                lambda i: vlc.snapshot(refresh=True), count
+            )
+    return results
+
+
+def bench_parse(simulator: VLCSimulator, number: int) -> dict:
+    xml_document = simulator.status_xml().encode()
+    json_document = simulator.status_json().encode()
+    assert rest_vlc.StatusSnapshot.from_xml(
+        xml_document
+    ) == rest_vlc.StatusSnapshot.from_json(json_document)
+    results = {}
+    for name, parse, document in (
+        ("xml", rest_vlc.StatusSnapshot.from_xml, xml_document),
+        ("json", rest_vlc.StatusSnapshot.from_json, json_document),
+    ):
+        start = time.perf_counter()
+        for _ in range(number):
+            parse(document)
+        results[name + "_us"] = (time.perf_counter() - start) / number * 1e6
+    return results
+
+
+def bench(count: int) -> dict:
+    with VLCSimulator(password="benchmark") as simulator:
+        simulator.add("file:///srv/music/Track.flac")
+        simulator.command("pl_play", {})
+        results = {"sync": bench_sync(simulator, count)}
+        if rest_vlc.aiohttp_exists:
+            rest_vlc._load_async()
+            results["async"] = rest_vlc.asyncio.run(bench_async(simulator, count))
+        results["status_parse"] = bench_parse(simulator, count * 10)
+    return results
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    results = bench(count)
+    for client in ("sync", "async"):
+        for name, result in results.get(client, {}).items():
+            print(
+                "{:<5} {:<20} {:>8.0f}/s  p50 {:>6.3f} ms  p99 {:>6.3f} ms".format(
+                    client,
+                    name,
+                    result["per_second"],
+                    result["p50_ms"],
+                    result["p99_ms"],
+                )
+            )
+    print(
+        "status parse: xml {xml_us:.1f} us  json {json_us:.1f} us".format(
+            **results["status_parse"]
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure how long a `VLCFleet` broadcast takes to 1, 10 and 100 endpoints,
+every endpoint is a local VLC simulator.
+
+Run from the repository root::
+
+    python -m benchmarks.fanout [rounds]
+"""
+
+import sys
+import time
+
+import rest_vlc
+
+from benchmarks.client_latency import summary
+from test.vlc_simulator import VLCSimulator
+
+ENDPOINTS = (1, 10, 100)
+
+
+async def broadcast(urls: list, auth: tuple, rounds: int) -> dict:
+    async with rest_vlc.VLCFleet(urls, auth, limit=len(urls) * 2) as fleet:
+        assert (await fleet.set_volume(0)).ok  # connect outside of the measurement
+        samples = []
+        begin = time.perf_counter()
+        for i in range(rounds):
+            start = time.perf_counter()
+            result = await fleet.set_volume(i % 512)
+            samples.append(time.perf_counter() - start)
+            assert result.ok, result.failed
+        return summary(samples, time.perf_counter() - begin)
+
+
+def bench(endpoints: int, rounds: int) -> dict:
+    simulators = [VLCSimulator(password="benchmark").start() for _ in range(endpoints)]
+    try:
+        rest_vlc._load_async()
+        return rest_vlc.asyncio.run(
+            broadcast([s.url for s in simulators], simulators[0].auth, rounds)
+        )
+    finally:
+        for simulator in simulators:
+            simulator.close()
+
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for endpoints in ENDPOINTS:
+        result = bench(endpoints, rounds)
+        print(
+            "{:>4} endpoints  {:>7.1f} broadcasts/s  p50 {:>7.3f} ms  p99 {:>7.3f} ms".format(
+                endpoints, result["per_second"], result["p50_ms"], result["p99_ms"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
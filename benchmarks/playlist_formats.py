@@ -0,0 +1,153 @@
+"""
+Compare the cost of decoding a large playlist served as `playlist.xml`
+and as `playlist.json`, and the peak memory of decoding `playlist.xml` at once
+and streamed a chunk at a time like `VLC.iter_playlist` does.
+
+Run from the repository root::
+
+    python -m benchmarks.playlist_formats [items]
+"""
+
+import json
+import sys
+import timeit
+import tracemalloc
+
+import xmltodict
+
+import rest_vlc
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def playlist_xml(items: int) -> str:
+    """
+    Build a playlist.xml with `items` leaves like VLC 3 serves it
+    """
+    leaves = "".join(
+        '<leaf ro="rw" name="Track {0:05d} - Artist.flac" id="{1}" duration="{2}" '
+        'uri="file:///srv/music/Artist/Album/Track%20{0:05d}.flac"/>\n'.format(
+            i, i + 4, 120 + i % 300
+        )
+        for i in range(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8" standalone="yes" ?>'
+        '<node ro="rw" name="Undefined" id="0">\n'
+        '<node ro="ro" name="Playlist" id="1">\n' + leaves + "</node>\n"
+        '<node ro="ro" name="Media Library" id="2">\n</node>\n'
+        "</node>"
+    )
+
+
+def playlist_json(items: int) -> str:
+    """
+    Build the playlist.json matching `playlist_xml(items)`
+    """
+    leaves = [
+        {
+            "ro": "rw",
+            "type": "leaf",
+            "name": "Track {:05d} - Artist.flac".format(i),
+            "id": str(i + 4),
+            "duration": 120 + i % 300,
+            "uri": "file:///srv/music/Artist/Album/Track%20{:05d}.flac".format(i),
+        }
+        for i in range(items)
+    ]
+    return json.dumps(
+        {
+            "ro": "rw",
+            "type": "node",
+            "name": "Undefined",
+            "id": "0",
+            "children": [
+                {
+                    "ro": "ro",
+                    "type": "node",
+                    "name": "Playlist",
+                    "id": "1",
+                    "children": leaves,
+                },
+                {
+                    "ro": "ro",
+                    "type": "node",
+                    "name": "Media Library",
+                    "id": "2",
+                    "children": [],
+                },
+            ],
+        }
+    )
+
+
+def streamed(document: bytes) -> int:
+    """
+    Parse `document` in chunks of the size `VLC.iter_playlist` reads, keeping no item
+    """
+    parser = rest_vlc._PlaylistItemParser()
+    count = 0
+    for start in range(0, len(document), rest_vlc._STREAM_CHUNK_SIZE):
+        count += len(parser.feed(document[start : start + rest_vlc._STREAM_CHUNK_SIZE]))
+    return count + len(parser.feed(b"", True))
+
+
+def peak_kib(case) -> float:
+    tracemalloc.start()
+    try:
+        case()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench(items: int, number: int) -> dict:
+    xml_document = playlist_xml(items)
+    xml_bytes = xml_document.encode()
+    json_document = playlist_json(items)
+    json_bytes = json_document.encode()
+    assert streamed(xml_bytes) == items
+    assert rest_vlc._PlaylistItemParser().parse(
+        xml_document
+    ) == rest_vlc._playlist_items_from_json(json_document)
+    cases = {
+        "xmltodict.parse": lambda: xmltodict.parse(xml_document),
+        "xml -> PlaylistItem": lambda: rest_vlc._PlaylistItemParser().parse(
+            xml_document
+        ),
+        "xml streamed": lambda: streamed(xml_bytes),
+        "json.loads": lambda: json.loads(json_document),
+        "json -> PlaylistItem": lambda: rest_vlc._playlist_items_from_json(json_bytes),
+    }
+    if orjson is not None:
+        cases["orjson.loads"] = lambda: orjson.loads(json_bytes)
+    results = {"xml_bytes": len(xml_document), "json_bytes": len(json_document)}
+    for name, case in cases.items():
+        results[name + "_ms"] = timeit.timeit(case, number=number) / number * 1e3
+    for name in ("xmltodict.parse", "xml -> PlaylistItem", "xml streamed"):
+        results[name + "_peak_kib"] = peak_kib(cases[name])
+    return results
+
+
+def main() -> None:
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    results = bench(items, 5)
+    print(
+        "{} items, xml {} bytes, json {} bytes".format(
+            items, results.pop("xml_bytes"), results.pop("json_bytes")
+        )
+    )
+    for name, value in results.items():
+        if name.endswith("_peak_kib"):
+            print("  {:<24} {:>8.0f} KiB peak".format(name[:-9], value))
+        else:
+            print("  {:<24} {:>8.2f} ms".format(name[:-3], value))
+    if rest_vlc._json_loads is json.loads:
+        print("  (orjson is not installed, json mode uses the json module)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare parsing `status.xml` with xmltodict against the early-exit parser
+behind `StatusSnapshot.from_xml`.
+
+Run from the repository root::
+
+    python -m benchmarks.status_parse
+"""
+
+import timeit
+
+import xmltodict
+
+import rest_vlc
+
+STATUS_HEAD = """<?xml version="1.0" encoding="utf-8" standalone="yes" ?>
+<root>
+<fullscreen>false</fullscreen>
+<aspectratio>default</aspectratio>
+<audiodelay>0</audiodelay>
+<apiversion>3</apiversion>
+<currentplid>4</currentplid>
+<time>42</time>
+<volume>256</volume>
+<length>5400</length>
+<random>false</random>
+<audiofilters>
+  <filter_0></filter_0></audiofilters>
+<rate>1</rate>
+<videoeffects>
+<hue>0</hue><saturation>1</saturation><contrast>1</contrast><brightness>1</brightness><gamma>1</gamma></videoeffects>
+<state>playing</state>
+<loop>false</loop>
+<version>3.0.18 Vetinari</version>
+<position>0.0077777</position>
+<repeat>false</repeat>
+<subtitledelay>0</subtitledelay>
+<equalizer></equalizer>
+"""
+
+STATUS_STATS = """<stats>
+<lostabuffers>0</lostabuffers><readpackets>5512</readpackets><lostpictures>0</lostpictures>
+<demuxreadbytes>31244800</demuxreadbytes><demuxbitrate>0.7</demuxbitrate><playedabuffers>2100</playedabuffers>
+<demuxcorrupted>0</demuxcorrupted><sendbitrate>0</sendbitrate><sentbytes>0</sentbytes>
+<displayedpictures>1008</displayedpictures><demuxreadpackets>0</demuxreadpackets><sentpackets>0</sentpackets>
+<inputbitrate>0.7</inputbitrate><demuxdiscontinuity>0</demuxdiscontinuity><averagedemuxbitrate>0</averagedemuxbitrate>
+<decodedvideo>1010</decodedvideo><averageinputbitrate>0</averageinputbitrate><readbytes>31244800</readbytes>
+<decodedaudio>2100</decodedaudio>
+</stats>
+</root>"""
+
+
+def status_document(streams: int) -> str:
+    """
+    Build a status.xml of a playing movie with `streams` audio/subtitle tracks,
+    the information block grows with the number of tracks like in VLC
+    """
+    info = [
+        "<information>",
+        '<category name="meta">',
+        "<info name='filename'>movie.mkv</info>",
+        "<info name='title'>Movie</info>",
+        "<info name='encoded_by'>libebml v1.4.2 + libmatroska v1.6.4</info>",
+        "</category>",
+        "<category name='Stream 0'><info name='Codec'>H264 - MPEG-4 AVC (part 10) (avc1)</info>"
+        "<info name='Type'>Video</info><info name='Video_resolution'>1920x1080</info>"
+        "<info name='Frame_rate'>23.976024</info><info name='Decoded_format'>Planar 4:2:0 YUV</info></category>",
+    ]
+    for i in range(1, streams + 1):
+        info.append(
+            "<category name='Stream {0}'><info name='Codec'>A52 Audio (aka AC3) (a52 )</info>"
+            "<info name='Language'>Language {0}</info><info name='Type'>Audio</info>"
+            "<info name='Channels'>3F2R/LFE</info><info name='Sample_rate'>48000 Hz</info>"
+            "<info name='Bitrate'>448 kb/s</info></category>".format(i)
+        )
+    info.append("</information>\n")
+    return STATUS_HEAD + "\n".join(info) + STATUS_STATS
+
+
+def bench(document: str, number: int) -> dict:
+    baseline = rest_vlc.StatusSnapshot.from_dict(xmltodict.parse(document))
+    assert rest_vlc.StatusSnapshot.from_xml(document) == baseline
+    xmltodict_time = timeit.timeit(
+        lambda: rest_vlc.StatusSnapshot.from_dict(xmltodict.parse(document)),
+        number=number,
+    )
+    fast_time = timeit.timeit(
+        lambda: rest_vlc.StatusSnapshot.from_xml(document), number=number
+    )
+    return {
+        "bytes": len(document),
+        "xmltodict_us": xmltodict_time / number * 1e6,
+        "from_xml_us": fast_time / number * 1e6,
+        "speedup": xmltodict_time / fast_time,
+    }
+
+
+def main() -> None:
+    for name, streams in (("audio", 1), ("movie", 4), ("many tracks", 24)):
+        result = bench(status_document(streams), 2000)
+        print(
+            "{:<12} {:>7} bytes  xmltodict {:>8.1f} us  from_xml {:>7.1f} us  x{:.1f}".format(
+                name,
+                result["bytes"],
+                result["xmltodict_us"],
+                result["from_xml_us"],
+                result["speedup"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
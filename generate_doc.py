@@ -8,7 +8,8 @@ import rest_vlc
 
 
 def get_func_args(function):
-    return inspect.getfullargspec(function).args
+    # unwrap staticmethod/classmethod objects found in the class __dict__
+    return inspect.getfullargspec(getattr(function, "__func__", function)).args
 
 
 def remove_indent_and_new_line(text):
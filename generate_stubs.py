@@ -0,0 +1,72 @@
+"""
+Write the base classes that show IDEs and type checkers the commands and status
+properties `rest_vlc._generate_api` installs from `_COMMAND_BUILDERS` and
+`_STATUS_GETTERS`. Run it after changing a builder or a getter::
+
+    python generate_stubs.py
+"""
+
+import sys
+
+sys.path.append("..")
+
+import ast
+import inspect
+
+import rest_vlc
+
+BEGIN = "# begin of the code written by generate_stubs.py, do not edit\n"
+END = "# end of the code written by generate_stubs.py\n"
+
+
+def get_signature(function):
+    # the arguments and return annotation of a table entry as written in rest_vlc.py
+    node = ast.parse(inspect.getsource(function)).body[0]
+    node.args.args.insert(0, ast.arg("self"))
+    return ast.unparse(node.args), ast.unparse(node.returns)
+
+
+def stub_class(name, asynchronous):
+    lines = ["", "    class {}:".format(name)]
+    for command, builder in rest_vlc._COMMAND_BUILDERS.items():
+        arguments, _ = get_signature(builder)
+        lines.append(
+            "        {}def {}({}) -> _CommandAnswer: ...".format(
+                "async " if asynchronous else "", command, arguments
+            )
+        )
+    for status, getter in rest_vlc._STATUS_GETTERS.items():
+        _, returns = get_signature(getter)
+        if asynchronous:
+            returns = "typing.Awaitable[{}]".format(returns)
+        lines += [
+            "        @property",
+            "        def {}(self) -> {}: ...".format(status, returns),
+        ]
+    return lines
+
+
+def render():
+    lines = [
+        "if typing.TYPE_CHECKING:",
+        *stub_class("_Commands", asynchronous=False),
+        *stub_class("_AsyncCommands", asynchronous=True),
+        "",
+        "else:",
+        "    _Commands = _AsyncCommands = object",
+    ]
+    code = "\n".join(lines) + "\n"
+    try:
+        import black
+    except ImportError:
+        return code
+    return black.format_str(code, mode=black.Mode())
+
+
+if __name__ == "__main__":
+    with open(rest_vlc.__file__) as f:
+        source = f.read()
+    start = source.index(BEGIN) + len(BEGIN)
+    source = source[:start] + render() + source[source.index(END) :]
+    with open(rest_vlc.__file__, "w") as f:
+        f.write(source)
@@ -1,25 +1,72 @@
+import base64
+import bisect
+import collections
+import concurrent.futures
 import datetime
 import enum
+import html
+import importlib.util
+import inspect
+import itertools
+import json
+import pathlib
+import queue
+import random
+import socket
+import tempfile
+import threading
+import time
+import types
 import typing
 import urllib.parse
 import warnings
+import xml.parsers.expat
 
 import requests
 import xmltodict
 
 try:  # speedup
-    import uvloop
+    import orjson
 
-    uvloop.install()
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# asyncio and aiohttp are imported by _load_async on first use of the async API
+# so that importing this module stays cheap for blocking-only users.
+asyncio = None
+aiohttp = None
+aiohttp_exists = importlib.util.find_spec("aiohttp") is not None
+
+
+def _load_async() -> None:
+    global asyncio, aiohttp
+    if aiohttp is not None:
+        return
     import asyncio
-except ModuleNotFoundError or ImportError:  # no uvloop
+
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            "No aiohttp exists, install rest-vlc[async] to use the async version of this library"
+        ) from None
+
+
+def install_uvloop() -> bool:
+    """
+    Opt in to uvloop by making it the event loop policy of asyncio.
+    Importing rest_vlc never does this on its own since it changes the whole application
+    :return: bool, False when uvloop is not installed
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
     import asyncio
-try:
-    import aiohttp
 
-    aiohttp_exists = True
-except ImportError or ModuleNotFoundError:
-    aiohttp_exists = False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
 
 
 class VLC_State(enum.Enum):
@@ -28,568 +75,3279 @@ class VLC_State(enum.Enum):
     stopped = "stopped"
 
 
-class VLC:
+_STATUS_FIELDS = frozenset(
+    (
+        "state",
+        "time",
+        "length",
+        "position",
+        "volume",
+        "random",
+        "loop",
+        "repeat",
+        "fullscreen",
+        "currentplid",
+    )
+)
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _StatusFieldParser:
+    # Collects the text of the direct children of <root> that StatusSnapshot needs
+    # and aborts expat as soon as all of them are seen, so the large
+    # <information> and <stats> blocks at the end of status.xml are never parsed.
+
+    __slots__ = ("values", "depth", "current", "chunks")
+
+    def __init__(self) -> None:
+        self.values = {}
+        self.depth = 0
+        self.current = None
+        self.chunks = []
+
+    def start(self, name: str, attrs: dict) -> None:
+        self.depth += 1
+        if self.depth == 2 and name in _STATUS_FIELDS:
+            self.current = name
+            self.chunks = []
+
+    def end(self, name: str) -> None:
+        if self.current is not None and self.depth == 2:
+            self.values[self.current] = "".join(self.chunks)
+            self.current = None
+            if len(self.values) == len(_STATUS_FIELDS):
+                raise _StopParsing
+        self.depth -= 1
+
+    def data(self, text: str) -> None:
+        if self.current is not None:
+            self.chunks.append(text)
+
+    def parse(self, text: typing.Union[str, bytes]) -> dict:
+        parser = xml.parsers.expat.ParserCreate()
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.data
+        try:
+            parser.Parse(text, True)
+        except _StopParsing:
+            pass
+        return self.values
+
+
+class StatusSnapshot:
     """
-    VLC manager class
+    One parsed `status.xml` response with every field already converted.
+    Reading several fields off one snapshot costs a single request.
     """
 
+    __slots__ = (
+        "state",
+        "time",
+        "duration",
+        "position",
+        "volume",
+        "is_random",
+        "is_loop_queue",
+        "is_repeat_media",
+        "is_fullscreen",
+        "current_id",
+    )
+
     def __init__(
         self,
-        url: str = "http://localhost:8080",
-        auth: typing.Union[
-            tuple, requests.auth.HTTPBasicAuth, list, set
-        ] = requests.auth.HTTPBasicAuth("", ""),
+        state: VLC_State,
+        time: int,
+        duration: int,
+        position: float,
+        volume: int,
+        is_random: bool,
+        is_loop_queue: bool,
+        is_repeat_media: bool,
+        is_fullscreen: bool,
+        current_id: int,
     ) -> None:
-        """
-        VLC Class
-        This class will initialize a VLC instance by connect to it using REST API w/ HTTP Basic Auth.
-        This class is blocking.
-        If you want to use asynchornous version please install
-        `aiohttp <https://pypi.org/project/aiohttp/>`_
-        :param url: VLC url
-        :param auth: VLC auth
-        :return: None
-        """
-        self.url = url
-        if isinstance(auth, (tuple, list, set)):
-            if len(auth) != 2:
-                raise ValueError(
-                    "Auth must be a tuple or list of 2 elements which is username and password"
-                )
-            self.auth = requests.auth.HTTPBasicAuth(*auth)
-        else:
-            self.auth = auth
-        if not self.connectable:
-            raise Exception("VLC is not running or REST API is not enabled")
-        self.full_screen = self.is_fullscreen
-        self.volume_percentage = False
-
-    def __encode_uri(self, url: str) -> bool:
-        return urllib.parse.quote(url)
-
-    def __set_name__(self, owner, name):
-        self.name = "_" + name
+        self.state = state
+        self.time = time
+        self.duration = duration
+        self.position = position
+        self.volume = volume
+        self.is_random = is_random
+        self.is_loop_queue = is_loop_queue
+        self.is_repeat_media = is_repeat_media
+        self.is_fullscreen = is_fullscreen
+        self.current_id = current_id
 
-    def __getattr__(self, name):
-        if name not in self.__dict__:
-            warnings.warn(
-                "Attribute '{}' is not defined in VLC class or not yet implemented".format(
-                    name
-                ),
-                UserWarning,
-            )
-            return (None,)
-        return self.__dict__[name]
-
-    @property
-    def is_playing(self):
+    @classmethod
+    def from_dict(cls, content: dict) -> "StatusSnapshot":
         """
-        Check if VLC is playing or not
-        :return: bool
+        Build a snapshot from the dictionary `xmltodict` gives for `status.xml`
+        :param content: parsed status document
+        :return: StatusSnapshot
         """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_status", auth=self.auth
-            )
-            == 200
+        root = content["root"]
+        return cls(
+            state=VLC_State(root["state"]),
+            time=int(root["time"]),
+            duration=int(root["length"]),
+            position=float(root["position"]),
+            volume=int(root["volume"]),
+            is_random=root["random"] in ("true", "1"),
+            is_loop_queue=root["loop"] in ("true", "1"),
+            is_repeat_media=root["repeat"] in ("true", "1"),
+            is_fullscreen=root["fullscreen"] in ("true", "1"),
+            current_id=int(root["currentplid"]),
         )
 
-    @property
-    def status(self) -> dict:
+    @classmethod
+    def from_xml(cls, text: typing.Union[str, bytes]) -> "StatusSnapshot":
         """
-        Show the status & configurations inform of a dictionaries
-        :return: dict
+        Build a snapshot straight from a `status.xml` body.
+        Only the needed fields are read and parsing stops once all of them are found
+        :param text: status document
+        :return: StatusSnapshot
         """
-        return xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text,
-        )
+        return cls.from_dict({"root": _StatusFieldParser().parse(text)})
 
-    @property
-    def playlist(self) -> dict:
+    @classmethod
+    def from_json(cls, text: typing.Union[str, bytes, dict]) -> "StatusSnapshot":
         """
-        Show the playlist and configurations inform of a dictionaries
-        :return: dict
+        Build a snapshot from a `status.json` body or its decoded dictionary
+        :param text: status document
+        :return: StatusSnapshot
         """
-        return xmltodict.parse(
-            requests.get(self.url + "/requests/playlist.xml", auth=self.auth).text
+        content = text if isinstance(text, dict) else _json_loads(text)
+        return cls(
+            state=VLC_State(content["state"]),
+            time=int(content["time"]),
+            duration=int(content["length"]),
+            position=float(content["position"]),
+            volume=int(content["volume"]),
+            is_random=content["random"] in (True, "true", 1),
+            is_loop_queue=content["loop"] in (True, "true", 1),
+            is_repeat_media=content["repeat"] in (True, "true", 1),
+            is_fullscreen=content["fullscreen"] in (True, "true", 1),
+            current_id=int(content["currentplid"]),
         )
 
     @property
-    def connectable(self) -> bool:
+    def is_paused(self) -> bool:
         """
-        Check if VLC REST API is running
+        Media is paused or stopped
         :return: bool
         """
-        try:
-            return (
-                requests.get(
-                    self.url + "/requests/status.xml", auth=self.auth
-                ).status_code
-                == 200
-            )
-        except requests.exceptions.ConnectionError:
-            return False
+        return self.state in (VLC_State.paused, VLC_State.stopped)
 
-    def stop(self) -> bool:
-        """
-        Stop the current playing media and return back the boolean of the result
-        :return: bool
-        """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_stop", auth=self.auth
-            ).status_code
-            == 200
-        )
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StatusSnapshot):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
 
-    def clear_playlist(self) -> bool:
-        """
-        Clear the playlist and return back the boolean of the result
-        :return: bool
-        """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_empty", auth=self.auth
-            ).status_code
-            == 200
+    def __repr__(self) -> str:
+        return "StatusSnapshot({})".format(
+            ", ".join("{}={!r}".format(f, getattr(self, f)) for f in self.__slots__)
         )
 
-    def play(self, uri: str) -> bool:
-        """
-        Play a media by uri and return back the boolean of the result if success or not
-        :param uri: media uri
-        :return: bool
-        """
-        uri = self.__encode_uri(uri)
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=in_play&input=" + uri,
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
 
-    def append_queue(self, uri: str) -> bool:
-        """
-        Append a media to the queue and return back the boolean of the result if success or not
-        :param uri: media uri
-        :return: bool
-        """
-        uri = self.__encode_uri(uri)
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=in_enqueue&input=" + uri,
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
+class PlaylistItem:
+    """
+    One media of the playlist, the same for `playlist.xml` and `playlist.json`
+    """
 
-    def set_volume(self, volume: int, percent: bool = False) -> bool:
-        """
-        Set the volume of VLC and return back the boolean of the result if success or not
-        :param volume: volume value (0-512 = 0-200%)
-        :param percent: option for volume is actually percentage or not
-        :return: bool
-        """
-        if percent:
-            volume = int(volume * 2.56)
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=volume&val=" + str(volume),
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
+    __slots__ = ("id", "name", "uri", "duration", "current")
 
-    def set_random(self, random: bool) -> bool:
-        """
-        Set the shuffle state of VLC and return back the boolean of the result if success or not
-        :param random: random state
-        :return: bool
-        """
+    def __init__(
+        self, id: int, name: str, uri: str, duration: int, current: bool
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.uri = uri
+        self.duration = duration
+        self.current = current
 
-        return (
-            requests.get(
-                self.url
-                + "/requests/status.xml?command=pl_random&state="
-                + str(random),
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PlaylistItem):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
 
-    @property
-    def is_random(self) -> bool:
-        """
-        A property to get the random state of VLC
-        :return: bool
-        """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
+    def __repr__(self) -> str:
+        return "PlaylistItem({})".format(
+            ", ".join("{}={!r}".format(f, getattr(self, f)) for f in self.__slots__)
         )
-        return True if content["root"]["random"] in ("true", "1") else False
 
-    def set_repeat_media(self, repeat: bool) -> bool:
-        """
-        Set the repeat state of VLC and return back the boolean of the result if success or not
-        :param repeat: repeat state
-        :return: bool
-        """
-        return (
-            requests.get(
-                self.url
-                + "/requests/status.xml?command=pl_repeat&state="
-                + str(repeat),
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
 
-    @property
-    def is_repeat_media(self) -> bool:
-        """
-        A property to get the repeat state of VLC
-        :return: bool
-        """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return True if content["root"]["repeat"] in ("true", "1") else False
+def _playlist_item(attrs: dict) -> PlaylistItem:
+    return PlaylistItem(
+        id=int(attrs["id"]),
+        name=attrs.get("name", ""),
+        uri=attrs.get("uri", ""),
+        duration=int(attrs.get("duration", -1)),
+        current="current" in attrs,
+    )
+
+
+class _PlaylistItemParser:
+    # Collects the <leaf> elements of the first child <node> of the root node,
+    # which is the playlist itself, the second one is the media library.
+
+    __slots__ = ("items", "depth", "node_index", "in_playlist", "parser")
+
+    def __init__(self) -> None:
+        self.items = []
+        self.depth = 0
+        self.node_index = 0
+        self.in_playlist = False
+        self.parser = xml.parsers.expat.ParserCreate()
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+
+    def start(self, name: str, attrs: dict) -> None:
+        self.depth += 1
+        if self.depth == 2:
+            self.in_playlist = self.node_index == 0
+            self.node_index += 1
+        elif name == "leaf" and self.in_playlist:
+            self.items.append(_playlist_item(attrs))
+
+    def end(self, name: str) -> None:
+        self.depth -= 1
+
+    def feed(self, chunk: bytes, final: bool = False) -> typing.List[PlaylistItem]:
+        # parse the next piece of a streamed document and hand out the items it
+        # completed, so only the items of one chunk are held at a time
+        self.parser.Parse(chunk, final)
+        items, self.items = self.items, []
+        return items
+
+    def parse(self, text: typing.Union[str, bytes]) -> typing.List[PlaylistItem]:
+        return self.feed(text, True)
 
-    def set_loop_queue(self, loop: bool) -> bool:
-        """
-        Set the loop state of VLC and return back the boolean of the result if success or not
-        :param loop: loop state
-        :return: bool
-        """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_loop&state=" + str(loop),
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
+
+def _playlist_items_from_json(
+    text: typing.Union[str, bytes, dict],
+) -> typing.List[PlaylistItem]:
+    content = text if isinstance(text, dict) else _json_loads(text)
+    children = content.get("children") or []
+    if not children:
+        return []
+    items = []
+    stack = list(reversed(children[0].get("children") or []))
+    while stack:
+        child = stack.pop()
+        if child.get("type") == "leaf":
+            items.append(_playlist_item(child))
+        else:
+            stack.extend(reversed(child.get("children") or []))
+    return items
+
+
+class PlaylistDiff:
+    """
+    What changed in the playlist between two refreshes
+    """
+
+    __slots__ = ("added", "removed", "changed", "previous_current", "current")
+
+    def __init__(
+        self,
+        added: typing.List[PlaylistItem],
+        removed: typing.List[PlaylistItem],
+        changed: typing.List[PlaylistItem],
+        previous_current: typing.Optional[PlaylistItem],
+        current: typing.Optional[PlaylistItem],
+    ) -> None:
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.previous_current = previous_current
+        self.current = current
 
     @property
-    def is_loop_queue(self) -> bool:
+    def current_changed(self) -> bool:
         """
-        A property to get the loop state of VLC
+        The playing media is a different one than before
         :return: bool
         """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return True if content["root"]["loop"] in ("true", "1") else False
+        previous = self.previous_current.id if self.previous_current else None
+        current = self.current.id if self.current else None
+        return previous != current
 
-    def fullscreen(self) -> list:
-        """
-        Set the fullscreen state of VLC and return back the boolean of the result if success or not and the current state of the screen
-        :return: bool, bool
-        """
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.current_changed)
+
+    def __repr__(self) -> str:
         return (
-            requests.get(
-                self.url + "/requests/status.xml?command=fullscreen", auth=self.auth
-            ).status_code
-            == 200,
-            self.is_fullscreen,
+            "PlaylistDiff(added={}, removed={}, changed={}, current_changed={})".format(
+                len(self.added),
+                len(self.removed),
+                len(self.changed),
+                self.current_changed,
+            )
         )
 
-    @property
-    def is_fullscreen(self) -> bool:
 
-        """
-        Return the current state of VLC if VLC is in fullscreen returns true otherwise false
-        :return: bool
-        """
+class Playlist:
+    """
+    Playlist indexed by id, URI and name.
+    Every `update` is diffed against the previous items so only the media that were
+    added, removed or changed touch the indexes, listeners get the resulting `PlaylistDiff`
+    """
 
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return True if content["root"]["fullscreen"] in ("true", "1") else False
+    def __init__(self) -> None:
+        self.items = []
+        self.by_id = {}
+        self.by_uri = {}
+        self.by_name = {}
+        self.current = None
+        self._listeners = []
 
-    """ def set_subtitle_file(self, uri: str) -> bool:
-        \"""
-        Set the subtitle file to show in the VLC and returns bool based on successful or not
-        :return: bool
-        \"""
-        \""" uri = self.__encode_uri(uri) \"""
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_enqueue&input=" + uri,
-                auth=self.auth,
-            ).status_code
-            == 200
-        ) """
+    def __len__(self) -> int:
+        return len(self.items)
 
-    def browse(self, uri: str) -> dict:
+    def __iter__(self) -> typing.Iterator[PlaylistItem]:
+        return iter(self.items)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self.by_id
+
+    def get(self, id: int) -> typing.Optional[PlaylistItem]:
         """
-        Give the list of the files and return the dictionaries of XML
-        :return: dict
+        Find media by its playlist id
+        :param id: playlist id
+        :return: PlaylistItem or None
         """
-        uri = self.__encode_uri(uri)
-        return xmltodict.parse(
-            requests.get(self.url + "/requests/browse.xml?uri=" + uri).text
-        )
+        return self.by_id.get(id)
 
-    def previous(self) -> bool:
+    def find_uri(self, uri: str) -> typing.List[PlaylistItem]:
         """
-        Revert to previous media and return if request was successful or not
-        :return: bool
+        Find every media with this URI
+        :param uri: media uri
+        :return: list of PlaylistItem
         """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_previous", auth=self.auth
-            ).status_code
-            == 200
-        )
+        return list(self.by_uri.get(uri, ()))
 
-    def delete(self, uri: str) -> bool:
+    def find_name(self, name: str) -> typing.List[PlaylistItem]:
         """
-        Delete media off the playlist by finding with the specified URI. Returns bool indicate if request was successful or not
+        Find every media with this name
+        :param name: media name
+        :return: list of PlaylistItem
         """
-        uri = self.__encode_uri(uri)
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_delete&id=" + uri,
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
+        return list(self.by_name.get(name, ()))
 
-    def next(self) -> bool:
+    def add_listener(self, callback: typing.Callable[[PlaylistDiff], None]) -> None:
         """
-        Skip to next media and return if request was successful or not
-        :return: bool
+        Call `callback` with the `PlaylistDiff` of every update that changed something
+        :param callback: function taking a PlaylistDiff
+        :return: None
         """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_next", auth=self.auth
-            ).status_code
-            == 200
-        )
+        self._listeners.append(callback)
 
-    def clear_history(self) -> bool:
+    def remove_listener(self, callback: typing.Callable[[PlaylistDiff], None]) -> None:
         """
-        Clear the histories. Returns boolean indicate request is successful or not
-        :return: bool
+        Stop calling `callback` on updates
+        :param callback: function given to add_listener
+        :return: None
         """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_history&val=clear",
-                auth=self.auth,
-            ).status_code
-            == 200
-        )
+        self._listeners.remove(callback)
+
+    def _index(self, item: PlaylistItem) -> None:
+        self.by_id[item.id] = item
+        self.by_uri.setdefault(item.uri, []).append(item)
+        self.by_name.setdefault(item.name, []).append(item)
 
-    def pause(self) -> bool:
+    def _unindex(self, item: PlaylistItem) -> None:
+        del self.by_id[item.id]
+        for index, key in ((self.by_uri, item.uri), (self.by_name, item.name)):
+            same = index[key]
+            same.remove(item)
+            if not same:
+                del index[key]
+
+    def update(self, items: typing.List[PlaylistItem]) -> PlaylistDiff:
         """
-        Pause the media playback. Returns bool indicate request was successful or not
-        :return: bool
+        Replace the content with freshly fetched items and return what changed
+        :param items: playlist items in order
+        :return: PlaylistDiff
         """
-        return (
-            requests.get(
-                self.url + "/requests/status.xml?command=pl_pause", auth=self.auth
-            ).status_code
-            == 200
-        )
+        added = []
+        changed = []
+        seen = set()
+        current = None
+        for item in items:
+            seen.add(item.id)
+            old = self.by_id.get(item.id)
+            if old is None:
+                self._index(item)
+                added.append(item)
+            elif old != item:
+                self._unindex(old)
+                self._index(item)
+                changed.append(item)
+            if item.current:
+                current = item
+        removed = [item for id, item in self.by_id.items() if id not in seen]
+        for item in removed:
+            self._unindex(item)
+        self.items = [self.by_id[item.id] for item in items]
+        diff = PlaylistDiff(added, removed, changed, self.current, current)
+        self.current = current
+        if diff:
+            for listener in list(self._listeners):
+                listener(diff)
+        return diff
+
+
+class CommandResult:
+    """
+    Outcome of one command of a batch, failures are reported here instead of raised
+    """
+
+    __slots__ = ("target", "value", "error", "elapsed")
+
+    def __init__(
+        self,
+        target: typing.Any,
+        value: typing.Any = None,
+        error: typing.Optional[BaseException] = None,
+        elapsed: float = 0.0,
+    ) -> None:
+        self.target = target
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
 
     @property
-    def is_paused(self) -> bool:
+    def ok(self) -> bool:
         """
-        Check if the media is actually paused or not. Returns bool indicate media is paused or not
+        The command was sent and VLC accepted it
         :return: bool
         """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return True if content["root"]["state"] in ("paused", "stopped") else False
+        return self.error is None and bool(self.value)
 
-    def seek(self, time: typing.Union[str, datetime.timedelta, int]) -> bool:
-        """
-        Seeking between time in the media with required arg is time which is supported int,str and datetime.timedelta. Returns bool indicate requests was successful or not
-        :return: bool
-        """
-        if isinstance(time, datetime.timedelta):
-            time = time.total_seconds()
+    def __repr__(self) -> str:
         return (
-            requests.get(
-                self.url + "/requests/status.xml?command=seek&val=" + str(time),
-                auth=self.auth,
-            ).status_code
-            == 200
+            "CommandResult(target={!r}, value={!r}, error={!r}, elapsed={:.3f})".format(
+                self.target, self.value, self.error, self.elapsed
+            )
         )
 
-    @property
-    def time(self) -> int:
-        """
-        Give the current time media is at (Unit seconds)
-        :return: int, str
-        """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return content["root"]["time"]
 
-    @property
-    def duration(self) -> float:
-        """
-        Give how long media is. (Unit seconds)
-        :return: int, str
-        """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return content["root"]["length"]
+class FleetResult(dict):
+    """
+    `CommandResult` of every node of a `VLCFleet` broadcast, keyed by node url
+    """
 
     @property
-    def position(self) -> float:
+    def ok(self) -> bool:
         """
-        Get current bar position (0,1)
-        :return: float, str
+        Every node accepted the command
+        :return: bool
         """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return content["root"]["position"]
+        return all(result.ok for result in self.values())
 
     @property
-    def state(self) -> VLC_State:
+    def succeeded(self) -> typing.List[CommandResult]:
         """
-        Give current state of the playback.
-        :return: str
+        Results of the nodes that accepted the command
+        :return: list of CommandResult
         """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
-        )
-        return VLC_State(content["root"]["state"])
+        return [result for result in self.values() if result.ok]
 
     @property
-    def volume(self) -> typing.Union[int, float]:
+    def failed(self) -> typing.List[CommandResult]:
         """
-        Get current playback's volume (0-512)
-        If you want percentage returns then set the property of `volume_percentage` to `True`
-        :return: int
+        Results of the nodes that failed, timed out or refused the command
+        :return: list of CommandResult
         """
-        content = xmltodict.parse(
-            requests.get(self.url + "/requests/status.xml", auth=self.auth).text
+        return [result for result in self.values() if not result.ok]
+
+
+def _write_playlist_file(
+    uris: typing.List[str], playlist_format: str, directory: typing.Optional[str]
+) -> str:
+    if playlist_format == "m3u":
+        suffix = ".m3u"
+        content = "#EXTM3U\n" + "".join(uri + "\n" for uri in uris)
+    elif playlist_format == "xspf":
+        suffix = ".xspf"
+        content = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<playlist xmlns="http://xspf.org/ns/0/" version="1">\n<trackList>\n'
+            + "".join(
+                "<track><location>{}</location></track>\n".format(
+                    html.escape(uri, quote=False)
+                )
+                for uri in uris
+            )
+            + "</trackList>\n</playlist>\n"
         )
-        if self.volume_percentage:
-            return float(content["root"]["volume"] / 2.56)
-        else:
-            return int(content["root"]["volume"])
+    else:
+        raise ValueError("Playlist format must be 'm3u' or 'xspf'")
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=suffix, dir=directory, delete=False, encoding="utf-8"
+    ) as file:
+        file.write(content)
+    return pathlib.Path(file.name).resolve().as_uri()
 
 
-# ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+class _StatusCache:
+    # TTL cache for the StatusSnapshot of one client, a ttl of 0 disables it.
+    # Every invalidation bumps the generation so that a fetch which started
+    # before a command cannot store the state it read from before that command.
+    # A command invalidates when it is sent and stores the status it is answered
+    # with only if no later command was sent meanwhile, bumping the generation
+    # again so fetches that started while it was in flight cannot overwrite it.
+    # The lock makes those checks and bumps atomic for the threads of VLC.
 
-if not aiohttp_exists:
-    warnings.warn(
-        "aiohttp is not installed, so you can't use the async version of this library",
-        RuntimeWarning,
-    )
+    __slots__ = ("ttl", "snapshot", "expires", "generation", "lock")
 
-    class Async_VLC:
-        def __init__(self, *args) -> bool:
-            raise ImportError("No aiohttp exists")
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.snapshot = None
+        self.expires = 0.0
+        self.generation = 0
+        self.lock = threading.Lock()
 
-        def __getattr__(cls, name) -> bool:
-            raise ImportError("No aiohttp exists")
+    def get(self) -> typing.Optional[StatusSnapshot]:
+        with self.lock:
+            if self.snapshot is not None and time.monotonic() < self.expires:
+                return self.snapshot
+        return None
 
-    class aiohttp_wrap:
-        def __init__(self, *args) -> bool:
-            raise ImportError("No aiohttp exists")
+    def put(self, snapshot: StatusSnapshot, generation: int) -> None:
+        with self.lock:
+            if self.ttl > 0 and generation == self.generation:
+                self.snapshot = snapshot
+                self.expires = time.monotonic() + self.ttl
 
-        def __getattr__(cls, name) -> bool:
-            raise ImportError("No aiohttp exists")
+    def put_answer(self, snapshot: StatusSnapshot, generation: int) -> None:
+        with self.lock:
+            if generation == self.generation:
+                self.generation += 1
+                if self.ttl > 0:
+                    self.snapshot = snapshot
+                    self.expires = time.monotonic() + self.ttl
 
-else:
+    def invalidate(self) -> int:
+        with self.lock:
+            self.snapshot = None
+            self.generation += 1
+            return self.generation
 
-    class dummy:
-        pass
 
-    class aiohttp_wrap:
-        async def get(self, *args, **kwargs):
-            async with aiohttp.ClientSession() as session:
-                async with session.get(*args, **kwargs) as response:
-                    d = dummy()
-                    d.status = response.status
-                    d.status_code = response.status
-                    d.text = await response.text()
-            return d
-
-        async def post(self, *args, **kwargs):
-            async with aiohttp.ClientSession() as session:
-                async with session.post(*args, **kwargs) as response:
-                    d = dummy()
-                    d.status = response.status
-                    d.status_code = response.status
-                    d.text = await response.text()
-            return d
-
-        async def put(self, *args, **kwargs):
-            async with aiohttp.ClientSession() as session:
-                async with session.put(*args, **kwargs) as response:
-                    d = dummy()
-                    d.status = response.status
-                    d.status_code = response.status
-                    d.text = await response.text()
-            return d
-
-        async def patch(self, *args, **kwargs):
-            async with aiohttp.ClientSession() as session:
-                async with session.patch(*args, **kwargs) as response:
-                    d = dummy()
-                    d.status = response.status
-                    d.status_code = response.status
-                    d.text = await response.text()
-            return d
-
-        async def delete(self, *args, **kwargs):
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(*args, **kwargs) as response:
-                    d = dummy()
-                    d.status = response.status
-                    d.status_code = response.status
-                    d.text = await response.text()
-            return d
-
-    aiohttp_wrap = aiohttp_wrap()
-
-    class Async_VLC:
-        def __init__(
-            self,
-            url: str = "http://localhost:8080",
-            auth: typing.Union[aiohttp.BasicAuth, tuple, set, list] = aiohttp.BasicAuth(
-                "", ""
-            ),
-        ) -> None:
-            """
-            VLC Class
-            This class will initialize a VLC instance by connect to it using REST API w/ HTTP Basic Auth.
-            This class is blocking.
-            If you want to use asynchornous version please install
-            `aiohttp <https://pypi.org/project/aiohttp/>`_
-            :param url: VLC url
-            :param auth: VLC auth
-            :return: None
-            """
-            self.url = url
-            if isinstance(auth, (tuple, set, list)):
-                if len(auth) != 2:
-                    raise ValueError(
-                        "Auth must be tuple or list of length 2 which is username and password"
-                    )
-                self.auth = aiohttp.BasicAuth(*auth)
-            if not asyncio.run(self.connectable):
-                raise Exception("VLC is not running or REST API is not enabled")
-            self.full_screen = None
+class StatusEvent:
+    """
+    Base of the events delivered by `watch` and `subscribe`.
+    `previous` is the snapshot before the change, None for the events describing the first snapshot
+    """
 
-        def __encode_uri(self, url: str) -> bool:
-            return urllib.parse.quote(url)
+    __slots__ = ("previous", "snapshot")
+    kind = "status"
 
-        def __set_name__(self, owner, name):
-            self.name = "_" + name
+    def __init__(
+        self, previous: typing.Optional[StatusSnapshot], snapshot: StatusSnapshot
+    ) -> None:
+        self.previous = previous
+        self.snapshot = snapshot
 
-        def __getattr__(self, name):
+    def __repr__(self) -> str:
+        return "{}({!r})".format(type(self).__name__, self.snapshot)
+
+
+class StateChanged(StatusEvent):
+    """
+    Playback switched between playing, paused and stopped
+    """
+
+    __slots__ = ()
+    kind = "state"
+
+    @property
+    def state(self) -> VLC_State:
+        """
+        The new state
+        :return: VLC_State
+        """
+        return self.snapshot.state
+
+
+class TrackChanged(StatusEvent):
+    """
+    Another playlist item became the current one
+    """
+
+    __slots__ = ()
+    kind = "track"
+
+    @property
+    def current_id(self) -> int:
+        """
+        Playlist id of the new current item
+        :return: int
+        """
+        return self.snapshot.current_id
+
+
+class VolumeChanged(StatusEvent):
+    """
+    The volume changed
+    """
+
+    __slots__ = ()
+    kind = "volume"
+
+    @property
+    def volume(self) -> int:
+        """
+        The new volume, 0-512
+        :return: int
+        """
+        return self.snapshot.volume
+
+
+class PositionTick(StatusEvent):
+    """
+    The playback position moved, by playing or by seeking
+    """
+
+    __slots__ = ()
+    kind = "position"
+
+    @property
+    def time(self) -> int:
+        """
+        Seconds into the current item
+        :return: int
+        """
+        return self.snapshot.time
+
+    @property
+    def position(self) -> float:
+        """
+        Position in the current item between 0 and 1
+        :return: float
+        """
+        return self.snapshot.position
+
+
+def _status_events(
+    previous: typing.Optional[StatusSnapshot], current: StatusSnapshot
+) -> typing.List[StatusEvent]:
+    if previous is None:
+        return [
+            StateChanged(None, current),
+            TrackChanged(None, current),
+            VolumeChanged(None, current),
+            PositionTick(None, current),
+        ]
+    events = []
+    if current.state != previous.state:
+        events.append(StateChanged(previous, current))
+    if current.current_id != previous.current_id:
+        events.append(TrackChanged(previous, current))
+    if current.volume != previous.volume:
+        events.append(VolumeChanged(previous, current))
+    if current.time != previous.time or current.position != previous.position:
+        events.append(PositionTick(previous, current))
+    return events
+
+
+def _poll_delay(
+    previous: typing.Optional[StatusSnapshot],
+    current: StatusSnapshot,
+    elapsed: float,
+    interval: float,
+) -> float:
+    # nothing moves while paused or stopped, poll slowly
+    if current.state != VLC_State.playing:
+        return interval * 4
+    if previous is not None and (
+        previous.state != current.state
+        or previous.current_id != current.current_id
+        # the time moved further than the wall clock did, someone is seeking
+        or abs(current.time - previous.time - elapsed) > 2
+    ):
+        return interval / 4
+    # catch the track change at the end of the item quickly
+    if current.duration and current.duration - current.time <= interval * 2:
+        return interval / 4
+    return interval
+
+
+class _StatusWatcher:
+    # Subscribers of one client's poller and the last snapshot it saw, shared by
+    # the thread of VLC and the task of Async_VLC. The poller runs at the smallest
+    # interval any subscriber asked for. Threads may subscribe while the poller runs,
+    # the callbacks themselves are called outside of the lock.
+
+    __slots__ = ("callbacks", "previous", "polled_at", "lock")
+
+    def __init__(self) -> None:
+        self.callbacks = {}
+        self.previous = None
+        self.polled_at = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        with self.lock:
+            return min(self.callbacks.values(), default=1.0)
+
+    def add(self, callback: typing.Callable, interval: float) -> None:
+        with self.lock:
+            self.callbacks[callback] = interval
+            previous = self.previous
+        if previous is not None:  # a late subscriber starts from the current state
+            self.notify(callback, _status_events(None, previous))
+
+    def remove(self, callback: typing.Callable) -> None:
+        with self.lock:
+            self.callbacks.pop(callback, None)
+            if not self.callbacks:
+                self.previous = None
+
+    def update(self, snapshot: StatusSnapshot) -> float:
+        now = time.monotonic()
+        with self.lock:
+            events = _status_events(self.previous, snapshot)
+            delay = _poll_delay(
+                self.previous,
+                snapshot,
+                now - self.polled_at,
+                min(self.callbacks.values(), default=1.0),
+            )
+            self.previous = snapshot
+            self.polled_at = now
+            callbacks = list(self.callbacks)
+        for callback in callbacks:
+            self.notify(callback, events)
+        return delay
+
+    def notify(self, callback: typing.Callable, events: list) -> None:
+        for event in events:
+            try:
+                callback(event)
+            except Exception as error:  # one broken subscriber must not stop the poller
+                warnings.warn(
+                    "Status subscriber {!r} raised {!r}".format(callback, error),
+                    RuntimeWarning,
+                )
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to a VLC whose circuit breaker is open
+    """
+
+
+class HTTPStatusError(Exception):
+    """
+    Raised when VLC answers with an error status where a status is expected, e.g. 401 for a wrong password
+    """
+
+    def __init__(self, status_code: int, url: str) -> None:
+        """
+        :param status_code: HTTP status of the response
+        :param url: url of the request
+        :return: None
+        """
+        super().__init__("VLC answered HTTP {} to {}".format(status_code, url))
+        self.status_code = status_code
+        self.url = url
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a VLC after `failure_threshold` connection errors or timeouts in a row.
+    Once `reset_timeout` seconds have passed one trial request is let through,
+    its success closes the circuit again and its failure keeps it open for another `reset_timeout`
+    """
+
+    __slots__ = (
+        "failure_threshold",
+        "reset_timeout",
+        "failures",
+        "opened_at",
+        "trial",
+        "lock",
+    )
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        """
+        :param failure_threshold: failures in a row that open the circuit, 0 never opens it
+        :param reset_timeout: seconds the circuit stays open before a trial request
+        :return: None
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        "closed", "open" or "half-open" while a trial request is running
+        :return: str
+        """
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.trial else "open"
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now
+        :return: bool
+        """
+        if self.opened_at is None:
+            return True
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            # re-arm, so a trial that never reports back only blocks for one more period
+            self.opened_at = now
+            self.trial = True
+            return True
+
+    def record_success(self) -> None:
+        """
+        VLC answered, close the circuit
+        :return: None
+        """
+        if not self.failures and self.opened_at is None:
+            return
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def record_failure(self) -> None:
+        """
+        VLC could not be reached or timed out
+        :return: None
+        """
+        with self.lock:
+            self.failures += 1
+            if self.trial or (
+                self.failure_threshold and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+
+# upper bounds in seconds of the buckets of the latency histograms
+_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Span:
+    """
+    One HTTP call to VLC, given to the span hooks of `Metrics` once it has finished.
+    `start` and `end` are `time.time()` seconds, so a hook can hand them on to a tracer,
+    e.g. for OpenTelemetry::
+
+        def hook(span):
+            otel_span = tracer.start_span(
+                span.name, start_time=int(span.start * 1e9), attributes=span.attributes
+            )
+            if span.error is not None:
+                otel_span.record_exception(span.error)
+            otel_span.end(end_time=int(span.end * 1e9))
+    """
+
+    __slots__ = ("name", "start", "end", "attributes", "error")
+
+    def __init__(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        attributes: dict,
+        error: typing.Optional[BaseException] = None,
+    ) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.attributes = attributes
+        self.error = error
+
+    @property
+    def duration(self) -> float:
+        """
+        Seconds the call took
+        :return: float
+        """
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return "Span({!r}, duration={:.6f}, attributes={!r}, error={!r})".format(
+            self.name, self.duration, self.attributes, self.error
+        )
+
+
+class _Histogram:
+    # Latency histogram of one series, counts[i] holds the values of bucket i only,
+    # they are summed up into Prometheus' cumulative buckets on export.
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Latency histograms and counters of the HTTP calls of the clients it is given to,
+    pass `metrics=True` to a client for its own instance or share one instance between many clients.
+    Every call is timed in phases: `wait` until the response headers arrived, which includes opening
+    a connection when none is pooled and VLC's own work, `transfer` for reading the body and
+    `parse` for decoding it. Series are keyed by VLC url and endpoint, which is the name of a command
+    or "status", "playlist" or "browse".
+    Export them with `prometheus_text`, read them with `stats` or follow every call with `add_span_hook`
+    """
+
+    __slots__ = (
+        "buckets",
+        "histograms",
+        "requests",
+        "errors",
+        "bytes",
+        "cache",
+        "span_hooks",
+        "lock",
+    )
+
+    def __init__(self, buckets: typing.Iterable[float] = _LATENCY_BUCKETS) -> None:
+        """
+        :param buckets: upper bounds in seconds of the histogram buckets
+        :return: None
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.histograms = {}  # (url, endpoint, phase) -> _Histogram
+        self.requests = collections.Counter()  # (url, endpoint, status code)
+        self.errors = collections.Counter()  # (url, endpoint, error)
+        self.bytes = collections.Counter()  # (url, endpoint)
+        self.cache = collections.Counter()  # (url, "hit" or "miss")
+        self.span_hooks = []
+        self.lock = threading.Lock()
+
+    def add_span_hook(self, hook: typing.Callable[[Span], None]) -> None:
+        """
+        Call `hook` with a `Span` for every HTTP call once it has finished.
+        Hooks run on the thread or event loop that sent the request and should return quickly
+        :param hook: function taking a Span
+        :return: None
+        """
+        self.span_hooks.append(hook)
+
+    def remove_span_hook(self, hook: typing.Callable[[Span], None]) -> None:
+        """
+        Stop calling `hook`
+        :param hook: function given to add_span_hook
+        :return: None
+        """
+        if hook in self.span_hooks:
+            self.span_hooks.remove(hook)
+
+    def __observe(self, key: tuple, seconds: float) -> None:
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = _Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def observe(self, url: str, endpoint: str, phase: str, seconds: float) -> None:
+        """
+        Add one duration to the histogram of a phase
+        :param url: VLC url
+        :param endpoint: command name, "status", "playlist" or "browse"
+        :param phase: "wait", "transfer" or "parse"
+        :param seconds: duration
+        :return: None
+        """
+        with self.lock:
+            self.__observe((url, endpoint, phase), seconds)
+
+    def record_call(
+        self,
+        url: str,
+        endpoint: str,
+        request_url: str,
+        attempt: int,
+        wait: float,
+        transfer: float = 0.0,
+        status: typing.Optional[int] = None,
+        size: int = 0,
+        error: typing.Optional[BaseException] = None,
+    ) -> None:
+        """
+        Count one HTTP call and report it to the span hooks
+        :param url: VLC url
+        :param endpoint: command name, "status", "playlist" or "browse"
+        :param request_url: full url of the request
+        :param attempt: 0 for the first try, 1 for the first retry and so on
+        :param wait: seconds until the response headers arrived, or until the call failed
+        :param transfer: seconds reading the body
+        :param status: HTTP status code, None when no response came
+        :param size: bytes of the body
+        :param error: exception the call failed with
+        :return: None
+        """
+        with self.lock:
+            if error is not None:
+                self.errors[(url, endpoint, type(error).__name__)] += 1
+            else:
+                self.requests[(url, endpoint, status)] += 1
+                self.bytes[(url, endpoint)] += size
+                if status >= 400:
+                    self.errors[(url, endpoint, "HTTP {}".format(status))] += 1
+                self.__observe((url, endpoint, "transfer"), transfer)
+            self.__observe((url, endpoint, "wait"), wait)
+        if not self.span_hooks:
+            return
+        end = time.time()
+        attributes = {
+            "http.method": "GET",
+            "http.url": request_url,
+            "vlc.endpoint": endpoint,
+            "vlc.attempt": attempt,
+        }
+        if status is not None:
+            attributes["http.status_code"] = status
+            attributes["http.response_content_length"] = size
+        span = Span(
+            "rest_vlc " + endpoint, end - wait - transfer, end, attributes, error
+        )
+        for hook in list(self.span_hooks):
+            try:
+                hook(span)
+            except Exception as e:  # tracing must never break a command
+                warnings.warn(
+                    "Span hook {!r} raised {!r}".format(hook, e), RuntimeWarning
+                )
+
+    def record_error(self, url: str, endpoint: str, error: str) -> None:
+        """
+        Count a call that failed before it was sent
+        :param url: VLC url
+        :param endpoint: command name, "status", "playlist" or "browse"
+        :param error: name of the error
+        :return: None
+        """
+        with self.lock:
+            self.errors[(url, endpoint, error)] += 1
+
+    def record_cache(self, url: str, hit: bool) -> None:
+        """
+        Count one lookup of the status cache
+        :param url: VLC url
+        :param hit: the cached status was used
+        :return: None
+        """
+        with self.lock:
+            self.cache[(url, "hit" if hit else "miss")] += 1
+
+    def stats(self) -> dict:
+        """
+        Totals per VLC url and endpoint: requests, errors, bytes and the count,
+        mean and total seconds of every phase, plus the status cache hits and misses per url
+        :return: dict
+        """
+        stats = {}
+
+        def entry(url: str, endpoint: str) -> dict:
+            return stats.setdefault(url, {}).setdefault(
+                endpoint, {"requests": 0, "errors": 0, "bytes": 0}
+            )
+
+        with self.lock:
+            for (url, endpoint, _), count in self.requests.items():
+                entry(url, endpoint)["requests"] += count
+            for (url, endpoint, _), count in self.errors.items():
+                entry(url, endpoint)["errors"] += count
+            for (url, endpoint), size in self.bytes.items():
+                entry(url, endpoint)["bytes"] += size
+            for (url, endpoint, phase), histogram in self.histograms.items():
+                entry(url, endpoint)[phase] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count,
+                }
+            for (url, result), count in self.cache.items():
+                stats.setdefault(url, {}).setdefault("cache", {})[result] = count
+        return stats
+
+    def reset(self) -> None:
+        """
+        Drop every recorded value, the span hooks are kept
+        :return: None
+        """
+        with self.lock:
+            self.histograms.clear()
+            self.requests.clear()
+            self.errors.clear()
+            self.bytes.clear()
+            self.cache.clear()
+
+
+def _timed_parse(
+    client: typing.Union["VLC", "Async_VLC"],
+    endpoint: str,
+    parse: typing.Callable,
+    body: typing.Union[str, bytes],
+) -> typing.Any:
+    # parse a response body, timed when the client has metrics
+    if client.metrics is None:
+        return parse(body)
+    start = time.perf_counter()
+    result = parse(body)
+    client.metrics.observe(client.url, endpoint, "parse", time.perf_counter() - start)
+    return result
+
+
+def _record_stream(
+    client: typing.Union["VLC", "Async_VLC"],
+    url: str,
+    streamed: "_StreamedResponse",
+    status: int,
+    transfer: float,
+    parse: float,
+    size: int,
+) -> None:
+    # count a streamed playlist call once its body is read, or given up on
+    if client.metrics is None:
+        return
+    client.metrics.record_call(
+        client.url,
+        "playlist",
+        url,
+        streamed.attempt,
+        streamed.wait,
+        transfer,
+        status,
+        size,
+    )
+    client.metrics.observe(client.url, "playlist", "parse", parse)
+
+
+def _prometheus_labels(**labels) -> str:
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+
+
+def prometheus_text(*metrics: Metrics) -> str:
+    """
+    Render metrics in the Prometheus text exposition format, e.g. to serve them on `/metrics`
+    :param metrics: Metrics to export, the series of several instances are listed together
+    :return: str
+    """
+    lines = [
+        "# HELP rest_vlc_request_duration_seconds Time of the HTTP calls to VLC by phase",
+        "# TYPE rest_vlc_request_duration_seconds histogram",
+    ]
+    for instance in metrics:
+        with instance.lock:
+            histograms = list(instance.histograms.items())
+        for (url, endpoint, phase), histogram in histograms:
+            labels = _prometheus_labels(url=url, endpoint=endpoint, phase=phase)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(
+                    'rest_vlc_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                        labels, bound, cumulative
+                    )
+                )
+            lines.append(
+                "rest_vlc_request_duration_seconds_sum{{{}}} {}".format(
+                    labels, histogram.sum
+                )
+            )
+            lines.append(
+                "rest_vlc_request_duration_seconds_count{{{}}} {}".format(
+                    labels, histogram.count
+                )
+            )
+    for name, description, attribute, label_names in (
+        (
+            "rest_vlc_requests_total",
+            "HTTP responses from VLC",
+            "requests",
+            ("url", "endpoint", "code"),
+        ),
+        (
+            "rest_vlc_errors_total",
+            "Failed HTTP calls to VLC",
+            "errors",
+            ("url", "endpoint", "error"),
+        ),
+        (
+            "rest_vlc_response_bytes_total",
+            "Bytes of the response bodies from VLC",
+            "bytes",
+            ("url", "endpoint"),
+        ),
+        (
+            "rest_vlc_status_cache_total",
+            "Lookups of the status cache",
+            "cache",
+            ("url", "result"),
+        ),
+    ):
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} counter".format(name))
+        for instance in metrics:
+            with instance.lock:
+                values = list(getattr(instance, attribute).items())
+            for key, value in values:
+                lines.append(
+                    "{}{{{}}} {}".format(
+                        name, _prometheus_labels(**dict(zip(label_names, key))), value
+                    )
+                )
+    return "\n".join(lines) + "\n"
+
+
+# commands that leave VLC in the same state however many times they are sent,
+# only these (and plain reads) are retried. pl_random, pl_repeat and pl_loop are
+# not: VLC ignores their state and toggles, so a resent one undoes the first
+_IDEMPOTENT_COMMANDS = frozenset(
+    ("pl_stop", "pl_empty", "volume", "seek", "pl_delete", "pl_history")
+)
+
+
+# relative seeks and volume steps add up when repeated
+_RELATIVE_PREFIXES = ("+", "-", "%2B", "%2b")
+
+
+def _is_idempotent(query: str) -> bool:
+    fields = dict(field.partition("=")[::2] for field in query.split("&"))
+    if fields.get("command") not in _IDEMPOTENT_COMMANDS:
+        return False
+    return not fields.get("val", "").startswith(_RELATIVE_PREFIXES)
+
+
+# absolute setters, only the latest pending value of each is worth sending. The
+# random, repeat and loop toggles are not: merging two of them changes the result
+_COALESCED_COMMANDS = frozenset(("volume", "seek"))
+
+
+def _coalesce_key(query: str) -> typing.Optional[str]:
+    command = query.partition("&")[0].partition("=")[2]
+    if command in _COALESCED_COMMANDS and _is_idempotent(query):
+        return command
+    return None
+
+
+class _CommandSpec:
+    # One entry of the command table: the static query string of a command, the
+    # variable parameter (if any) is appended to it per call. Whether it may be
+    # resent or coalesced is worked out once here instead of on every call.
+
+    __slots__ = ("query", "idempotent", "coalesce_key")
+
+    def __init__(self, query: str) -> None:
+        self.query = query
+        self.idempotent = _is_idempotent(query)
+        self.coalesce_key = _coalesce_key(query)
+
+
+_COMMANDS = {
+    name: _CommandSpec(query)
+    for name, query in (
+        ("stop", "command=pl_stop"),
+        ("clear_playlist", "command=pl_empty"),
+        ("play", "command=in_play&input="),
+        ("append_queue", "command=in_enqueue&input="),
+        ("set_volume", "command=volume&val="),
+        ("set_random", "command=pl_random&state="),
+        ("set_repeat_media", "command=pl_repeat&state="),
+        ("set_loop_queue", "command=pl_loop&state="),
+        ("fullscreen", "command=fullscreen"),
+        ("previous", "command=pl_previous"),
+        ("delete", "command=pl_delete&id="),
+        ("next", "command=pl_next"),
+        ("clear_history", "command=pl_history&val=clear"),
+        ("pause", "command=pl_pause"),
+        ("seek", "command=seek&val="),
+    )
+}
+
+
+def _command_urls(status_url: str) -> typing.Dict[str, str]:
+    return {name: status_url + "?" + spec.query for name, spec in _COMMANDS.items()}
+
+
+def _basic_auth_header(
+    username: typing.Union[str, bytes],
+    password: typing.Union[str, bytes],
+    encoding: str = "latin1",
+) -> str:
+    if isinstance(username, str):
+        username = username.encode(encoding)
+    if isinstance(password, str):
+        password = password.encode(encoding)
+    return "Basic " + base64.b64encode(username + b":" + password).decode("ascii")
+
+
+class _PendingCommands:
+    # Commands of one client waiting for its writer, oldest first. A command with
+    # a coalescing key replaces the pending command with the same key and moves to
+    # the back, so an obsolete value is never sent and the latest one still goes
+    # after every command issued before it. Every caller of the replaced command
+    # waits for the one that replaced it.
+
+    __slots__ = (
+        "entries",
+        "unique",
+        "max_depth",
+        "waiting",
+        "enqueued",
+        "coalesced",
+        "sent",
+        "failed",
+    )
+
+    def __init__(self) -> None:
+        self.entries = collections.OrderedDict()
+        self.unique = itertools.count()
+        self.max_depth = 0
+        self.waiting = 0
+        self.enqueued = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: typing.Optional[str]) -> bool:
+        return key is not None and key in self.entries
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.entries),
+            "max_depth": self.max_depth,
+            "waiting": self.waiting,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+    def push(
+        self,
+        key: typing.Optional[str],
+        send: typing.Callable,
+        request: typing.Any,
+        waiter: typing.Any,
+    ) -> None:
+        if key is None:
+            key = next(self.unique)
+        self.enqueued += 1
+        if key in self.entries:
+            self.coalesced += 1
+            waiters = self.entries.pop(key)[2]
+        else:
+            waiters = []
+        waiters.append(waiter)
+        self.entries[key] = (send, request, waiters)
+        self.max_depth = max(self.max_depth, len(self.entries))
+
+    def pop(self) -> tuple:
+        return self.entries.popitem(last=False)[1]
+
+
+def _backoff(attempt: int, backoff: float, max_backoff: float) -> float:
+    # exponential backoff with jitter so retries of many clients do not line up
+    return min(max_backoff, backoff * 2**attempt) * random.uniform(0.5, 1.0)
+
+
+_STREAM_CHUNK_SIZE = 65536
+
+
+class _StreamedResponse:
+    # A response whose body is read by the caller, with what its metrics need
+    # once the body is done.
+
+    __slots__ = ("response", "attempt", "wait")
+
+    def __init__(self, response: typing.Any, attempt: int, wait: float) -> None:
+        self.response = response
+        self.attempt = attempt
+        self.wait = wait
+
+
+class _RawResponse:
+    # The parts of a requests.Response the blocking client uses, read straight off
+    # a pipelined connection.
+
+    __slots__ = ("status_code", "headers", "content", "elapsed")
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: typing.Dict[str, str],
+        content: bytes,
+        elapsed: datetime.timedelta,
+    ) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    @property
+    def text(self) -> str:
+        _, _, charset = self.headers.get("content-type", "").partition("charset=")
+        return self.content.decode(charset.strip() or "utf-8", "replace")
+
+
+def _read_response(reader: typing.BinaryIO) -> typing.Tuple[int, dict, bytes, bool]:
+    # status, headers, body and whether the server closes the connection after it
+    line = reader.readline(65537)
+    if not line:
+        raise requests.exceptions.ConnectionError("VLC closed the connection")
+    version, status = line.split(None, 2)[:2]
+    headers = {}
+    while True:
+        line = reader.readline(65537)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    connection = headers.get("connection", "").lower()
+    closes = connection == "close" or (
+        version == b"HTTP/1.0" and connection != "keep-alive"
+    )
+    if "content-length" in headers:
+        body = reader.read(int(headers["content-length"]))
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int(reader.readline(65537).split(b";")[0], 16)
+            if not size:
+                while reader.readline(65537) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                break
+            chunks.append(reader.read(size))
+            reader.readline(65537)
+        body = b"".join(chunks)
+    else:  # the body ends with the connection
+        body = reader.read()
+        closes = True
+    return int(status), headers, body, closes
+
+
+class _PipelinedConnection:
+    # One persistent connection to VLC. Requests are written as soon as they are
+    # submitted, without waiting for the answers to the earlier ones, and a reader
+    # thread hands out the responses in the order the requests were written. Once
+    # broken it fails everything outstanding and is replaced by _Pipeline.
+
+    __slots__ = ("sock", "reader", "pending", "lock", "ready", "alive", "read_timeout")
+
+    def __init__(
+        self,
+        address: tuple,
+        connect_timeout: typing.Optional[float],
+        read_timeout: typing.Optional[float],
+    ) -> None:
+        try:
+            self.sock = socket.create_connection(address, connect_timeout)
+        except socket.timeout as e:
+            raise requests.exceptions.ConnectTimeout(e) from None
+        except OSError as e:
+            raise requests.exceptions.ConnectionError(e) from None
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(read_timeout)
+        self.read_timeout = read_timeout
+        self.reader = self.sock.makefile("rb")
+        self.pending = collections.deque()  # (future, time the request was written)
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.alive = True
+        threading.Thread(target=self.__read, daemon=True).start()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def submit(self, data: bytes) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        with self.lock:
+            if not self.alive:
+                raise requests.exceptions.ConnectionError("connection is closed")
+            self.pending.append((future, time.perf_counter()))
+            try:
+                self.sock.sendall(data)
+            except OSError as e:
+                self.__fail(requests.exceptions.ConnectionError(e))
+            self.ready.notify()
+        return future
+
+    def close(self) -> None:
+        with self.lock:
+            self.__fail(requests.exceptions.ConnectionError("connection is closed"))
+
+    def __fail(self, error: Exception) -> None:
+        # lock held
+        self.alive = False
+        while self.pending:
+            future = self.pending.popleft()[0]
+            if not future.done():
+                future.set_exception(error)
+        self.ready.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __read(self) -> None:
+        while True:
+            with self.lock:
+                while self.alive and not self.pending:
+                    self.ready.wait()
+                if not self.alive:
+                    return
+                sent_at = self.pending[0][1]
+            try:
+                status, headers, body, closes = _read_response(self.reader)
+            except socket.timeout as e:
+                error = requests.exceptions.ReadTimeout(e)
+            except (OSError, ValueError, requests.exceptions.ConnectionError) as e:
+                error = requests.exceptions.ConnectionError(e)
+            else:
+                error = None
+            with self.lock:
+                if not self.alive:
+                    return
+                if error is not None:
+                    self.__fail(error)
+                    return
+                future = self.pending.popleft()[0]
+                if closes:
+                    self.__fail(
+                        requests.exceptions.ConnectionError("VLC closed the connection")
+                    )
+            elapsed = datetime.timedelta(seconds=time.perf_counter() - sent_at)
+            if not future.done():
+                future.set_result(_RawResponse(status, headers, body, elapsed))
+            if closes:
+                return
+
+
+class _Pipeline:
+    # Up to `size` pipelined connections of one blocking client. A request goes to
+    # an idle connection, a new one while there are fewer than `size`, or else the
+    # one with the fewest requests outstanding.
+
+    __slots__ = (
+        "address",
+        "base_path",
+        "head",
+        "size",
+        "connect_timeout",
+        "read_timeout",
+        "connections",
+        "lock",
+    )
+
+    def __init__(
+        self,
+        url: str,
+        size: int,
+        headers: typing.Mapping[str, str],
+        connect_timeout: typing.Optional[float],
+        read_timeout: typing.Optional[float],
+    ) -> None:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError("Pipelining is only available for http:// urls")
+        self.address = (parts.hostname, parts.port or 80)
+        self.base_path = parts.path.rstrip("/")
+        # everything after the request target, the same for every request
+        self.head = "".join(
+            "\r\n{}: {}".format(name, value)
+            for name, value in dict(
+                headers, Host=parts.netloc.rpartition("@")[2]
+            ).items()
+        )
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def request_bytes(self, path: str, authorization: str = "") -> bytes:
+        if authorization:
+            authorization = "\r\nAuthorization: " + authorization
+        return "GET {}{} HTTP/1.1{}{}\r\n\r\n".format(
+            self.base_path, path, self.head, authorization
+        ).encode("latin1")
+
+    def submit(self, data: bytes) -> concurrent.futures.Future:
+        with self.lock:
+            self.connections = [c for c in self.connections if c.alive]
+            connection = min(self.connections, key=len, default=None)
+            if connection is None or (
+                len(connection) and len(self.connections) < self.size
+            ):
+                connection = _PipelinedConnection(
+                    self.address, self.connect_timeout, self.read_timeout
+                )
+                self.connections.append(connection)
+        return connection.submit(data)
+
+    def request(
+        self, data: bytes, timeout: typing.Optional[float] = None
+    ) -> _RawResponse:
+        future = self.submit(data)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            raise requests.exceptions.ReadTimeout(
+                "VLC did not answer within {} seconds".format(timeout)
+            ) from None
+
+    def send_in_order(
+        self, messages: typing.Iterable[bytes], window: int
+    ) -> typing.Iterator[tuple]:
+        # Send the requests over a connection of their own with up to `window` of them
+        # unanswered and yield (response, error) of each in order. VLC handles the
+        # requests of a connection one after another, so they take effect in the order
+        # given. A broken connection fails the requests in flight on it, the rest go
+        # over a new one.
+        connection = None
+        in_flight = collections.deque()
+        try:
+            for data in messages:
+                if len(in_flight) >= window:
+                    yield _outcome(in_flight.popleft())
+                try:
+                    if connection is None or not connection.alive:
+                        connection = _PipelinedConnection(
+                            self.address, self.connect_timeout, self.read_timeout
+                        )
+                    in_flight.append(connection.submit(data))
+                except requests.exceptions.RequestException as error:
+                    in_flight.append(error)
+            while in_flight:
+                yield _outcome(in_flight.popleft())
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def close(self) -> None:
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for connection in connections:
+            connection.close()
+
+
+def _outcome(
+    future: typing.Union[concurrent.futures.Future, Exception],
+) -> typing.Tuple[typing.Optional[_RawResponse], typing.Optional[Exception]]:
+    if isinstance(future, Exception):
+        return None, future
+    try:
+        return future.result(), None
+    except requests.exceptions.RequestException as error:
+        return None, error
+
+
+def _append_results(
+    client: typing.Any, uris: typing.List[str], urls: typing.List[str], outcomes
+) -> typing.List[CommandResult]:
+    # CommandResult of every pipelined append, with the bookkeeping _fetch does for
+    # a request of its own
+    results = []
+    for uri, url, (response, error) in zip(uris, urls, outcomes):
+        if error is not None:
+            client.circuit_breaker.record_failure()
+            if client.metrics is not None:
+                client.metrics.record_call(
+                    client.url, "append_queue", url, 0, 0.0, error=error
+                )
+            results.append(CommandResult(uri, error=error))
+            continue
+        client.circuit_breaker.record_success()
+        elapsed = response.elapsed.total_seconds()
+        if client.metrics is not None:
+            client.metrics.record_call(
+                client.url,
+                "append_queue",
+                url,
+                0,
+                elapsed,
+                0.0,
+                response.status_code,
+                len(response.content),
+            )
+        value = response.status_code == 200
+        if client.command_status:
+            value = (
+                client._parse_snapshot(response.content, "append_queue")
+                if value
+                else None
+            )
+        results.append(CommandResult(uri, value, elapsed=elapsed))
+    client._status_cache.invalidate()
+    return results
+
+
+# The commands and status properties that are the same for VLC and Async_VLC are
+# written once below and installed on both classes by _generate_api. A command
+# builder turns the method's arguments into a _COMMANDS name and the variable part
+# of its query, a status getter computes the property from one StatusSnapshot.
+_COMMAND_BUILDERS = {}
+_STATUS_GETTERS = {}
+
+
+def _command_builder(builder: typing.Callable[..., tuple]) -> typing.Callable:
+    _COMMAND_BUILDERS[builder.__name__[len("_command_") :]] = builder
+    return builder
+
+
+def _status_getter(getter: typing.Callable[..., typing.Any]) -> typing.Callable:
+    _STATUS_GETTERS[getter.__name__[len("_status_") :]] = getter
+    return getter
+
+
+@_command_builder
+def _command_stop() -> tuple:
+    """
+    Stop the current playing media and return back the boolean of the result
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "stop", ""
+
+
+@_command_builder
+def _command_clear_playlist() -> tuple:
+    """
+    Clear the playlist and return back the boolean of the result
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "clear_playlist", ""
+
+
+@_command_builder
+def _command_play(uri: str) -> tuple:
+    """
+    Play a media by uri and return back the boolean of the result if success or not
+    :param uri: media uri
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "play", urllib.parse.quote(uri)
+
+
+@_command_builder
+def _command_append_queue(uri: str) -> tuple:
+    """
+    Append a media to the queue and return back the boolean of the result if success or not
+    :param uri: media uri
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "append_queue", urllib.parse.quote(uri)
+
+
+@_command_builder
+def _command_set_volume(volume: int, percent: bool = False) -> tuple:
+    """
+    Set the volume of VLC and return back the boolean of the result if success or not
+    :param volume: volume value (0-512 = 0-200%)
+    :param percent: option for volume is actually percentage or not
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    if percent:
+        volume = int(volume * 2.56)
+    return "set_volume", str(volume)
+
+
+@_command_builder
+def _command_set_random(random: bool) -> tuple:
+    """
+    Set the shuffle state of VLC and return back the boolean of the result if success or not
+    :param random: random state
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "set_random", str(random).lower()
+
+
+@_command_builder
+def _command_set_repeat_media(repeat: bool) -> tuple:
+    """
+    Set the repeat state of VLC and return back the boolean of the result if success or not
+    :param repeat: repeat state
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "set_repeat_media", str(repeat).lower()
+
+
+@_command_builder
+def _command_set_loop_queue(loop: bool) -> tuple:
+    """
+    Set the loop state of VLC and return back the boolean of the result if success or not
+    :param loop: loop state
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "set_loop_queue", str(loop).lower()
+
+
+@_command_builder
+def _command_previous() -> tuple:
+    """
+    Revert to previous media and return if request was successful or not
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "previous", ""
+
+
+@_command_builder
+def _command_next() -> tuple:
+    """
+    Skip to next media and return if request was successful or not
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "next", ""
+
+
+@_command_builder
+def _command_clear_history() -> tuple:
+    """
+    Clear the histories. Returns boolean indicate request is successful or not
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "clear_history", ""
+
+
+@_command_builder
+def _command_pause() -> tuple:
+    """
+    Pause the media playback. Returns bool indicate request was successful or not
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    return "pause", ""
+
+
+@_command_builder
+def _command_seek(time: typing.Union[str, datetime.timedelta, int]) -> tuple:
+    """
+    Seeking between time in the media with required arg is time which is supported int,str and datetime.timedelta. Returns bool indicate requests was successful or not
+    :return: bool, or with command_status the StatusSnapshot VLC sent back (None on failure)
+    """
+    if isinstance(time, datetime.timedelta):
+        time = time.total_seconds()
+    return "seek", str(time)
+
+
+@_status_getter
+def _status_is_random(client: typing.Any, snapshot: StatusSnapshot) -> bool:
+    """
+    A property to get the random state of VLC
+    :return: bool
+    """
+    return snapshot.is_random
+
+
+@_status_getter
+def _status_is_repeat_media(client: typing.Any, snapshot: StatusSnapshot) -> bool:
+    """
+    A property to get the repeat state of VLC
+    :return: bool
+    """
+    return snapshot.is_repeat_media
+
+
+@_status_getter
+def _status_is_loop_queue(client: typing.Any, snapshot: StatusSnapshot) -> bool:
+    """
+    A property to get the loop state of VLC
+    :return: bool
+    """
+    return snapshot.is_loop_queue
+
+
+@_status_getter
+def _status_is_fullscreen(client: typing.Any, snapshot: StatusSnapshot) -> bool:
+    """
+    Return the current state of VLC if VLC is in fullscreen returns true otherwise false
+    :return: bool
+    """
+    client.full_screen = snapshot.is_fullscreen
+    return snapshot.is_fullscreen
+
+
+@_status_getter
+def _status_is_paused(client: typing.Any, snapshot: StatusSnapshot) -> bool:
+    """
+    Check if the media is actually paused or not. Returns bool indicate media is paused or not
+    :return: bool
+    """
+    return snapshot.is_paused
+
+
+@_status_getter
+def _status_is_playing(client: typing.Any, snapshot: StatusSnapshot) -> bool:
+    """
+    Check if VLC is playing or not, a paused media counts as playing, only a stopped one does not
+    :return: bool
+    """
+    return snapshot.state is not VLC_State.stopped
+
+
+@_status_getter
+def _status_time(client: typing.Any, snapshot: StatusSnapshot) -> int:
+    """
+    Give the current time media is at (Unit seconds)
+    :return: int
+    """
+    return snapshot.time
+
+
+@_status_getter
+def _status_duration(client: typing.Any, snapshot: StatusSnapshot) -> int:
+    """
+    Give how long media is. (Unit seconds)
+    :return: int
+    """
+    return snapshot.duration
+
+
+@_status_getter
+def _status_position(client: typing.Any, snapshot: StatusSnapshot) -> float:
+    """
+    Get current bar position (0,1)
+    :return: float
+    """
+    return snapshot.position
+
+
+@_status_getter
+def _status_state(client: typing.Any, snapshot: StatusSnapshot) -> VLC_State:
+    """
+    Give current state of the playback.
+    :return: VLC_State
+    """
+    return snapshot.state
+
+
+@_status_getter
+def _status_volume(
+    client: typing.Any, snapshot: StatusSnapshot
+) -> typing.Union[int, float]:
+    """
+    Get current playback's volume (0-512)
+    If you want percentage returns then set the property of `volume_percentage` to `True`
+    :return: int
+    """
+    if client.volume_percentage:
+        return snapshot.volume / 2.56
+    return snapshot.volume
+
+
+# what a generated command returns: whether VLC accepted it, or with command_status
+# the status VLC answered with and None when it failed
+_CommandAnswer = typing.Union[bool, StatusSnapshot, None]
+
+
+def _generated_method(
+    name: str, builder: typing.Callable, asynchronous: bool
+) -> typing.Callable:
+    if asynchronous:
+
+        async def method(self, *args, **kwargs):
+            return await self._command(*builder(*args, **kwargs))
+
+    else:
+
+        def method(self, *args, **kwargs):
+            return self._command(*builder(*args, **kwargs))
+
+    signature = inspect.signature(builder)
+    method.__name__ = name
+    method.__doc__ = builder.__doc__
+    method.__signature__ = signature.replace(
+        parameters=[
+            inspect.Parameter("self", inspect.Parameter.POSITIONAL_OR_KEYWORD),
+            *signature.parameters.values(),
+        ],
+        return_annotation=_CommandAnswer,
+    )
+    return method
+
+
+def _generated_property(
+    name: str, getter: typing.Callable, asynchronous: bool
+) -> property:
+    if asynchronous:
+
+        async def fget(self):
+            return getter(self, await self.snapshot())
+
+    else:
+
+        def fget(self):
+            return getter(self, self.snapshot())
+
+    fget.__name__ = name
+    fget.__doc__ = getter.__doc__
+    return property(fget)
+
+
+def _generate_api(asynchronous: bool) -> typing.Callable[[type], type]:
+    # class decorator installing every builder and getter, methods written in the class win
+    def install(cls: type) -> type:
+        for name, builder in _COMMAND_BUILDERS.items():
+            if name not in cls.__dict__:
+                setattr(cls, name, _generated_method(name, builder, asynchronous))
+        for name, getter in _STATUS_GETTERS.items():
+            if name not in cls.__dict__:
+                setattr(cls, name, _generated_property(name, getter, asynchronous))
+        return cls
+
+    return install
+
+
+# _generate_api installs the commands and properties at runtime, static tools learn
+# about them from these base classes instead
+# begin of the code written by generate_stubs.py, do not edit
+if typing.TYPE_CHECKING:
+
+    class _Commands:
+        def stop(self) -> _CommandAnswer: ...
+        def clear_playlist(self) -> _CommandAnswer: ...
+        def play(self, uri: str) -> _CommandAnswer: ...
+        def append_queue(self, uri: str) -> _CommandAnswer: ...
+        def set_volume(self, volume: int, percent: bool = False) -> _CommandAnswer: ...
+        def set_random(self, random: bool) -> _CommandAnswer: ...
+        def set_repeat_media(self, repeat: bool) -> _CommandAnswer: ...
+        def set_loop_queue(self, loop: bool) -> _CommandAnswer: ...
+        def previous(self) -> _CommandAnswer: ...
+        def next(self) -> _CommandAnswer: ...
+        def clear_history(self) -> _CommandAnswer: ...
+        def pause(self) -> _CommandAnswer: ...
+        def seek(
+            self, time: typing.Union[str, datetime.timedelta, int]
+        ) -> _CommandAnswer: ...
+        @property
+        def is_random(self) -> bool: ...
+        @property
+        def is_repeat_media(self) -> bool: ...
+        @property
+        def is_loop_queue(self) -> bool: ...
+        @property
+        def is_fullscreen(self) -> bool: ...
+        @property
+        def is_paused(self) -> bool: ...
+        @property
+        def is_playing(self) -> bool: ...
+        @property
+        def time(self) -> int: ...
+        @property
+        def duration(self) -> int: ...
+        @property
+        def position(self) -> float: ...
+        @property
+        def state(self) -> VLC_State: ...
+        @property
+        def volume(self) -> typing.Union[int, float]: ...
+
+    class _AsyncCommands:
+        async def stop(self) -> _CommandAnswer: ...
+        async def clear_playlist(self) -> _CommandAnswer: ...
+        async def play(self, uri: str) -> _CommandAnswer: ...
+        async def append_queue(self, uri: str) -> _CommandAnswer: ...
+        async def set_volume(
+            self, volume: int, percent: bool = False
+        ) -> _CommandAnswer: ...
+        async def set_random(self, random: bool) -> _CommandAnswer: ...
+        async def set_repeat_media(self, repeat: bool) -> _CommandAnswer: ...
+        async def set_loop_queue(self, loop: bool) -> _CommandAnswer: ...
+        async def previous(self) -> _CommandAnswer: ...
+        async def next(self) -> _CommandAnswer: ...
+        async def clear_history(self) -> _CommandAnswer: ...
+        async def pause(self) -> _CommandAnswer: ...
+        async def seek(
+            self, time: typing.Union[str, datetime.timedelta, int]
+        ) -> _CommandAnswer: ...
+        @property
+        def is_random(self) -> typing.Awaitable[bool]: ...
+        @property
+        def is_repeat_media(self) -> typing.Awaitable[bool]: ...
+        @property
+        def is_loop_queue(self) -> typing.Awaitable[bool]: ...
+        @property
+        def is_fullscreen(self) -> typing.Awaitable[bool]: ...
+        @property
+        def is_paused(self) -> typing.Awaitable[bool]: ...
+        @property
+        def is_playing(self) -> typing.Awaitable[bool]: ...
+        @property
+        def time(self) -> typing.Awaitable[int]: ...
+        @property
+        def duration(self) -> typing.Awaitable[int]: ...
+        @property
+        def position(self) -> typing.Awaitable[float]: ...
+        @property
+        def state(self) -> typing.Awaitable[VLC_State]: ...
+        @property
+        def volume(self) -> typing.Awaitable[typing.Union[int, float]]: ...
+
+else:
+    _Commands = _AsyncCommands = object
+# end of the code written by generate_stubs.py
+
+
+@_generate_api(asynchronous=False)
+class VLC(_Commands):
+    """
+    VLC manager class
+    """
+
+    def __init__(
+        self,
+        url: str = "http://localhost:8080",
+        auth: typing.Union[
+            tuple, requests.auth.HTTPBasicAuth, list, set
+        ] = requests.auth.HTTPBasicAuth("", ""),
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        status_ttl: float = 0,
+        command_status: bool = False,
+        format: str = "xml",
+        lazy: bool = False,
+        connect_timeout: typing.Optional[float] = 5.0,
+        read_timeout: typing.Optional[float] = 10.0,
+        retries: int = 0,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        failure_threshold: int = 0,
+        reset_timeout: float = 30.0,
+        coalesce: bool = False,
+        ordered: bool = False,
+        queue_size: int = 0,
+        metrics: typing.Union[bool, Metrics] = False,
+        pipeline: int = 0,
+        executor: typing.Optional[concurrent.futures.Executor] = None,
+    ) -> None:
+        """
+        VLC Class
+        This class will initialize a VLC instance by connect to it using REST API w/ HTTP Basic Auth.
+        This class is blocking.
+        If you want to use asynchornous version please install
+        `aiohttp <https://pypi.org/project/aiohttp/>`_
+        With `lazy` the instance is created without talking to VLC, call `connect()` to check
+        the connection with a timeout or just start sending commands.
+        Every request goes through one pooled `requests.Session` owned by the instance,
+        call `close()` or use the instance as a context manager to release its connections.
+        One instance may be shared by many threads, up to `pool_size` of them send requests at the same time.
+        Settings like `volume_percentage` apply to every thread. `submit` and `map` run commands on a thread pool.
+        :param url: VLC url
+        :param auth: VLC auth
+        :param pool_size: maximum number of connections kept open to VLC
+        :param keep_alive: reuse connections between requests
+        :param status_ttl: seconds a fetched status is reused by the status properties, 0 disables the cache.
+        Commands sent through this instance replace the cached status with the one VLC sends back
+        :param command_status: make commands return the `StatusSnapshot` VLC sends back (None on failure) instead of a bool
+        :param format: "xml" or "json", which of VLC's status and playlist endpoints to use.
+        `status` and `playlist` return the decoded document of that format
+        while `snapshot` and `playlist_items` give the same objects for both
+        :param lazy: do not check the connection while constructing
+        :param connect_timeout: seconds to wait for a connection to VLC, None waits forever
+        :param read_timeout: seconds to wait for VLC to answer, None waits forever
+        :param retries: times a failed read or idempotent command is sent again.
+        Toggles, relative seeks and volume steps, and commands that add to the playlist are never retried
+        :param backoff: seconds before the first retry, doubled for each further one
+        :param max_backoff: upper bound of the wait between retries
+        :param failure_threshold: connection errors or timeouts in a row after which requests fail fast
+        with `CircuitOpenError` for `reset_timeout` seconds, 0 disables the circuit breaker
+        :param reset_timeout: seconds the circuit stays open before VLC is tried again
+        :param coalesce: send commands one at a time and in order through a background writer.
+        An absolute volume or seek command still waiting to be sent is replaced by a newer one,
+        and its caller gets the result of the newer one, so VLC never works through stale values
+        :param ordered: send commands one at a time and in order through a background writer, without coalescing
+        :param queue_size: commands the writer may have waiting, further callers block until there is room.
+        0 does not limit the queue, any other value implies `ordered`
+        :param metrics: record latency histograms and counters of every HTTP call in `self.metrics`,
+        True for a `Metrics` of this instance or a `Metrics` to share with other instances
+        :param pipeline: send requests over up to this many persistent connections of a lightweight
+        transport instead of `requests`. Requests are written back to back without waiting for the answers
+        to earlier ones (HTTP/1.1 pipelining) and the answers are read in order, so commands sent from
+        several threads do not wait for each other's round trips. Needs `keep_alive` and an http:// url,
+        proxies from the environment are not used. 0 uses `requests`
+        :param executor: executor for `submit` and `map`, share one to bound the threads of many instances.
+        By default the instance starts its own `ThreadPoolExecutor` of `pool_size` threads on first use
+        :return: None
+        """
+        if format not in ("xml", "json"):
+            raise ValueError("Format must be 'xml' or 'json'")
+        self.url = url
+        self.format = format
+        if isinstance(auth, (tuple, list, set)):
+            if len(auth) != 2:
+                raise ValueError(
+                    "Auth must be a tuple or list of 2 elements which is username and password"
+                )
+            self.auth = requests.auth.HTTPBasicAuth(*auth)
+        else:
+            self.auth = auth
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._request_auth = None
+        if isinstance(self.auth, requests.auth.HTTPBasicAuth):
+            # encoded once here instead of by requests on every request
+            self.session.headers["Authorization"] = _basic_auth_header(
+                self.auth.username, self.auth.password
+            )
+        else:
+            self._request_auth = self.auth
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+        # Everything about a request except its URL is the same for every command,
+        # so it is prepared once and only copied per call. This also saves requests
+        # from reading the proxy settings out of the environment on every call.
+        self._request_template = self.session.prepare_request(
+            requests.Request("GET", self.url)
+        )
+        self._send_options = self.session.merge_environment_settings(
+            self.url, {}, None, None, None
+        )
+        self._stream_options = dict(self._send_options, stream=True)
+        self._status_url = self.url + "/requests/status." + format
+        self._playlist_url = self.url + "/requests/playlist." + format
+        self._playlist_xml_url = self.url + "/requests/playlist.xml"
+        self._command_urls = _command_urls(self._status_url)
+        self._status_cache = _StatusCache(status_ttl)
+        self.command_status = command_status
+        self._playlist = Playlist()
+        self._timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = Metrics() if metrics is True else metrics or None
+        self._pipeline = None
+        if pipeline:
+            if not keep_alive:
+                raise ValueError("Pipelining needs keep_alive")
+            self._pipeline = self.__new_pipeline(pipeline)
+        self.coalesce = coalesce
+        self.ordered = ordered or coalesce or queue_size > 0
+        self._pending = _PendingCommands()
+        self._pending_lock = threading.Lock()
+        self._queue_slots = (
+            threading.BoundedSemaphore(queue_size) if queue_size else None
+        )
+        self._writer = None
+        self._watcher = _StatusWatcher()
+        self._watch_stop = None
+        self._full_screen = None
+        self.volume_percentage = False
+        self._lock = threading.RLock()  # playlist, fullscreen state and poller
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pool_size = pool_size
+        if not lazy and not self.connectable:
+            self.close()
+            raise Exception("VLC is not running or REST API is not enabled")
+
+    @property
+    def full_screen(self) -> bool:
+        """
+        The last known fullscreen state, only asked from VLC the first time it is needed
+        :return: bool
+        """
+        if self._full_screen is None:
+            fullscreen = self.is_fullscreen
+            with self._lock:
+                if self._full_screen is None:
+                    self._full_screen = fullscreen
+        return self._full_screen
+
+    @full_screen.setter
+    def full_screen(self, value: bool) -> None:
+        with self._lock:
+            self._full_screen = value
+
+    def __encode_uri(self, url: str) -> bool:
+        return urllib.parse.quote(url)
+
+    def __set_name__(self, owner, name):
+        self.name = "_" + name
+
+    if not typing.TYPE_CHECKING:  # unknown names stay errors for type checkers
+
+        def __getattr__(self, name):
+            if name not in self.__dict__:
+                warnings.warn(
+                    "Attribute '{}' is not defined in VLC class or not yet implemented".format(
+                        name
+                    ),
+                    UserWarning,
+                )
+                return (None,)
+            return self.__dict__[name]
+
+    def __enter__(self) -> "VLC":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get(
+        self,
+        path: str,
+        timeout: typing.Optional[float] = None,
+        idempotent: bool = True,
+        endpoint: str = "status",
+    ) -> typing.Union[requests.Response, _RawResponse]:
+        return self._fetch(self.url + path, timeout, idempotent, endpoint)
+
+    def _fetch(
+        self,
+        url: str,
+        timeout: typing.Optional[float] = None,
+        idempotent: bool = True,
+        endpoint: str = "status",
+        stream: bool = False,
+    ) -> typing.Union[requests.Response, _RawResponse, _StreamedResponse]:
+        attempts = self.retries + 1 if idempotent else 1
+        metrics = self.metrics
+        for attempt in range(attempts):
+            if not self.circuit_breaker.allow():
+                if metrics is not None:
+                    metrics.record_error(self.url, endpoint, "CircuitOpenError")
+                raise CircuitOpenError(
+                    "{} failed {} times in a row".format(
+                        self.url, self.circuit_breaker.failures
+                    )
+                )
+            start = time.perf_counter()
+            try:
+                if self._pipeline is not None and not stream:
+                    response = self.__send_pipelined(url, timeout)
+                else:
+                    request = self._request_template.copy()
+                    request.url = url
+                    if self._request_auth is not None:
+                        request.prepare_auth(self._request_auth)
+                    response = self.session.send(
+                        request,
+                        timeout=self._timeout if timeout is None else timeout,
+                        **(self._stream_options if stream else self._send_options)
+                    )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as error:
+                self.circuit_breaker.record_failure()
+                if metrics is not None:
+                    metrics.record_call(
+                        self.url,
+                        endpoint,
+                        url,
+                        attempt,
+                        time.perf_counter() - start,
+                        error=error,
+                    )
+                if attempt + 1 == attempts:
+                    raise
+                time.sleep(_backoff(attempt, self.backoff, self.max_backoff))
+            else:
+                self.circuit_breaker.record_success()
+                if stream:
+                    return _StreamedResponse(
+                        response, attempt, response.elapsed.total_seconds()
+                    )
+                if metrics is not None:
+                    # requests sets `elapsed` once the headers are read, before the body
+                    wait = response.elapsed.total_seconds()
+                    metrics.record_call(
+                        self.url,
+                        endpoint,
+                        url,
+                        attempt,
+                        wait,
+                        time.perf_counter() - start - wait,
+                        response.status_code,
+                        len(response.content),
+                    )
+                return response
+
+    def __new_pipeline(self, size: int) -> _Pipeline:
+        headers = {
+            name: value
+            for name, value in self.session.headers.items()
+            if name.lower() != "accept-encoding"  # bodies are not decompressed
+        }
+        return _Pipeline(self.url, size, headers, *self._timeout)
+
+    def __pipelined_request(self, pipeline: _Pipeline, url: str) -> bytes:
+        authorization = ""
+        if self._request_auth is not None:  # custom auth signs every request itself
+            request = self._request_template.copy()
+            request.url = url
+            request.prepare_auth(self._request_auth)
+            authorization = request.headers.get("Authorization", "")
+        return pipeline.request_bytes(url[len(self.url) :], authorization)
+
+    def __send_pipelined(
+        self, url: str, timeout: typing.Optional[float]
+    ) -> _RawResponse:
+        data = self.__pipelined_request(self._pipeline, url)
+        return self._pipeline.request(data, timeout)
+
+    def _command(
+        self, name: str, value: str = ""
+    ) -> typing.Union[bool, StatusSnapshot, None]:
+        if self.ordered:
+            return self.__queue_command(name, value).result()
+        return self.__send_command(self.__request(name, value))
+
+    def __queue_command(self, name: str, value: str) -> concurrent.futures.Future:
+        request = self.__request(name, value)
+        key = _COMMANDS[name].coalesce_key if self.coalesce and request[1] else None
+        return self.__enqueue(key, self.__send_command, request)
+
+    def _command_status(
+        self, name: str, value: str = ""
+    ) -> typing.Optional[StatusSnapshot]:
+        request = self.__request(name, value)
+        if self.ordered:
+            return self.__enqueue(None, self.__send_status, request).result()
+        return self.__send_status(request)
+
+    def __request(self, name: str, value: str) -> tuple:
+        # the URL of a command, whether it may be resent and its name for the metrics
+        idempotent = _COMMANDS[name].idempotent and not value.startswith(
+            _RELATIVE_PREFIXES
+        )
+        return self._command_urls[name] + value, idempotent, name
+
+    def __enqueue(
+        self, key: typing.Optional[str], send: typing.Callable, request: tuple
+    ) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        with self._pending_lock:
+            # replacing a pending command takes no room in a bounded queue,
+            # unless callers are already blocked and it would overtake them
+            if self._queue_slots is not None and (
+                key not in self._pending or self._pending.waiting
+            ):
+                if not self._queue_slots.acquire(blocking=False):
+                    self._pending.waiting += 1
+                    self._pending_lock.release()
+                    try:
+                        self._queue_slots.acquire()
+                    finally:
+                        self._pending_lock.acquire()
+                        self._pending.waiting -= 1
+                if key in self._pending:  # another caller queued it meanwhile
+                    self._queue_slots.release()
+            self._pending.push(key, send, request, future)
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self.__write, name="rest_vlc writer " + self.url, daemon=True
+                )
+                self._writer.start()
+        return future
+
+    def __write(self) -> None:
+        while True:
+            with self._pending_lock:
+                if not self._pending:
+                    self._writer = None
+                    return
+                send, request, waiters = self._pending.pop()
+            if self._queue_slots is not None:
+                self._queue_slots.release()
+            waiters = [w for w in waiters if w.set_running_or_notify_cancel()]
+            if not waiters:
+                continue
+            try:
+                result = send(request)
+            except Exception as error:
+                with self._pending_lock:
+                    self._pending.failed += 1
+                for waiter in waiters:
+                    waiter.set_exception(error)
+            else:
+                with self._pending_lock:
+                    self._pending.sent += 1
+                for waiter in waiters:
+                    waiter.set_result(result)
+
+    def submit(self, command: str, *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Run `command` (the name of a method, e.g. "seek") on the executor of this instance and return its future.
+        With `ordered` a plain command is queued right away instead, so the commands reach VLC
+        in the order they were submitted
+        :param command: name of the method to call
+        :param args: positional arguments of the method
+        :param kwargs: keyword arguments of the method
+        :return: concurrent.futures.Future
+        """
+        if self.ordered and command in _COMMAND_BUILDERS:
+            return self.__queue_command(*_COMMAND_BUILDERS[command](*args, **kwargs))
+        return self.__get_executor().submit(getattr(self, command), *args, **kwargs)
+
+    def map(
+        self, command: str, *iterables, timeout: typing.Optional[float] = None
+    ) -> typing.Iterator:
+        """
+        Run `command` once for every item of `iterables` in parallel, like `Executor.map`.
+        Everything is submitted at once and the results come back in order,
+        an exception of a command is raised when its result is reached
+        :param command: name of the method to call
+        :param iterables: arguments of the calls, one iterable per parameter
+        :param timeout: seconds from now until every result must be there
+        :return: iterator of the results
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        futures = [self.submit(command, *args) for args in zip(*iterables)]
+
+        def results() -> typing.Iterator:
+            try:
+                for future in futures:
+                    yield future.result(
+                        None if end is None else max(0, end - time.monotonic())
+                    )
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        return results()
+
+    def __get_executor(self) -> concurrent.futures.Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self._pool_size, thread_name_prefix="rest_vlc " + self.url
+                )
+            return self._executor
+
+    def queue_stats(self) -> dict:
+        """
+        Counters of the command queue used with `ordered`, `coalesce` or `queue_size`:
+        depth (commands waiting to be sent), max_depth, waiting (callers blocked by a full queue),
+        enqueued, coalesced (replaced before being sent), sent and failed
+        :return: dict
+        """
+        with self._pending_lock:
+            return self._pending.stats()
+
+    def __send_command(
+        self, request: tuple
+    ) -> typing.Union[bool, StatusSnapshot, None]:
+        # commands answer with the status after the command, parse it only when someone uses it
+        if self.command_status or self._status_cache.ttl > 0:
+            snapshot = self.__send_status(request)
+            return snapshot if self.command_status else snapshot is not None
+        d = self._fetch(request[0], idempotent=request[1], endpoint=request[2])
+        self._status_cache.invalidate()
+        return d.status_code == 200
+
+    def __send_status(self, request: tuple) -> typing.Optional[StatusSnapshot]:
+        generation = self._status_cache.invalidate()
+        d = self._fetch(request[0], idempotent=request[1], endpoint=request[2])
+        if d.status_code != 200:
+            self._status_cache.invalidate()
+            return None
+        snapshot = self._parse_snapshot(d.content, request[2])
+        self._status_cache.put_answer(snapshot, generation)
+        return snapshot
+
+    def _parse_snapshot(self, body: bytes, endpoint: str = "status") -> StatusSnapshot:
+        if self.format == "json":
+            parse = StatusSnapshot.from_json
+        else:
+            parse = StatusSnapshot.from_xml
+        return _timed_parse(self, endpoint, parse, body)
+
+    def close(self) -> None:
+        """
+        Close the HTTP session and every pooled connection to VLC
+        :return: None
+        """
+        self._watcher.callbacks.clear()
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+        with self._pending_lock:
+            while self._pending:
+                for waiter in self._pending.pop()[2]:
+                    waiter.cancel()
+                if self._queue_slots is not None:
+                    self._queue_slots.release()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._pipeline is not None:
+            self._pipeline.close()
+        self.session.close()
+
+    @property
+    def status(self) -> dict:
+        """
+        Show the status & configurations inform of a dictionaries
+        :return: dict
+        """
+        d = self._fetch(self._status_url)
+        if self.format == "json":
+            return _timed_parse(self, "status", _json_loads, d.content)
+        return _timed_parse(self, "status", xmltodict.parse, d.text)
+
+    @property
+    def playlist(self) -> dict:
+        """
+        Show the playlist and configurations inform of a dictionaries
+        :return: dict
+        """
+        d = self._fetch(self._playlist_url, endpoint="playlist")
+        if self.format == "json":
+            return _timed_parse(self, "playlist", _json_loads, d.content)
+        return _timed_parse(self, "playlist", xmltodict.parse, d.text)
+
+    def playlist_items(self) -> typing.List[PlaylistItem]:
+        """
+        Give the media of the playlist in order, the same for both formats
+        :return: list of PlaylistItem
+        """
+        d = self._fetch(self._playlist_url, endpoint="playlist")
+        if self.format == "json":
+            return _timed_parse(self, "playlist", _playlist_items_from_json, d.content)
+        return _timed_parse(self, "playlist", _PlaylistItemParser().parse, d.content)
+
+    def iter_playlist(self) -> typing.Iterator[PlaylistItem]:
+        """
+        Give the media of the playlist in order while `playlist.xml` is still downloading,
+        the body is parsed a chunk at a time so memory stays the size of one chunk however long the playlist is.
+        Reads `playlist.xml` whatever the format and never goes over the pipelining transport
+        :return: iterator of PlaylistItem
+        """
+        url = self._playlist_xml_url
+        streamed = self._fetch(url, endpoint="playlist", stream=True)
+        response = streamed.response
+        parser = _PlaylistItemParser()
+        transfer = parse = 0.0
+        size = 0
+        try:
+            if response.status_code != 200:
+                raise HTTPStatusError(response.status_code, url)
+            chunks = response.iter_content(_STREAM_CHUNK_SIZE)
+            while True:
+                start = time.perf_counter()
+                chunk = next(chunks, b"")
+                read = time.perf_counter()
+                size += len(chunk)
+                items = parser.feed(chunk, not chunk)
+                transfer += read - start
+                parse += time.perf_counter() - read
+                yield from items
+                if not chunk:
+                    break
+        finally:
+            response.close()
+            _record_stream(
+                self, url, streamed, response.status_code, transfer, parse, size
+            )
+
+    def refresh_playlist(self) -> PlaylistDiff:
+        """
+        Fetch the playlist and update the indexed `Playlist` of this instance in place
+        :return: PlaylistDiff
+        """
+        items = self.playlist_items()
+        with self._lock:
+            return self._playlist.update(items)
+
+    def get_playlist(self, refresh: bool = True) -> Playlist:
+        """
+        Give the indexed `Playlist` of this instance, lookups on it do not send requests
+        :param refresh: fetch the playlist first
+        :return: Playlist
+        """
+        if refresh:
+            self.refresh_playlist()
+        return self._playlist
+
+    def snapshot(self, refresh: bool = False) -> StatusSnapshot:
+        """
+        Fetch `status.xml` once and return every status field from that single response.
+        A cached snapshot younger than `status_ttl` is returned without a request
+        :param refresh: ignore the cached snapshot
+        :return: StatusSnapshot
+        """
+        if not refresh and self._status_cache.ttl > 0:
+            cached = self._status_cache.get()
+            if self.metrics is not None:
+                self.metrics.record_cache(self.url, cached is not None)
+            if cached is not None:
+                return cached
+        generation = self._status_cache.generation
+        d = self._fetch(self._status_url)
+        if d.status_code != 200:
+            raise HTTPStatusError(d.status_code, self._status_url)
+        snapshot = self._parse_snapshot(d.content)
+        self._status_cache.put(snapshot, generation)
+        return snapshot
+
+    def invalidate_status(self) -> None:
+        """
+        Drop the cached status so the next read fetches it again
+        :return: None
+        """
+        self._status_cache.invalidate()
+
+    def subscribe(
+        self, callback: typing.Callable[[StatusEvent], None], interval: float = 1.0
+    ) -> None:
+        """
+        Call `callback` with every `StatusEvent` of this VLC.
+        All subscribers share one polling thread, callbacks run on it and should return quickly.
+        The poller adapts its interval: a quarter of it near the end of an item and while seeking,
+        four times it while paused or stopped
+        :param callback: function taking a StatusEvent
+        :param interval: seconds between polls while playing, the smallest of all subscribers is used
+        :return: None
+        """
+        self._watcher.add(callback, interval)
+        with self._lock:
+            if self._watch_stop is None or self._watch_stop.is_set():
+                self._watch_stop = threading.Event()
+                threading.Thread(
+                    target=self.__poll,
+                    args=(self._watch_stop,),
+                    name="rest_vlc watch " + self.url,
+                    daemon=True,
+                ).start()
+
+    def unsubscribe(self, callback: typing.Callable[[StatusEvent], None]) -> None:
+        """
+        Stop calling `callback`, the poller stops with the last subscriber
+        :param callback: function given to subscribe
+        :return: None
+        """
+        self._watcher.remove(callback)
+        with self._lock:
+            if not self._watcher.callbacks and self._watch_stop is not None:
+                self._watch_stop.set()
+
+    def watch(self, interval: float = 1.0) -> typing.Iterator[StatusEvent]:
+        """
+        Iterate over the `StatusEvent` of this VLC as they happen, see `subscribe`
+        :param interval: seconds between polls while playing
+        :return: iterator of StatusEvent
+        """
+        events = queue.Queue()
+        self.subscribe(events.put, interval)
+        try:
+            while True:
+                yield events.get()
+        finally:
+            self.unsubscribe(events.put)
+
+    def __poll(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                delay = self._watcher.update(self.snapshot(refresh=True))
+            except Exception:
+                # unreachable, an error status or a body that does not parse: back off
+                delay = self._watcher.interval * 4
+            stop.wait(delay)
+
+    @property
+    def connectable(self) -> bool:
+        """
+        Check if VLC REST API is running
+        :return: bool
+        """
+        try:
+            return self._get("/requests/status.xml").status_code == 200
+        except (requests.exceptions.RequestException, CircuitOpenError):
+            return False
+
+    def connect(self, timeout: typing.Optional[float] = 5.0) -> "VLC":
+        """
+        Check that VLC is reachable, for instances created with `lazy`
+        :param timeout: seconds to wait for VLC, None uses the instance's timeouts
+        :return: VLC
+        """
+        try:
+            connectable = (
+                self._get("/requests/status.xml", timeout=timeout).status_code == 200
+            )
+        except (requests.exceptions.RequestException, CircuitOpenError):
+            connectable = False
+        if not connectable:
+            raise Exception("VLC is not running or REST API is not enabled")
+        return self
+
+    def append_many(
+        self,
+        uris: typing.Iterable[str],
+        as_playlist: bool = False,
+        playlist_format: str = "m3u",
+        directory: typing.Optional[str] = None,
+        concurrency: int = 8,
+    ) -> typing.List[CommandResult]:
+        """
+        Append many media to the queue, a failing media does not stop the rest.
+        The requests are pipelined over one connection of their own with up to `concurrency` of them
+        unanswered, VLC handles the requests of a connection one after another so the media are queued
+        in the order of `uris`. When the connection breaks the requests still in flight fail,
+        some of them may have been queued already. With `concurrency` 1, an https:// url,
+        keep_alive off or an open circuit breaker they are sent one at a time over the session instead.
+        With `as_playlist` the media are written to a M3U/XSPF file which is enqueued with a single request,
+        VLC has to be able to read that file (same machine or shared `directory`) and the file is left in place
+        :param uris: media uris in the order they should be queued
+        :param as_playlist: enqueue one playlist file instead of one request per media
+        :param playlist_format: "m3u" or "xspf"
+        :param directory: where the playlist file is written, defaults to the temporary directory
+        :param concurrency: requests sent before the answer to the first of them is read
+        :return: list of CommandResult in the order of `uris`
+        """
+        uris = list(uris)
+        if as_playlist:
+            try:
+                value = self.append_queue(
+                    _write_playlist_file(uris, playlist_format, directory)
+                )
+                error = None
+            except Exception as e:
+                value, error = None, e
+            return [CommandResult(uri, value, error) for uri in uris]
+        if (
+            concurrency > 1
+            and self.url.startswith("http://")
+            and self.session.headers.get("Connection") != "close"
+            and self.circuit_breaker.allow()
+        ):
+            pipeline = self._pipeline or self.__new_pipeline(1)
+            urls = [
+                self._command_urls["append_queue"] + urllib.parse.quote(uri)
+                for uri in uris
+            ]
+            messages = (self.__pipelined_request(pipeline, url) for url in urls)
+            outcomes = pipeline.send_in_order(messages, concurrency)
+            return _append_results(self, uris, urls, outcomes)
+        results = []
+        for uri in uris:
+            try:
+                results.append(CommandResult(uri, self.append_queue(uri)))
+            except Exception as e:
+                results.append(CommandResult(uri, error=e))
+        return results
+
+    def fullscreen(self) -> list:
+        """
+        Set the fullscreen state of VLC and return back the boolean of the result if success or not and the current state of the screen
+        :return: bool, bool
+        """
+        snapshot = self._command_status("fullscreen")
+        if snapshot is None:
+            return False, self.is_fullscreen
+        self.full_screen = snapshot.is_fullscreen
+        return True, snapshot.is_fullscreen
+
+    """ def set_subtitle_file(self, uri: str) -> bool:
+        \"""
+        Set the subtitle file to show in the VLC and returns bool based on successful or not
+        :return: bool
+        \"""
+        \""" uri = self.__encode_uri(uri) \"""
+        return (
+            self._command("command=pl_enqueue&input=" + uri)
+        ) """
+
+    def browse(self, uri: str) -> dict:
+        """
+        Give the list of the files and return the dictionaries of XML
+        :return: dict
+        """
+        uri = self.__encode_uri(uri)
+        d = self._get("/requests/browse.xml?uri=" + uri, endpoint="browse")
+        return _timed_parse(self, "browse", xmltodict.parse, d.text)
+
+    def delete(self, uri: typing.Union[str, int, PlaylistItem]) -> bool:
+        """
+        Delete media off the playlist by finding with the specified URI. Returns bool indicate if request was successful or not
+        A playlist id or `PlaylistItem` deletes that media only, a URI deletes every media with that URI
+        :param uri: media uri, playlist id or PlaylistItem
+        :return: bool
+        """
+        if isinstance(uri, PlaylistItem):
+            uri = uri.id
+        if isinstance(uri, int) or uri.isdigit():
+            return self._command("delete", str(uri))
+        self.refresh_playlist()
+        with self._lock:
+            items = self._playlist.find_uri(uri)
+        results = [self._command("delete", str(item.id)) for item in items]
+        return bool(results) and all(results)
+
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+class dummy:
+    pass
+
+
+class _AsyncResponse:
+    # A read aiohttp response, the body is decoded only when something asks for text.
+
+    __slots__ = ("status", "status_code", "content", "charset")
+
+    def __init__(
+        self, status: int, content: bytes, charset: typing.Optional[str]
+    ) -> None:
+        self.status = status
+        self.status_code = status
+        self.content = content
+        self.charset = charset
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.charset or "utf-8", "replace")
+
+
+class aiohttp_wrap:
+    async def get(self, *args, **kwargs):
+        _load_async()
+        async with aiohttp.ClientSession() as session:
+            async with session.get(*args, **kwargs) as response:
+                d = dummy()
+                d.status = response.status
+                d.status_code = response.status
+                d.text = await response.text()
+        return d
+
+    async def post(self, *args, **kwargs):
+        _load_async()
+        async with aiohttp.ClientSession() as session:
+            async with session.post(*args, **kwargs) as response:
+                d = dummy()
+                d.status = response.status
+                d.status_code = response.status
+                d.text = await response.text()
+        return d
+
+    async def put(self, *args, **kwargs):
+        _load_async()
+        async with aiohttp.ClientSession() as session:
+            async with session.put(*args, **kwargs) as response:
+                d = dummy()
+                d.status = response.status
+                d.status_code = response.status
+                d.text = await response.text()
+        return d
+
+    async def patch(self, *args, **kwargs):
+        _load_async()
+        async with aiohttp.ClientSession() as session:
+            async with session.patch(*args, **kwargs) as response:
+                d = dummy()
+                d.status = response.status
+                d.status_code = response.status
+                d.text = await response.text()
+        return d
+
+    async def delete(self, *args, **kwargs):
+        _load_async()
+        async with aiohttp.ClientSession() as session:
+            async with session.delete(*args, **kwargs) as response:
+                d = dummy()
+                d.status = response.status
+                d.status_code = response.status
+                d.text = await response.text()
+        return d
+
+
+aiohttp_wrap = aiohttp_wrap()
+
+
+class _class_or_instance_method:
+    # Like classmethod, but looked up on an instance it binds to that instance,
+    # so one name can be a factory on the class and a method on its instances.
+
+    __slots__ = ("__func__", "__doc__")
+
+    def __init__(self, function: typing.Callable) -> None:
+        self.__func__ = function
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance: typing.Any, owner: type = None) -> typing.Callable:
+        return types.MethodType(self.__func__, owner if instance is None else instance)
+
+    def __call__(self, *args, **kwargs) -> typing.Any:
+        return self.__func__(*args, **kwargs)
+
+    @property
+    def __name__(self) -> str:
+        return self.__func__.__name__
+
+
+async def _close_at_shutdown(session: "aiohttp.ClientSession") -> typing.AsyncIterator:
+    # Closes `session` when resumed. Being an async generator the event loop keeps
+    # track of it without a pending task: asyncio.run() and asyncio.Runner close the
+    # generators of their loop before closing it, and one that is garbage collected
+    # first (with the client owning it) is closed on its loop as well.
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+def _finalize_with_loop(session: "aiohttp.ClientSession") -> typing.AsyncGenerator:
+    # the first step registers the generator with the running loop, it stops at the
+    # yield right away so it is taken synchronously
+    finalizer = _close_at_shutdown(session)
+    try:
+        finalizer.asend(None).send(None)
+    except StopIteration:
+        pass
+    return finalizer
+
+
+def _release_session(
+    loop: typing.Optional["asyncio.AbstractEventLoop"],
+    finalizer: typing.Optional[typing.AsyncGenerator],
+) -> None:
+    # close a session left open by an earlier event loop: right away on that loop when
+    # it runs in another thread, the loop closes it when it shuts down otherwise
+    if finalizer is None or loop is None or loop.is_closed():
+        return
+    if loop.is_running() and loop is not asyncio.get_running_loop():
+        asyncio.run_coroutine_threadsafe(finalizer.aclose(), loop)
+
+
+@_generate_api(asynchronous=True)
+class Async_VLC(_AsyncCommands):
+    def __init__(
+        self,
+        url: str = "http://localhost:8080",
+        auth: typing.Union["aiohttp.BasicAuth", tuple, set, list] = ("", ""),
+        session: typing.Optional["aiohttp.ClientSession"] = None,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        keepalive_timeout: float = 15.0,
+        status_ttl: float = 0,
+        command_status: bool = False,
+        format: str = "xml",
+        lazy: bool = False,
+        connect_timeout: typing.Optional[float] = 5.0,
+        read_timeout: typing.Optional[float] = 10.0,
+        retries: int = 0,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        failure_threshold: int = 0,
+        reset_timeout: float = 30.0,
+        coalesce: bool = False,
+        ordered: bool = False,
+        queue_size: int = 0,
+        metrics: typing.Union[bool, Metrics] = False,
+    ) -> None:
+        """
+        VLC Class
+        This class will initialize a VLC instance by connect to it using REST API w/ HTTP Basic Auth.
+        This class is blocking.
+        If you want to use asynchornous version please install
+        `aiohttp <https://pypi.org/project/aiohttp/>`_
+        Inside a running event loop use `await Async_VLC.connect(...)` instead, which checks
+        the connection on that loop, constructing there skips the check.
+        Requests go through one long-lived `aiohttp.ClientSession`, pass `session` to share
+        a session (see `create_session`) between many instances. A session owned by the instance
+        is released by `await close()` or by leaving an `async with` block.
+        :param url: VLC url
+        :param auth: VLC auth
+        :param session: shared session to use instead of creating one
+        :param limit: total connections of the owned session's connector
+        :param limit_per_host: connections per VLC host of the owned session's connector
+        :param keepalive_timeout: seconds an idle connection is kept open
+        :param status_ttl: seconds a fetched status is reused by the status properties, 0 disables the cache.
+        Concurrent reads share one in-flight request and commands sent through this instance
+        replace the cached status with the one VLC sends back
+        :param command_status: make commands return the `StatusSnapshot` VLC sends back (None on failure) instead of a bool
+        :param format: "xml" or "json", which of VLC's status and playlist endpoints to use.
+        `status` and `playlist` return the decoded document of that format
+        while `snapshot` and `playlist_items` give the same objects for both
+        :param lazy: do not check the connection while constructing
+        :param connect_timeout: seconds to wait for a connection to VLC, None waits forever
+        :param read_timeout: seconds to wait for VLC to answer, None waits forever
+        :param retries: times a failed read or idempotent command is sent again.
+        Toggles, relative seeks and volume steps, and commands that add to the playlist are never retried
+        :param backoff: seconds before the first retry, doubled for each further one
+        :param max_backoff: upper bound of the wait between retries
+        :param failure_threshold: connection errors or timeouts in a row after which requests fail fast
+        with `CircuitOpenError` for `reset_timeout` seconds, 0 disables the circuit breaker
+        :param reset_timeout: seconds the circuit stays open before VLC is tried again
+        :param coalesce: send commands one at a time and in order through a background writer.
+        An absolute volume or seek command still waiting to be sent is replaced by a newer one,
+        and its caller gets the result of the newer one, so VLC never works through stale values
+        :param ordered: send commands one at a time and in order through a background writer, without coalescing
+        :param queue_size: commands the writer may have waiting, further callers block until there is room.
+        0 does not limit the queue, any other value implies `ordered`
+        :param metrics: record latency histograms and counters of every HTTP call in `self.metrics`,
+        True for a `Metrics` of this instance or a `Metrics` to share with other instances
+        :return: None
+        """
+        _load_async()
+        if format not in ("xml", "json"):
+            raise ValueError("Format must be 'xml' or 'json'")
+        self.url = url
+        self.format = format
+        if isinstance(auth, (tuple, set, list)):
+            if len(auth) != 2:
+                raise ValueError(
+                    "Auth must be tuple or list of length 2 which is username and password"
+                )
+            self.auth = tuple(auth)
+            # encoded once here instead of by aiohttp on every request
+            self._headers = {"Authorization": _basic_auth_header(*auth)}
+        else:
+            self.auth = auth
+            self._headers = {
+                "Authorization": _basic_auth_header(
+                    auth.login, auth.password, auth.encoding
+                )
+            }
+        self.session = session
+        self._owns_session = session is None
+        self._session_loop = None
+        self._session_finalizer = None
+        self._connector_options = {
+            "limit": limit,
+            "limit_per_host": limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+        }
+        self._status_url = self.url + "/requests/status." + format
+        self._playlist_url = self.url + "/requests/playlist." + format
+        self._playlist_xml_url = self.url + "/requests/playlist.xml"
+        self._command_urls = _command_urls(self._status_url)
+        self._status_cache = _StatusCache(status_ttl)
+        self._status_refresh = None
+        self.command_status = command_status
+        self._playlist = Playlist()
+        self._timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = Metrics() if metrics is True else metrics or None
+        self.coalesce = coalesce
+        self.ordered = ordered or coalesce or queue_size > 0
+        self.queue_size = queue_size
+        self._pending = _PendingCommands()
+        self._queue_slots = None
+        self._writer = None
+        self._watcher = _StatusWatcher()
+        self._watch_task = None
+        self.full_screen = None
+        self.volume_percentage = False
+        if lazy:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # no loop yet, probing on a temporary one is safe
+            if not asyncio.run(self.__probe()):
+                raise Exception("VLC is not running or REST API is not enabled")
+
+    @_class_or_instance_method
+    async def connect(
+        cls_or_self: typing.Union[type, "Async_VLC"],
+        url: typing.Optional[str] = None,
+        auth: typing.Union["aiohttp.BasicAuth", tuple, set, list, None] = None,
+        timeout: typing.Optional[float] = 5.0,
+        check: bool = True,
+        **kwargs
+    ) -> "Async_VLC":
+        """
+        Create an instance from inside a running event loop without blocking it.
+        The connection check runs on the caller's loop so many instances can be connected at once
+        with `asyncio.gather`, pass `check=False` to skip it entirely.
+        Called on an instance, e.g. one created with `lazy`, it checks that instance instead
+        and only takes `timeout`, like `VLC.connect`
+        :param url: VLC url, http://localhost:8080 by default
+        :param auth: VLC auth, no password by default
+        :param timeout: seconds the connection check may take, None waits forever
+        :param check: check that VLC is reachable before returning
+        :param kwargs: other `Async_VLC` arguments
+        :return: Async_VLC
+        """
+        if isinstance(cls_or_self, Async_VLC):
+            if url is not None or auth is not None or not check or kwargs:
+                raise TypeError(
+                    "connect() on an instance only takes timeout, "
+                    "call Async_VLC.connect(...) to create a new instance"
+                )
+            vlc = cls_or_self
+        else:
+            vlc = cls_or_self(
+                "http://localhost:8080" if url is None else url,
+                ("", "") if auth is None else auth,
+                lazy=True,
+                **kwargs
+            )
+            if not check:
+                return vlc
+        try:
+            connectable = await asyncio.wait_for(vlc.connectable, timeout)
+        except asyncio.TimeoutError:
+            connectable = False
+        if not connectable:
+            if vlc is not cls_or_self:
+                await vlc.close()
+            raise Exception("VLC is not running or REST API is not enabled")
+        return vlc
+
+    def __encode_uri(self, url: str) -> bool:
+        return urllib.parse.quote(url)
+
+    def __set_name__(self, owner, name):
+        self.name = "_" + name
+
+    if not typing.TYPE_CHECKING:  # unknown names stay errors for type checkers
+
+        def __getattr__(self, name):
             if name not in self.__dict__:
                 warnings.warn(
                     "Attribute '{}' is not defined in VLC class or not yet implemented".format(
@@ -600,381 +3358,759 @@ else:
                 return (None,)
             return self.__dict__[name]
 
-        @property
-        async def status(self) -> dict:
-            """
-            Show the status & configurations inform of a dictionaries
-            :return: dict
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            return xmltodict.parse(d.text)
+    async def __aenter__(self) -> "Async_VLC":
+        return self
 
-        @property
-        async def playlist(self) -> dict:
-            """
-            Show the playlist and configurations inform of a dictionaries
-            :return: dict
-            """
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def __probe(self) -> bool:
+        # runs on a throwaway loop, so it must not touch the long-lived session
+        try:
             d = await aiohttp_wrap.get(
-                self.url + "/requests/playlist.xml", auth=self.auth
+                self.url + "/requests/status.xml",
+                headers=self._headers,
+                timeout=self._timeout,
             )
-            return xmltodict.parse(d.text)
+            return d.status_code == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
 
-        @property
-        async def connectable(self) -> bool:
-            """
-            Check if VLC REST API is running
-            :return: bool
-            """
-            try:
-                d = await aiohttp_wrap.get(
-                    self.url + "/requests/status.xml", auth=self.auth
+    def _get_session(self) -> "aiohttp.ClientSession":
+        loop = asyncio.get_running_loop()
+        if self._owns_session and (
+            self.session is None
+            or self.session.closed
+            or self._session_loop is not loop
+        ):
+            _release_session(self._session_loop, self._session_finalizer)
+            self.session = self.create_session(**self._connector_options)
+            self._session_loop = loop
+            self._session_finalizer = _finalize_with_loop(self.session)
+        return self.session
+
+    async def _get(
+        self, path: str, idempotent: bool = True, endpoint: str = "status"
+    ) -> _AsyncResponse:
+        return await self._fetch(self.url + path, idempotent, endpoint)
+
+    async def _fetch(
+        self,
+        url: str,
+        idempotent: bool = True,
+        endpoint: str = "status",
+        stream: bool = False,
+    ) -> typing.Union[_AsyncResponse, _StreamedResponse]:
+        attempts = self.retries + 1 if idempotent else 1
+        metrics = self.metrics
+        for attempt in range(attempts):
+            if not self.circuit_breaker.allow():
+                if metrics is not None:
+                    metrics.record_error(self.url, endpoint, "CircuitOpenError")
+                raise CircuitOpenError(
+                    "{} failed {} times in a row".format(
+                        self.url, self.circuit_breaker.failures
+                    )
                 )
-                return d.status_code == 200
-            except aiohttp.client_exceptions.ClientConnectorError:
-                return False
+            start = time.perf_counter()
+            wait = None
+            try:
+                if stream:
+                    response = await self._get_session().get(
+                        url, headers=self._headers, timeout=self._timeout
+                    )
+                    wait = time.perf_counter() - start
+                    d = _StreamedResponse(response, attempt, wait)
+                else:
+                    async with self._get_session().get(
+                        url, headers=self._headers, timeout=self._timeout
+                    ) as response:
+                        wait = time.perf_counter() - start
+                        d = _AsyncResponse(
+                            response.status, await response.read(), response.charset
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                self.circuit_breaker.record_failure()
+                if metrics is not None:
+                    elapsed = time.perf_counter() - start
+                    metrics.record_call(
+                        self.url,
+                        endpoint,
+                        url,
+                        attempt,
+                        elapsed if wait is None else wait,
+                        0.0 if wait is None else elapsed - wait,
+                        error=error,
+                    )
+                if attempt + 1 == attempts:
+                    raise
+                await asyncio.sleep(_backoff(attempt, self.backoff, self.max_backoff))
+            else:
+                self.circuit_breaker.record_success()
+                if stream:
+                    return d
+                if metrics is not None:
+                    metrics.record_call(
+                        self.url,
+                        endpoint,
+                        url,
+                        attempt,
+                        wait,
+                        time.perf_counter() - start - wait,
+                        d.status_code,
+                        len(d.content),
+                    )
+                return d
 
-        async def stop(self) -> bool:
-            """
-            Stop the current playing media and return back the boolean of the result
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_stop", auth=self.auth
-            )
-            return d.status_code == 200
+    async def _command(
+        self, name: str, value: str = ""
+    ) -> typing.Union[bool, StatusSnapshot, None]:
+        request = self.__request(name, value)
+        if self.ordered:
+            key = _COMMANDS[name].coalesce_key if self.coalesce and request[1] else None
+            return await self.__enqueue(key, self.__send_command, request)
+        return await self.__send_command(request)
 
-        async def clear_playlist(self) -> bool:
-            """
-            Clear the playlist and return back the boolean of the result
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_empty", auth=self.auth
-            )
-            return d.status_code == 200
+    async def _command_status(
+        self, name: str, value: str = ""
+    ) -> typing.Optional[StatusSnapshot]:
+        request = self.__request(name, value)
+        if self.ordered:
+            return await self.__enqueue(None, self.__send_status, request)
+        return await self.__send_status(request)
 
-        async def play(self, uri: str) -> bool:
-            """
-            Play a media by uri and return back the boolean of the result if success or not
-            :param uri: media uri
-            :return: bool
-            """
-            uri = self.__encode_uri(uri)
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=in_play&input=" + uri,
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    def __request(self, name: str, value: str) -> tuple:
+        # the URL of a command, whether it may be resent and its name for the metrics
+        idempotent = _COMMANDS[name].idempotent and not value.startswith(
+            _RELATIVE_PREFIXES
+        )
+        return self._command_urls[name] + value, idempotent, name
 
-        async def append_queue(self, uri: str) -> bool:
-            """
-            Append a media to the queue and return back the boolean of the result if success or not
-            :param uri: media uri
-            :return: bool
-            """
-            uri = self.__encode_uri(uri)
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=in_enqueue&input=" + uri,
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    async def __enqueue(
+        self, key: typing.Optional[str], send: typing.Callable, request: tuple
+    ) -> typing.Any:
+        # replacing a pending command takes no room in a bounded queue, unless
+        # callers are already blocked (they get room in the order they asked for it)
+        # and it would overtake them
+        if self.queue_size and (key not in self._pending or self._pending.waiting):
+            if self._queue_slots is None:
+                self._queue_slots = asyncio.BoundedSemaphore(self.queue_size)
+            self._pending.waiting += 1
+            try:
+                await self._queue_slots.acquire()
+            finally:
+                self._pending.waiting -= 1
+            if key in self._pending:  # another caller queued it meanwhile
+                self._queue_slots.release()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.push(key, send, request, future)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self.__write())
+        return await future
 
-        async def set_volume(self, volume: int, percent: bool = False) -> bool:
-            """
-            Set the volume of VLC and return back the boolean of the result if success or not
-            :param volume: volume value (0-512 = 0-200%)
-            :param percent: option for volume is actually percentage or not
-            :return: bool
-            """
-            if percent:
-                volume = int(volume * 2.56)
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=volume&val=" + str(volume),
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    async def __write(self) -> None:
+        while self._pending:
+            send, request, waiters = self._pending.pop()
+            if self._queue_slots is not None:
+                self._queue_slots.release()
+            # callers that gave up do not need the request any more
+            waiters = [waiter for waiter in waiters if not waiter.done()]
+            if not waiters:
+                continue
+            try:
+                result = await send(request)
+            except asyncio.CancelledError:
+                for waiter in waiters:
+                    waiter.cancel()
+                raise
+            except Exception as error:
+                self._pending.failed += 1
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(error)
+            else:
+                self._pending.sent += 1
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(result)
 
-        async def set_random(self, random: bool) -> bool:
-            """
-            Set the shuffle state of VLC and return back the boolean of the result if success or not
-            :param random: random state
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url
-                + "/requests/status.xml?command=pl_random&state="
-                + str(random).lower(),
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    def submit(self, command: str, *args, **kwargs) -> "asyncio.Task":
+        """
+        Start `command` (the name of a method, e.g. "seek") in the background and return its task.
+        With `ordered` the commands reach VLC in the order they were submitted,
+        await the returned tasks for their results
+        :param command: name of the method to call
+        :param args: positional arguments of the method
+        :param kwargs: keyword arguments of the method
+        :return: asyncio.Task
+        """
+        # tasks start in the order they were created and queue their command on the first step
+        return asyncio.ensure_future(getattr(self, command)(*args, **kwargs))
 
-        @property
-        async def is_random(self) -> bool:
-            """
-            A property to get the random state of VLC
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            return True if content["root"]["random"] in ("true", "1") else False
-
-        async def set_repeat_media(self, repeat: bool) -> bool:
-            """
-            Set the repeat state of VLC and return back the boolean of the result if success or not
-            :param repeat: repeat state
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url
-                + "/requests/status.xml?command=pl_repeat&state="
-                + str(repeat).lower(),
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    def queue_stats(self) -> dict:
+        """
+        Counters of the command queue used with `ordered`, `coalesce` or `queue_size`:
+        depth (commands waiting to be sent), max_depth, waiting (callers blocked by a full queue),
+        enqueued, coalesced (replaced before being sent), sent and failed
+        :return: dict
+        """
+        return self._pending.stats()
 
-        @property
-        async def is_repeat_media(self) -> bool:
-            """
-            A property to get the repeat state of VLC
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            return True if content["root"]["repeat"] in ("true", "1") else False
-
-        async def set_loop_queue(self, loop: bool) -> bool:
-            """
-            Set the loop state of VLC and return back the boolean of the result if success or not
-            :param loop: loop state
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url
-                + "/requests/status.xml?command=pl_loop&state="
-                + str(loop).lower(),
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    async def __send_command(
+        self, request: tuple
+    ) -> typing.Union[bool, StatusSnapshot, None]:
+        # commands answer with the status after the command, parse it only when someone uses it
+        if self.command_status or self._status_cache.ttl > 0:
+            snapshot = await self.__send_status(request)
+            return snapshot if self.command_status else snapshot is not None
+        d = await self._fetch(request[0], request[1], request[2])
+        self.invalidate_status()
+        return d.status_code == 200
 
-        @property
-        async def is_loop_queue(self) -> bool:
-            """
-            A property to get the loop state of VLC
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            return True if content["root"]["loop"] in ("true", "1") else False
-
-        async def fullscreen(self) -> bool:
-            """
-            Set the fullscreen state of VLC and return back the boolean of the result if success or not and the current state of the screen
-            :return: (bool, bool)
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=fullscreen", auth=self.auth
-            )
-            return (
-                d.status_code == 200,
-                await self.is_fullscreen,
-            )
+    async def __send_status(self, request: tuple) -> typing.Optional[StatusSnapshot]:
+        generation = self._status_cache.invalidate()
+        self._status_refresh = None
+        d = await self._fetch(request[0], request[1], request[2])
+        if d.status_code != 200:
+            self.invalidate_status()
+            return None
+        snapshot = self._parse_snapshot(d.content, request[2])
+        self._status_cache.put_answer(snapshot, generation)
+        return snapshot
 
-        @property
-        async def is_fullscreen(self) -> bool:
+    def _parse_snapshot(self, body: bytes, endpoint: str = "status") -> StatusSnapshot:
+        if self.format == "json":
+            parse = StatusSnapshot.from_json
+        else:
+            parse = StatusSnapshot.from_xml
+        return _timed_parse(self, endpoint, parse, body)
 
-            """
-            Return the current state of VLC if VLC is in fullscreen returns true otherwise false
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            self.full_screen = (
-                True if content["root"]["fullscreen"] in ("true", "1") else False
-            )
-            return True if content["root"]["fullscreen"] in ("true", "1") else False
-
-        """ async def set_subtitle_file(self, uri: str) -> bool:
-            \"""
-            Set the subtitle file to show in the VLC and returns bool based on successful or not
-            :return: bool
-            \"""
-            \""" uri = self.__encode_uri(uri) \"""
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_enqueue&input=" + uri,
-                auth=self.auth,
-            )
-            return d.status_code == 200 """
-
-        async def browse(self, uri: str) -> dict:
-            """
-            Give the list of the files and return the dictionaries of XML
-            :return: dict
-            """
-            uri = self.__encode_uri(uri)
-            d = await aiohttp_wrap.get(self.url + "/requests/browse.xml?uri=" + uri)
-            return xmltodict.parse(d.text)
-
-        async def previous(self) -> bool:
-            """
-            Revert to previous media and return if request was successful or not
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_previous",
-                auth=self.auth,
+    @staticmethod
+    def create_session(
+        limit: int = 100, limit_per_host: int = 10, keepalive_timeout: float = 15.0
+    ) -> "aiohttp.ClientSession":
+        """
+        Create a session with a tuned connection pool that can be shared by many `Async_VLC` instances.
+        Must be called while an event loop is running, the caller owns and closes the session
+        :param limit: total connections
+        :param limit_per_host: connections per VLC host
+        :param keepalive_timeout: seconds an idle connection is kept open
+        :return: aiohttp.ClientSession
+        """
+        _load_async()
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=limit_per_host,
+                keepalive_timeout=keepalive_timeout,
             )
-            return d.status_code == 200
+        )
 
-        async def delete(self, uri: str) -> bool:
-            """
-            Delete media off the playlist by finding with the specified URI. Returns bool indicate if request was successful or not
-            """
-            uri = self.__encode_uri(uri)
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_delete&id=" + uri,
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    async def close(self) -> None:
+        """
+        Close the session owned by this instance, a shared session is left open.
+        Without it the owned session is closed when its event loop shuts down, as at the end of
+        `asyncio.run()`, or when the instance is garbage collected
+        :return: None
+        """
+        self._watcher.callbacks.clear()
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        while self._pending:
+            for waiter in self._pending.pop()[2]:
+                waiter.cancel()
+            if self._queue_slots is not None:
+                self._queue_slots.release()
+        if self._owns_session and self.session is not None:
+            finalizer, self._session_finalizer = self._session_finalizer, None
+            if self._session_loop is asyncio.get_running_loop():
+                await finalizer.aclose()
+            else:
+                _release_session(self._session_loop, finalizer)
+            self.session = None
 
-        async def next(self) -> bool:
-            """
-            Skip to next media and return if request was successful or not
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_next", auth=self.auth
-            )
-            return d.status_code == 200
+    @property
+    async def status(self) -> dict:
+        """
+        Show the status & configurations inform of a dictionaries
+        :return: dict
+        """
+        d = await self._fetch(self._status_url)
+        if self.format == "json":
+            return _timed_parse(self, "status", _json_loads, d.content)
+        return _timed_parse(self, "status", xmltodict.parse, d.text)
 
-        async def clear_history(self) -> bool:
-            """
-            Clear the histories. Returns boolean indicate request is successful or not
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_history&val=clear",
-                auth=self.auth,
-            )
-            return d.status_code == 200
+    @property
+    async def playlist(self) -> dict:
+        """
+        Show the playlist and configurations inform of a dictionaries
+        :return: dict
+        """
+        d = await self._fetch(self._playlist_url, endpoint="playlist")
+        if self.format == "json":
+            return _timed_parse(self, "playlist", _json_loads, d.content)
+        return _timed_parse(self, "playlist", xmltodict.parse, d.text)
 
-        async def pause(self) -> bool:
-            """
-            Pause the media playback. Returns bool indicate request was successful or not
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=pl_pause", auth=self.auth
-            )
+    async def playlist_items(self) -> typing.List[PlaylistItem]:
+        """
+        Give the media of the playlist in order, the same for both formats
+        :return: list of PlaylistItem
+        """
+        d = await self._fetch(self._playlist_url, endpoint="playlist")
+        if self.format == "json":
+            return _timed_parse(self, "playlist", _playlist_items_from_json, d.content)
+        return _timed_parse(self, "playlist", _PlaylistItemParser().parse, d.content)
+
+    async def iter_playlist(self) -> typing.AsyncIterator[PlaylistItem]:
+        """
+        Give the media of the playlist in order while `playlist.xml` is still downloading,
+        the body is parsed a chunk at a time so memory stays the size of one chunk however long
+        the playlist is and the event loop runs between chunks.
+        Reads `playlist.xml` whatever the format.
+        Close it with `aclose()` when stopping early, that gives the connection back
+        :return: async iterator of PlaylistItem
+        """
+        url = self._playlist_xml_url
+        streamed = await self._fetch(url, endpoint="playlist", stream=True)
+        response = streamed.response
+        parser = _PlaylistItemParser()
+        transfer = parse = 0.0
+        size = 0
+        try:
+            if response.status != 200:
+                raise HTTPStatusError(response.status, url)
+            while True:
+                start = time.perf_counter()
+                chunk = await response.content.read(_STREAM_CHUNK_SIZE)
+                read = time.perf_counter()
+                size += len(chunk)
+                items = parser.feed(chunk, not chunk)
+                transfer += read - start
+                parse += time.perf_counter() - read
+                for item in items:
+                    yield item
+                if not chunk:
+                    break
+        finally:
+            response.release()
+            _record_stream(self, url, streamed, response.status, transfer, parse, size)
+
+    async def refresh_playlist(self) -> PlaylistDiff:
+        """
+        Fetch the playlist and update the indexed `Playlist` of this instance in place
+        :return: PlaylistDiff
+        """
+        return self._playlist.update(await self.playlist_items())
+
+    async def get_playlist(self, refresh: bool = True) -> Playlist:
+        """
+        Give the indexed `Playlist` of this instance, lookups on it do not send requests
+        :param refresh: fetch the playlist first
+        :return: Playlist
+        """
+        if refresh:
+            await self.refresh_playlist()
+        return self._playlist
+
+    async def snapshot(self, refresh: bool = False) -> StatusSnapshot:
+        """
+        Fetch `status.xml` once and return every status field from that single response.
+        A cached snapshot younger than `status_ttl` is returned without a request
+        and concurrent callers wait on the same request instead of sending their own
+        :param refresh: ignore the cached snapshot
+        :return: StatusSnapshot
+        """
+        if refresh or self._status_cache.ttl <= 0:
+            return await self.__fetch_snapshot()
+        cached = self._status_cache.get()
+        if self.metrics is not None:
+            self.metrics.record_cache(self.url, cached is not None)
+        if cached is not None:
+            return cached
+        if (
+            self._status_refresh is None
+            or self._status_refresh.done()
+            or self._status_refresh.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._status_refresh = asyncio.ensure_future(self.__fetch_snapshot())
+        return await asyncio.shield(self._status_refresh)
+
+    async def __fetch_snapshot(self) -> StatusSnapshot:
+        generation = self._status_cache.generation
+        d = await self._fetch(self._status_url)
+        if d.status_code != 200:
+            raise HTTPStatusError(d.status_code, self._status_url)
+        snapshot = self._parse_snapshot(d.content)
+        self._status_cache.put(snapshot, generation)
+        return snapshot
+
+    def invalidate_status(self) -> None:
+        """
+        Drop the cached status so the next read fetches it again
+        :return: None
+        """
+        self._status_cache.invalidate()
+        self._status_refresh = None
+
+    def subscribe(
+        self, callback: typing.Callable[[StatusEvent], None], interval: float = 1.0
+    ) -> None:
+        """
+        Call `callback` with every `StatusEvent` of this VLC, must be called inside the event loop.
+        All subscribers share one polling task, callbacks run on the loop and must not block.
+        The poller adapts its interval: a quarter of it near the end of an item and while seeking,
+        four times it while paused or stopped
+        :param callback: function taking a StatusEvent
+        :param interval: seconds between polls while playing, the smallest of all subscribers is used
+        :return: None
+        """
+        self._watcher.add(callback, interval)
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.ensure_future(self.__poll())
+
+    def unsubscribe(self, callback: typing.Callable[[StatusEvent], None]) -> None:
+        """
+        Stop calling `callback`, the poller stops with the last subscriber
+        :param callback: function given to subscribe
+        :return: None
+        """
+        self._watcher.remove(callback)
+        if not self._watcher.callbacks and self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def watch(self, interval: float = 1.0) -> typing.AsyncIterator[StatusEvent]:
+        """
+        Iterate with `async for` over the `StatusEvent` of this VLC as they happen, see `subscribe`
+        :param interval: seconds between polls while playing
+        :return: async iterator of StatusEvent
+        """
+        events = asyncio.Queue()
+        self.subscribe(events.put_nowait, interval)
+        try:
+            while True:
+                yield await events.get()
+        finally:
+            self.unsubscribe(events.put_nowait)
+
+    async def __poll(self) -> None:
+        while self._watcher.callbacks:
+            try:
+                delay = self._watcher.update(await self.snapshot(refresh=True))
+            except Exception:
+                # unreachable, an error status or a body that does not parse: back off
+                delay = self._watcher.interval * 4
+            await asyncio.sleep(delay)
+
+    @property
+    async def connectable(self) -> bool:
+        """
+        Check if VLC REST API is running
+        :return: bool
+        """
+        try:
+            d = await self._get("/requests/status.xml")
             return d.status_code == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError):
+            return False
 
-        @property
-        async def is_paused(self) -> bool:
-            """
-            Check if the media is actually paused or not. Returns bool indicate media is paused or not
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
+    async def append_many(
+        self,
+        uris: typing.Iterable[str],
+        as_playlist: bool = False,
+        playlist_format: str = "m3u",
+        directory: typing.Optional[str] = None,
+        concurrency: int = 8,
+    ) -> typing.List[CommandResult]:
+        """
+        Append many media to the queue, a failing media does not stop the rest.
+        The requests are pipelined over one connection of their own with up to `concurrency` of them
+        unanswered, VLC handles the requests of a connection one after another so the media are queued
+        in the order of `uris`. When the connection breaks the requests still in flight fail,
+        some of them may have been queued already. aiohttp does not pipeline, so the batch is sent
+        with the pipelining of `VLC` from a thread of the default executor.
+        With `concurrency` 1, an https:// url or an open circuit breaker they are sent one at a time
+        over the session instead.
+        With `as_playlist` the media are written to a M3U/XSPF file which is enqueued with a single request,
+        VLC has to be able to read that file (same machine or shared `directory`) and the file is left in place
+        :param uris: media uris in the order they should be queued
+        :param as_playlist: enqueue one playlist file instead of one request per media
+        :param playlist_format: "m3u" or "xspf"
+        :param directory: where the playlist file is written, defaults to the temporary directory
+        :param concurrency: requests sent before the answer to the first of them is read
+        :return: list of CommandResult in the order of `uris`
+        """
+        uris = list(uris)
+        if as_playlist:
+            try:
+                value = await self.append_queue(
+                    _write_playlist_file(uris, playlist_format, directory)
+                )
+                error = None
+            except Exception as e:
+                value, error = None, e
+            return [CommandResult(uri, value, error) for uri in uris]
+        if (
+            concurrency > 1
+            and self.url.startswith("http://")
+            and self.circuit_breaker.allow()
+        ):
+            pipeline = _Pipeline(
+                self.url,
+                1,
+                self._headers,
+                self._timeout.sock_connect,
+                self._timeout.sock_read,
             )
-            content = xmltodict.parse(d.text)
-            return True if content["root"]["state"] in ("paused", "stopped") else False
-
-        async def seek(self, time: typing.Union[str, datetime.timedelta, int]) -> bool:
-            """
-            Seeking between time in the media with required arg is time which is supported int,str and datetime.timedelta. Returns bool indicate requests was successful or not
-            :return: bool
-            """
-            if isinstance(time, datetime.timedelta):
-                time = time.total_seconds()
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml?command=seek&val=" + str(time),
-                auth=self.auth,
+            urls = [
+                self._command_urls["append_queue"] + urllib.parse.quote(uri)
+                for uri in uris
+            ]
+            messages = [pipeline.request_bytes(url[len(self.url) :]) for url in urls]
+            outcomes = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: list(pipeline.send_in_order(messages, concurrency))
             )
-            return d.status_code == 200
+            return _append_results(self, uris, urls, outcomes)
+        results = []
+        for uri in uris:
+            try:
+                results.append(CommandResult(uri, await self.append_queue(uri)))
+            except Exception as e:
+                results.append(CommandResult(uri, error=e))
+        return results
 
-        @property
-        async def time(self) -> int:
-            """
-            Give the current time media is at (Unit seconds)
-            :return: int, str
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            return content["root"]["time"]
+    async def fullscreen(self) -> bool:
+        """
+        Set the fullscreen state of VLC and return back the boolean of the result if success or not and the current state of the screen
+        :return: (bool, bool)
+        """
+        snapshot = await self._command_status("fullscreen")
+        if snapshot is None:
+            return False, await self.is_fullscreen
+        self.full_screen = snapshot.is_fullscreen
+        return True, snapshot.is_fullscreen
 
-        @property
-        async def duration(self) -> float:
-            """
-            Give how long media is. (Unit seconds)
-            :return: int, str
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            return content["root"]["length"]
+    """ async def set_subtitle_file(self, uri: str) -> bool:
+        \"""
+        Set the subtitle file to show in the VLC and returns bool based on successful or not
+        :return: bool
+        \"""
+        \""" uri = self.__encode_uri(uri) \"""
+        return await self._command("command=pl_enqueue&input=" + uri) """
 
-        @property
-        async def position(self) -> float:
-            """
-            Get current bar position (0,1)
-            :return: float, str
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            return content["root"]["position"]
+    async def browse(self, uri: str) -> dict:
+        """
+        Give the list of the files and return the dictionaries of XML
+        :return: dict
+        """
+        uri = self.__encode_uri(uri)
+        d = await self._get("/requests/browse.xml?uri=" + uri, endpoint="browse")
+        return _timed_parse(self, "browse", xmltodict.parse, d.text)
 
-        @property
-        async def state(self) -> VLC_State:
-            """
-            Give current state of the playback.
-            :return: str
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            return VLC_State(content["root"]["state"])
+    async def delete(self, uri: typing.Union[str, int, PlaylistItem]) -> bool:
+        """
+        Delete media off the playlist by finding with the specified URI. Returns bool indicate if request was successful or not
+        A playlist id or `PlaylistItem` deletes that media only, a URI deletes every media with that URI
+        :param uri: media uri, playlist id or PlaylistItem
+        :return: bool
+        """
+        if isinstance(uri, PlaylistItem):
+            uri = uri.id
+        if isinstance(uri, int) or uri.isdigit():
+            return await self._command("delete", str(uri))
+        await self.refresh_playlist()
+        results = [
+            await self._command("delete", str(item.id))
+            for item in self._playlist.find_uri(uri)
+        ]
+        return bool(results) and all(results)
 
-        @property
-        async def volume(self) -> typing.Union[int, float]:
-            """
-            Get current playback's volume (0-512)
-            If you want percentage returns then set the property of `volume_percentage` to `True`
-            :return: int
-            """
-            d = await aiohttp_wrap.get(
-                self.url + "/requests/status.xml", auth=self.auth
-            )
-            content = xmltodict.parse(d.text)
-            if self.volume_percentage:
-                return float(content["root"]["volume"] / 2.56)
+
+class VLCFleet:
+    """
+    Many VLC endpoints controlled together
+    """
+
+    def __init__(
+        self,
+        endpoints: typing.Iterable[typing.Union[str, tuple]],
+        auth: typing.Union["aiohttp.BasicAuth", tuple, set, list] = ("", ""),
+        timeout: float = 2.0,
+        limit: int = 100,
+        limit_per_host: int = 4,
+        keepalive_timeout: float = 15.0,
+        **options
+    ) -> None:
+        """
+        VLCFleet Class
+        This class will broadcast commands to every endpoint at once over one shared connection pool,
+        a broadcast takes about as long as the slowest node instead of the sum of all nodes.
+        No request is sent on construction, the `Async_VLC` of every node is created on first use.
+        :param endpoints: VLC urls, or (url, auth) tuples for nodes with their own credentials
+        :param auth: auth of the nodes given as plain urls
+        :param timeout: seconds a node may take per command before it is reported as failed
+        :param limit: total connections of the shared pool
+        :param limit_per_host: connections per node of the shared pool
+        :param keepalive_timeout: seconds an idle connection is kept open
+        :param options: extra `Async_VLC` arguments applied to every node (status_ttl, format, ...),
+        except `lazy` and `session` which the fleet sets itself
+        :return: None
+        """
+        for option in ("lazy", "session"):
+            if option in options:
+                raise TypeError(
+                    "VLCFleet sets the {} of its nodes itself".format(option)
+                )
+        _load_async()
+        self.endpoints = []
+        for endpoint in endpoints:
+            if isinstance(endpoint, str):
+                self.endpoints.append((endpoint, auth))
             else:
-                return int(content["root"]["volume"])
+                self.endpoints.append(tuple(endpoint))
+        self.timeout = timeout
+        self.session = None
+        self._session_loop = None
+        self._session_finalizer = None
+        self._connector_options = {
+            "limit": limit,
+            "limit_per_host": limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+        }
+        self._options = options
+        self._nodes = {}
 
-        @property
-        async def is_playing(self):
-            """
-            Check if VLC is playing or not
-            :return: bool
-            """
-            d = await aiohttp_wrap.get(self.url + "/requests/status.xml", auth=self.auth)
-            content = xmltodict.parse(
-                d.text
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    async def __aenter__(self) -> "VLCFleet":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def nodes(self) -> typing.Dict[str, "Async_VLC"]:
+        """
+        `Async_VLC` of every node keyed by url, only available while an event loop is running
+        :return: dict
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self.session is None
+            or self.session.closed
+            or self._session_loop is not loop
+        ):
+            _release_session(self._session_loop, self._session_finalizer)
+            self.session = Async_VLC.create_session(**self._connector_options)
+            self._session_loop = loop
+            self._session_finalizer = _finalize_with_loop(self.session)
+            self._nodes = {
+                url: Async_VLC(
+                    url, auth, session=self.session, lazy=True, **self._options
+                )
+                for url, auth in self.endpoints
+            }
+        return self._nodes
+
+    async def __run(
+        self,
+        url: str,
+        node: "Async_VLC",
+        command: str,
+        args: tuple,
+        kwargs: dict,
+        timeout: float,
+    ) -> CommandResult:
+        start = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(
+                getattr(node, command)(*args, **kwargs), timeout
+            )
+        except Exception as e:
+            return CommandResult(url, error=e, elapsed=time.perf_counter() - start)
+        return CommandResult(url, value, elapsed=time.perf_counter() - start)
+
+    async def broadcast(
+        self, command: str, *args, timeout: typing.Optional[float] = None, **kwargs
+    ) -> FleetResult:
+        """
+        Call the `Async_VLC` method `command` on every node concurrently.
+        Errors and timeouts are collected per node instead of raised
+        :param command: name of the Async_VLC method, e.g. "pause"
+        :param timeout: seconds per node, defaults to the fleet timeout
+        :return: FleetResult
+        """
+        timeout = self.timeout if timeout is None else timeout
+        results = await asyncio.gather(
+            *(
+                self.__run(url, node, command, args, kwargs, timeout)
+                for url, node in self.nodes.items()
             )
-            return True if content["root"]["state"] in ("playing", "paused") else False
+        )
+        return FleetResult((result.target, result) for result in results)
+
+    async def pause(self) -> FleetResult:
+        """
+        Pause every node
+        :return: FleetResult
+        """
+        return await self.broadcast("pause")
+
+    async def play(self, uri: str) -> FleetResult:
+        """
+        Play a media by uri on every node
+        :param uri: media uri
+        :return: FleetResult
+        """
+        return await self.broadcast("play", uri)
+
+    async def stop(self) -> FleetResult:
+        """
+        Stop every node
+        :return: FleetResult
+        """
+        return await self.broadcast("stop")
+
+    async def seek(
+        self, time: typing.Union[str, datetime.timedelta, int]
+    ) -> FleetResult:
+        """
+        Seek every node to the same time
+        :return: FleetResult
+        """
+        return await self.broadcast("seek", time)
+
+    async def set_volume(self, volume: int, percent: bool = False) -> FleetResult:
+        """
+        Set the volume of every node
+        :param volume: volume value (0-512 = 0-200%)
+        :param percent: option for volume is actually percentage or not
+        :return: FleetResult
+        """
+        return await self.broadcast("set_volume", volume, percent)
+
+    async def snapshot(self) -> FleetResult:
+        """
+        Fetch the status of every node, values are `StatusSnapshot`
+        :return: FleetResult
+        """
+        return await self.broadcast("snapshot")
+
+    async def close(self) -> None:
+        """
+        Close the shared session of the fleet
+        :return: None
+        """
+        if self.session is not None:
+            finalizer, self._session_finalizer = self._session_finalizer, None
+            if self._session_loop is asyncio.get_running_loop():
+                await finalizer.aclose()
+            else:
+                _release_session(self._session_loop, finalizer)
+            self.session = None
+            self._nodes = {}
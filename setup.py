@@ -23,5 +23,6 @@ setuptools.setup(
         "build": ["build", "wheel"],
         "async": ["aiohttp[speedups]", "uvloop ; sys_platform == 'linux'"],
         "publish": ["twine", "wheel"],
+        "json": ["orjson"],
     },
 )
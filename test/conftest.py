@@ -0,0 +1,22 @@
+import pytest
+
+from .vlc_simulator import VLCSimulator
+
+
+@pytest.fixture
+def x():
+    # pytest.ini uses this fixture in every test
+    pass
+
+
+@pytest.fixture
+def simulator(request):
+    """
+    A running `VLCSimulator` with the password "secret", closed after the test.
+    Parametrize it indirectly with a dict of other `VLCSimulator` arguments::
+
+        @pytest.mark.parametrize("simulator", [{"latency": 0.1}], indirect=True)
+    """
+    options = dict({"password": "secret"}, **getattr(request, "param", {}))
+    with VLCSimulator(**options) as simulator:
+        yield simulator
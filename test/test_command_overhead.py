@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+# set to e.g. 100000 to compare the per-command CPU time against the plain requests path
+BENCHMARK_COMMANDS = int(os.environ.get("REST_VLC_BENCHMARK_COMMANDS", 0))
+
+
+def test_commands_use_precomputed_urls_and_auth(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth) as vlc:
+        assert vlc.set_volume(128)
+        assert vlc.seek(30)
+        assert vlc.pause()
+        assert vlc.play("file:///music/a b.mp3")
+    assert simulator.paths[1:] == [
+        "/requests/status.xml?command=volume&val=128",
+        "/requests/status.xml?command=seek&val=30",
+        "/requests/status.xml?command=pl_pause",
+        "/requests/status.xml?command=in_play&input=file%3A///music/a%20b.mp3",
+    ]
+
+
+def test_wrong_password_is_rejected(simulator):
+    with rest_vlc.VLC(simulator.url, ("", "wrong"), lazy=True) as vlc:
+        assert not vlc.set_volume(128)
+
+
+def test_async_response_decodes_only_on_demand():
+    response = rest_vlc._AsyncResponse(200, "Café".encode("latin1"), "latin1")
+    assert response.status_code == 200 and response.text == "Café"
+    assert rest_vlc._AsyncResponse(200, "Café".encode(), None).text == "Café"
+
+
+def command_cpu_time(command, count: int) -> float:
+    command(0)  # connect outside of the measurement
+    start = time.thread_time()  # the simulator runs on other threads
+    for value in range(count):
+        command(value)
+    return (time.thread_time() - start) / count
+
+
+@pytest.mark.skipif(
+    not BENCHMARK_COMMANDS, reason="set REST_VLC_BENCHMARK_COMMANDS to run"
+)
+def test_command_cpu_time(simulator):
+    url = simulator.url
+    session = requests.Session()
+    session.auth = requests.auth.HTTPBasicAuth(*simulator.auth)
+    # what every command used to do: concatenate the URL, prepare it and encode the auth
+    baseline = command_cpu_time(
+        lambda value: session.get(
+            url + "/requests/status.xml?command=volume&val=" + str(value),
+            timeout=(5.0, 10.0),
+        ),
+        BENCHMARK_COMMANDS,
+    )
+    session.close()
+    with rest_vlc.VLC(url, simulator.auth) as vlc:
+        table = command_cpu_time(vlc.set_volume, BENCHMARK_COMMANDS)
+    assert table < baseline, "per command CPU time: {:.1f} us, {:.1f} us before".format(
+        table * 1e6, baseline * 1e6
+    )
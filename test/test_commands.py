@@ -0,0 +1,96 @@
+import ast
+import sys
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import generate_stubs
+import rest_vlc
+
+
+def test_coalesce_key():
+    assert rest_vlc._coalesce_key("command=volume&val=100") == "volume"
+    assert rest_vlc._coalesce_key("command=seek&val=30") == "seek"
+    assert rest_vlc._coalesce_key("command=pl_random&state=true") is None
+    assert rest_vlc._coalesce_key("command=seek&val=%2B10") is None
+    assert rest_vlc._coalesce_key("command=pl_pause") is None
+    assert rest_vlc._coalesce_key("command=in_enqueue&input=volume") is None
+
+
+def test_pending_commands_keep_latest_value_in_order():
+    pending = rest_vlc._PendingCommands()
+    pending.push("volume", None, "command=volume&val=1", "a")
+    pending.push(None, None, "command=pl_pause", "b")
+    pending.push("volume", None, "command=volume&val=2", "c")
+    pending.push(None, None, "command=pl_pause", "d")
+    assert len(pending) == 3
+    assert pending.pop() == (None, "command=pl_pause", ["b"])
+    assert pending.pop() == (None, "command=volume&val=2", ["a", "c"])
+    assert pending.pop() == (None, "command=pl_pause", ["d"])
+    assert not pending
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_keeps_order():
+    pytest.importorskip("aiohttp")
+    vlc = rest_vlc.Async_VLC(
+        "http://127.0.0.1:1", lazy=True, coalesce=True, queue_size=2
+    )
+    sent = []
+
+    async def send(query):
+        await rest_vlc.asyncio.sleep(0)
+        sent.append(query)
+        return True
+
+    def command(query):
+        key = rest_vlc._coalesce_key(query)
+        return rest_vlc.asyncio.ensure_future(vlc._Async_VLC__enqueue(key, send, query))
+
+    tasks = [command("command=volume&val=" + str(volume)) for volume in range(10)]
+    tasks += [command("command=pl_pause"), command("command=pl_next")]
+    tasks.append(command("command=volume&val=99"))
+    await rest_vlc.asyncio.sleep(0)
+    assert vlc.queue_stats()["depth"] == 2 and vlc.queue_stats()["waiting"] == 2
+    assert all(await rest_vlc.asyncio.gather(*tasks))
+    assert sent == [
+        "command=volume&val=9",
+        "command=pl_pause",
+        "command=pl_next",
+        "command=volume&val=99",
+    ]
+    stats = vlc.queue_stats()
+    assert stats["sent"] == 4 and stats["coalesced"] == 9 and stats["max_depth"] == 2
+    await vlc.close()
+
+
+def test_both_clients_are_generated_from_one_table():
+    for name in rest_vlc._COMMAND_BUILDERS:
+        assert name in rest_vlc._COMMANDS
+        sync, asynchronous = getattr(rest_vlc.VLC, name), getattr(
+            rest_vlc.Async_VLC, name
+        )
+        assert sync.__doc__ == asynchronous.__doc__
+        assert rest_vlc.inspect.signature(sync) == rest_vlc.inspect.signature(
+            asynchronous
+        )
+    for name in rest_vlc._STATUS_GETTERS:
+        assert isinstance(rest_vlc.VLC.__dict__[name], property)
+        assert isinstance(rest_vlc.Async_VLC.__dict__[name], property)
+
+
+def test_generated_stubs_are_up_to_date():
+    # run generate_stubs.py after changing a command builder or a status getter
+    with open(rest_vlc.__file__) as f:
+        source = f.read()
+    start = source.index(generate_stubs.BEGIN) + len(generate_stubs.BEGIN)
+    written = source[start : source.index(generate_stubs.END)]
+    assert ast.dump(ast.parse(written)) == ast.dump(ast.parse(generate_stubs.render()))
+
+
+def test_command_builders():
+    builders = rest_vlc._COMMAND_BUILDERS
+    assert builders["set_random"](True) == ("set_random", "true")
+    assert builders["set_volume"](50, percent=True) == ("set_volume", "128")
+    assert builders["play"]("file:///a b.mp3") == ("play", "file%3A///a%20b.mp3")
+    assert builders["seek"](rest_vlc.datetime.timedelta(minutes=1)) == ("seek", "60.0")
@@ -0,0 +1,184 @@
+import socket
+import sys
+import time
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+
+def unused_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return "http://127.0.0.1:{}".format(sock.getsockname()[1])
+
+
+def test_lazy_construction_does_no_io():
+    start = time.perf_counter()
+    vlcs = [rest_vlc.VLC(unused_url(), ("", ""), lazy=True) for _ in range(200)]
+    assert time.perf_counter() - start < 1
+    for vlc in vlcs:
+        vlc.close()
+
+
+def test_connect_raises_when_unreachable():
+    with rest_vlc.VLC(unused_url(), ("", ""), lazy=True) as vlc:
+        with pytest.raises(Exception, match="VLC is not running"):
+            vlc.connect(timeout=1)
+
+
+def test_connect_times_out():
+    # a listening socket that never answers
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(1)
+        url = "http://127.0.0.1:{}".format(sock.getsockname()[1])
+        with rest_vlc.VLC(url, ("", ""), lazy=True) as vlc:
+            start = time.perf_counter()
+            with pytest.raises(Exception, match="VLC is not running"):
+                vlc.connect(timeout=0.2)
+            assert time.perf_counter() - start < 2
+
+
+def test_commands_reuse_the_pooled_connection(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth) as vlc:
+        assert vlc.play("file:///music/a.mp3")
+        assert vlc.set_volume(100) and vlc.seek(30) and vlc.pause()
+        assert vlc.snapshot().volume == 100 and vlc.is_paused
+        assert len(vlc.playlist_items()) == 1
+    assert len(simulator.paths) == 8  # connectable, the commands and the reads
+    assert simulator.connections == 1
+
+
+def test_without_keep_alive_every_request_connects(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, keep_alive=False) as vlc:
+        assert vlc.set_volume(100) and vlc.pause()
+    assert simulator.connections == len(simulator.paths) == 3
+
+
+def test_idempotent_commands():
+    assert rest_vlc._is_idempotent("command=pl_stop")
+    assert rest_vlc._is_idempotent("command=volume&val=128")
+    assert rest_vlc._is_idempotent("command=seek&val=90")
+    assert not rest_vlc._is_idempotent("command=seek&val=%2B10")
+    assert not rest_vlc._is_idempotent("command=volume&val=-20")
+    assert not rest_vlc._is_idempotent("command=pl_pause")
+    assert not rest_vlc._is_idempotent("command=pl_random&state=true")
+    assert not rest_vlc._is_idempotent("command=in_enqueue&input=file:///a.mp3")
+
+
+def test_circuit_breaker():
+    breaker = rest_vlc.CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert not breaker.allow() and breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half-open"
+    assert not breaker.allow()  # only one trial
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_retries_then_fails_fast():
+    with rest_vlc.VLC(
+        unused_url(),
+        ("", ""),
+        lazy=True,
+        retries=2,
+        backoff=0.001,
+        failure_threshold=3,
+    ) as vlc:
+        with pytest.raises(rest_vlc.requests.exceptions.ConnectionError):
+            vlc.stop()
+        assert vlc.circuit_breaker.failures == 3
+        with pytest.raises(rest_vlc.CircuitOpenError):
+            vlc.stop()
+        assert not vlc.connectable
+
+
+def test_toggles_are_not_retried():
+    with rest_vlc.VLC(
+        unused_url(), ("", ""), lazy=True, retries=2, backoff=0.001
+    ) as vlc:
+        with pytest.raises(rest_vlc.requests.exceptions.ConnectionError):
+            vlc.pause()
+        assert vlc.circuit_breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_async_connect(simulator):
+    pytest.importorskip("aiohttp")
+    vlc = await rest_vlc.Async_VLC.connect(simulator.url, simulator.auth)
+    async with vlc:
+        assert await vlc.volume == 256
+    with pytest.raises(Exception, match="VLC is not running"):
+        await rest_vlc.Async_VLC.connect(simulator.url, ("", "wrong"))
+
+
+@pytest.mark.asyncio
+async def test_async_connect_unreachable():
+    pytest.importorskip("aiohttp")
+    with pytest.raises(Exception, match="VLC is not running"):
+        await rest_vlc.Async_VLC.connect(unused_url(), timeout=1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("simulator", [{"latency": 0.5}], indirect=True)
+async def test_async_connect_timeout_closes_the_instance(simulator, monkeypatch):
+    pytest.importorskip("aiohttp")
+    closed = []
+    close = rest_vlc.Async_VLC.close
+
+    async def record_close(vlc):
+        closed.append(vlc)
+        await close(vlc)
+
+    monkeypatch.setattr(rest_vlc.Async_VLC, "close", record_close)
+    start = time.perf_counter()
+    with pytest.raises(Exception, match="VLC is not running"):
+        await rest_vlc.Async_VLC.connect(simulator.url, simulator.auth, timeout=0.05)
+    assert time.perf_counter() - start < 0.4
+    assert len(closed) == 1 and closed[0].session is None
+
+
+@pytest.mark.asyncio
+async def test_async_connect_without_check():
+    pytest.importorskip("aiohttp")
+    async with await rest_vlc.Async_VLC.connect(unused_url(), check=False) as vlc:
+        assert vlc.session is None  # nothing was sent
+
+
+@pytest.mark.asyncio
+async def test_async_connect_many_at_once(simulator):
+    pytest.importorskip("aiohttp")
+    session = rest_vlc.Async_VLC.create_session()
+    async with session:
+        vlcs = await rest_vlc.asyncio.gather(
+            *(
+                rest_vlc.Async_VLC.connect(
+                    simulator.url, simulator.auth, session=session
+                )
+                for _ in range(100)
+            )
+        )
+        assert len({id(vlc) for vlc in vlcs}) == 100
+    assert len(simulator.paths) == 100
+
+
+@pytest.mark.asyncio
+async def test_async_connect_on_an_instance(simulator):
+    pytest.importorskip("aiohttp")
+    async with rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        assert await vlc.connect(timeout=1) is vlc
+        with pytest.raises(TypeError):
+            await vlc.connect("http://localhost:8080")
+    async with rest_vlc.Async_VLC(simulator.url, ("", "wrong"), lazy=True) as vlc:
+        with pytest.raises(Exception, match="VLC is not running"):
+            await vlc.connect()
+        assert not vlc.session.closed  # the caller's instance is left open
@@ -0,0 +1,77 @@
+import asyncio
+import contextlib
+import sys
+import time
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+from .vlc_simulator import VLCSimulator
+
+pytest.importorskip("aiohttp")
+
+
+@pytest.fixture
+def simulators(request):
+    # one started simulator per dict of VLCSimulator arguments
+    with contextlib.ExitStack() as stack:
+        yield [
+            stack.enter_context(VLCSimulator(**dict({"password": "secret"}, **options)))
+            for options in request.param
+        ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("simulators", [[{}, {}, {"password": "other"}]], indirect=True)
+async def test_fleet(simulators):
+    async with rest_vlc.VLCFleet(
+        [simulator.url for simulator in simulators], ("", "secret")
+    ) as fleet:
+        result = await fleet.play("file:///music/a.mp3")
+        assert not result.ok and len(result.succeeded) == 2
+        assert result.failed[0].target == simulators[2].url
+        assert (await fleet.set_volume(100)).ok is False
+        snapshots = await fleet.snapshot()
+        for simulator in simulators[:2]:
+            assert snapshots[simulator.url].value.volume == 100
+            assert snapshots[simulator.url].value.state == rest_vlc.VLC_State.playing
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("simulators", [[{"latency": 0.2}] * 5], indirect=True)
+async def test_broadcast_takes_as_long_as_the_slowest_node(simulators):
+    async with rest_vlc.VLCFleet(
+        [simulator.url for simulator in simulators], ("", "secret")
+    ) as fleet:
+        start = time.perf_counter()
+        assert (await fleet.pause()).ok
+        assert time.perf_counter() - start < 0.6  # 1 second one node after another
+    assert all(simulator.state == "stopped" for simulator in simulators)
+    assert all(len(simulator.paths) == 1 for simulator in simulators)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("simulators", [[{}, {}, {"latency": 1.0}]], indirect=True)
+async def test_slow_node_times_out_alone(simulators):
+    async with rest_vlc.VLCFleet(
+        [simulator.url for simulator in simulators], ("", "secret"), timeout=0.2
+    ) as fleet:
+        start = time.perf_counter()
+        result = await fleet.set_volume(100)
+        assert time.perf_counter() - start < 0.6
+        assert len(result.succeeded) == 2
+        (slow,) = result.failed
+        assert slow.target == simulators[2].url
+        assert isinstance(slow.error, asyncio.TimeoutError)
+        assert 0.2 <= slow.elapsed < 0.6
+        result = await fleet.broadcast("set_volume", 50, timeout=2.0)
+        assert result.ok  # a longer timeout for this broadcast only
+    assert all(simulator.volume == 50 for simulator in simulators)
+
+
+@pytest.mark.parametrize("option", ["lazy", "session"])
+def test_fleet_sets_lazy_and_session_itself(option):
+    with pytest.raises(TypeError, match=option):
+        rest_vlc.VLCFleet(["http://127.0.0.1:1"], **{option: True})
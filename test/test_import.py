@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# `import rest_vlc` may take this many times as long as importing its dependencies alone,
+# it is about 1.5 times as long
+IMPORT_BUDGET = float(os.environ.get("REST_VLC_IMPORT_BUDGET", 2.0))
+
+
+def import_modules(statement: str) -> tuple:
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            statement + "; import sys; print(' '.join(sys.modules))",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return process.stdout.split(), cumulative
+
+
+def test_import_does_not_load_async_stack():
+    modules, _ = import_modules("import rest_vlc")
+    for name in ("asyncio", "aiohttp", "uvloop"):
+        assert name not in modules, name + " is imported by `import rest_vlc`"
+
+
+def test_import_time_budget():
+    # the fastest of a few runs, in fresh interpreters so nothing is imported yet
+    rest_vlc_us = dependencies_us = float("inf")
+    for _ in range(3):
+        _, cumulative = import_modules("import rest_vlc")
+        rest_vlc_us = min(rest_vlc_us, cumulative["rest_vlc"])
+        _, cumulative = import_modules("import requests, xmltodict")
+        dependencies_us = min(
+            dependencies_us, cumulative["requests"] + cumulative["xmltodict"]
+        )
+    assert (
+        rest_vlc_us < dependencies_us * IMPORT_BUDGET
+    ), "import rest_vlc took {} us, its dependencies alone {} us".format(
+        rest_vlc_us, dependencies_us
+    )
+
+
+def test_async_stack_loads_on_first_use():
+    pytest.importorskip("aiohttp")
+    import rest_vlc
+
+    rest_vlc._load_async()
+    assert rest_vlc.aiohttp is not None and rest_vlc.asyncio is not None
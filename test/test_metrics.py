@@ -0,0 +1,94 @@
+import sys
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+
+def test_metrics_of_every_call(simulator):
+    spans = []
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, status_ttl=60, metrics=True
+    ) as vlc:
+        vlc.metrics.add_span_hook(spans.append)
+        assert vlc.play("file:///music/a.mp3")
+        assert vlc.snapshot().state == rest_vlc.VLC_State.playing  # from the command
+        assert vlc.snapshot(refresh=True).volume == 256
+        assert len(vlc.playlist_items()) == 1
+        simulator.fail_next()
+        assert not vlc.set_volume(100)
+        stats = vlc.metrics.stats()[simulator.url]
+    assert stats["cache"] == {"hit": 1}
+    assert stats["play"]["requests"] == 1 and stats["play"]["bytes"] > 0
+    assert stats["play"]["parse"]["count"] == 1
+    assert stats["status"]["requests"] == 1 and stats["status"]["errors"] == 0
+    assert stats["playlist"]["wait"]["count"] == stats["playlist"]["parse"]["count"]
+    assert stats["set_volume"]["errors"] == 1
+    assert [span.name for span in spans] == [
+        "rest_vlc play",
+        "rest_vlc status",
+        "rest_vlc playlist",
+        "rest_vlc set_volume",
+    ]
+    assert spans[-1].attributes["http.status_code"] == 500
+    assert spans[0].start <= spans[0].end <= spans[1].start
+
+
+@pytest.mark.parametrize("simulator", [{"failure_status": None}], indirect=True)
+def test_failed_calls_are_counted(simulator):
+    metrics = rest_vlc.Metrics()
+    with rest_vlc.VLC(
+        simulator.url,
+        simulator.auth,
+        lazy=True,
+        failure_threshold=1,
+        metrics=metrics,
+    ) as vlc:
+        simulator.fail_next()
+        with pytest.raises(rest_vlc.requests.exceptions.ConnectionError):
+            vlc.stop()
+        with pytest.raises(rest_vlc.CircuitOpenError):
+            vlc.stop()
+    errors = {key[2]: count for key, count in metrics.errors.items()}
+    assert errors == {"ConnectionError": 1, "CircuitOpenError": 1}
+    assert not metrics.requests
+
+
+def test_prometheus_text():
+    metrics = rest_vlc.Metrics(buckets=(0.1, 1))
+    metrics.record_call("http://vlc", "seek", "http://vlc/x", 0, 0.05, 0.5, 200, 10)
+    metrics.record_call("http://vlc", "seek", "http://vlc/x", 0, 2, 0.0, 401, 0)
+    metrics.record_cache('http://a"b', True)
+    text = rest_vlc.prometheus_text(metrics)
+    labels = 'url="http://vlc",endpoint="seek"'
+    assert (
+        'rest_vlc_request_duration_seconds_bucket{%s,phase="wait",le="0.1"} 1' % labels
+    ) in text
+    assert (
+        'rest_vlc_request_duration_seconds_bucket{%s,phase="wait",le="+Inf"} 2' % labels
+    ) in text
+    assert (
+        'rest_vlc_request_duration_seconds_count{%s,phase="transfer"} 2' % labels
+        in text
+    )
+    assert 'rest_vlc_requests_total{%s,code="401"} 1' % labels in text
+    assert 'rest_vlc_errors_total{%s,error="HTTP 401"} 1' % labels in text
+    assert "rest_vlc_response_bytes_total{%s} 10" % labels in text
+    assert 'rest_vlc_status_cache_total{url="http://a\\"b",result="hit"} 1' in text
+    assert text.count("# TYPE rest_vlc_requests_total counter") == 1
+
+
+@pytest.mark.asyncio
+async def test_async_metrics(simulator):
+    pytest.importorskip("aiohttp")
+    metrics = rest_vlc.Metrics()
+    async with rest_vlc.Async_VLC(
+        simulator.url, simulator.auth, lazy=True, format="json", metrics=metrics
+    ) as vlc:
+        assert await vlc.set_volume(128)
+        assert (await vlc.snapshot()).volume == 128
+    stats = metrics.stats()[simulator.url]
+    assert stats["set_volume"]["requests"] == stats["status"]["requests"] == 1
+    assert stats["status"]["parse"]["count"] == 1
+    assert "parse" not in stats["set_volume"]  # the bool result needs no parsing
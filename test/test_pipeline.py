@@ -0,0 +1,79 @@
+import concurrent.futures
+import io
+import sys
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+
+@pytest.mark.parametrize("format", ["xml", "json"])
+def test_pipelined_requests(simulator, format):
+    with rest_vlc.VLC(simulator.url, simulator.auth, format=format, pipeline=2) as vlc:
+        assert vlc.play("file:///music/a b.mp3")
+        assert vlc.set_volume(100)
+        assert vlc.snapshot().volume == 100
+        assert vlc.playlist_items()[0].uri == "file:///music/a b.mp3"
+        assert vlc.status
+    assert simulator.connections == 1  # a serial caller never needs a second one
+
+
+def test_concurrent_callers_share_the_connections(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True, pipeline=2) as vlc:
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(vlc.set_volume, range(200)))
+    assert all(results)
+    assert simulator.connections <= 2
+    assert len(simulator.paths) == 200
+
+
+def test_wrong_password(simulator):
+    with rest_vlc.VLC(simulator.url, ("", "wrong"), lazy=True, pipeline=1) as vlc:
+        assert not vlc.set_volume(100)
+        assert not vlc.connectable
+
+
+def test_broken_connections_are_replaced(simulator):
+    simulator.failure_status = None
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, pipeline=1, retries=1, backoff=0
+    ) as vlc:
+        simulator.fail_next()
+        assert vlc.stop()  # retried on a new connection
+        simulator.fail_next()
+        with pytest.raises(rest_vlc.requests.exceptions.ConnectionError):
+            vlc.pause()
+        assert vlc.pause()
+    assert simulator.connections == 3
+
+
+@pytest.mark.parametrize("simulator", [{"latency": 0.5}], indirect=True)
+def test_read_timeout(simulator):
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, pipeline=1, read_timeout=0.05
+    ) as vlc:
+        with pytest.raises(rest_vlc.requests.exceptions.ReadTimeout):
+            vlc.stop()
+
+
+def test_pipeline_options():
+    with pytest.raises(ValueError):
+        rest_vlc.VLC("http://127.0.0.1:1", lazy=True, pipeline=1, keep_alive=False)
+    with pytest.raises(ValueError):
+        rest_vlc.VLC("https://127.0.0.1:1", lazy=True, pipeline=1)
+
+
+def test_read_response():
+    chunked = io.BytesIO(
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"3\r\nabc\r\n2;x=y\r\nde\r\n0\r\n\r\n"
+        b"HTTP/1.0 404 Not Found\r\n\r\nuntil the end"
+    )
+    assert rest_vlc._read_response(chunked) == (
+        200,
+        {"transfer-encoding": "chunked"},
+        b"abcde",
+        False,
+    )
+    assert rest_vlc._read_response(chunked) == (404, {}, b"until the end", True)
@@ -0,0 +1,204 @@
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+PLAYLIST_XML = """<?xml version="1.0" encoding="utf-8" standalone="yes" ?>
+<node ro="rw" name="Undefined" id="0">
+<node ro="ro" name="Playlist" id="1">
+<leaf ro="rw" name="song.mp3" id="4" duration="215" uri="file:///music/song.mp3" current="current"/>
+<leaf ro="rw" name="Other &amp; song" id="5" duration="-1" uri="file:///music/other%20song.ogg"/>
+<node ro="rw" name="folder" id="6">
+<leaf ro="rw" name="inner.mp3" id="7" duration="12" uri="file:///music/folder/inner.mp3"/>
+</node>
+</node>
+<node ro="ro" name="Media Library" id="2">
+<leaf ro="rw" name="library.mp3" id="3" duration="30" uri="file:///music/library.mp3"/>
+</node>
+</node>"""
+
+PLAYLIST_JSON = """{"ro":"rw","type":"node","name":"Undefined","id":"0","children":[
+{"ro":"ro","type":"node","name":"Playlist","id":"1","children":[
+{"ro":"rw","type":"leaf","name":"song.mp3","id":"4","duration":215,"uri":"file:///music/song.mp3","current":"current"},
+{"ro":"rw","type":"leaf","name":"Other & song","id":"5","duration":-1,"uri":"file:///music/other%20song.ogg"},
+{"ro":"rw","type":"node","name":"folder","id":"6","children":[
+{"ro":"rw","type":"leaf","name":"inner.mp3","id":"7","duration":12,"uri":"file:///music/folder/inner.mp3"}]}]},
+{"ro":"ro","type":"node","name":"Media Library","id":"2","children":[
+{"ro":"rw","type":"leaf","name":"library.mp3","id":"3","duration":30,"uri":"file:///music/library.mp3"}]}]}"""
+
+
+def test_playlist_items_from_xml():
+    items = rest_vlc._PlaylistItemParser().parse(PLAYLIST_XML)
+    assert [item.id for item in items] == [4, 5, 7]
+    assert items[0].current and not items[1].current
+    assert items[1].name == "Other & song"
+    assert items[1].duration == -1
+
+
+def test_playlist_items_formats_match():
+    assert rest_vlc._PlaylistItemParser().parse(
+        PLAYLIST_XML
+    ) == rest_vlc._playlist_items_from_json(PLAYLIST_JSON)
+
+
+def test_playlist_indexes_and_diff():
+    playlist = rest_vlc.Playlist()
+    diffs = []
+    playlist.add_listener(diffs.append)
+    items = rest_vlc._PlaylistItemParser().parse(PLAYLIST_XML)
+    diff = playlist.update(items)
+    assert [item.id for item in diff.added] == [4, 5, 7]
+    assert diff.current_changed and playlist.current.id == 4
+    assert playlist.get(5).name == "Other & song"
+    assert playlist.find_uri("file:///music/folder/inner.mp3")[0].id == 7
+    assert playlist.find_name("song.mp3")[0].id == 4
+    assert 3 not in playlist  # media library entries are not part of the playlist
+
+    renamed = rest_vlc.PlaylistItem(5, "Renamed", items[1].uri, 99, True)
+    added = rest_vlc.PlaylistItem(8, "new.mp3", "file:///music/new.mp3", 1, False)
+    unchanged = rest_vlc.PlaylistItem(7, "inner.mp3", items[2].uri, 12, False)
+    diff = playlist.update([renamed, unchanged, added])
+    assert [item.id for item in diff.removed] == [4]
+    assert diff.changed == [renamed] and diff.added == [added]
+    assert diff.previous_current.id == 4 and diff.current.id == 5
+    assert playlist.get(7) is items[2]  # unchanged entries keep their object
+    assert playlist.find_name("Other & song") == []
+    assert [item.id for item in playlist] == [5, 7, 8]
+
+    assert not playlist.update([renamed, unchanged, added])
+    assert len(diffs) == 2
+
+
+def test_write_playlist_file(tmp_path):
+    uris = ["file:///music/a b.mp3", "http://radio.example/stream?a=1&b=2"]
+    m3u = rest_vlc._write_playlist_file(uris, "m3u", str(tmp_path))
+    assert m3u.startswith("file://") and m3u.endswith(".m3u")
+    assert (tmp_path / m3u.rsplit("/", 1)[1]).read_text().splitlines() == [
+        "#EXTM3U"
+    ] + uris
+    xspf = rest_vlc._write_playlist_file(uris, "xspf", str(tmp_path))
+    content = (tmp_path / xspf.rsplit("/", 1)[1]).read_text()
+    assert "<location>http://radio.example/stream?a=1&amp;b=2</location>" in content
+    with pytest.raises(ValueError):
+        rest_vlc._write_playlist_file(uris, "pls", str(tmp_path))
+
+
+def test_playlist_items_fed_in_pieces():
+    parser = rest_vlc._PlaylistItemParser()
+    document = PLAYLIST_XML.encode()
+    items = []
+    for i in range(0, len(document), 7):
+        items.extend(parser.feed(document[i : i + 7]))
+    items.extend(parser.feed(b"", True))
+    assert items == rest_vlc._PlaylistItemParser().parse(PLAYLIST_XML)
+
+
+def test_playlist_items_fed_in_bounded_memory():
+    def chunks(count):
+        yield b'<node id="0"><node name="Playlist" id="1">'
+        leaf = '<leaf name="track {0}.mp3" id="{0}" duration="215" uri="file:///music/track%20{0}.mp3"/>'
+        for start in range(0, count, 500):
+            yield "".join(leaf.format(i) for i in range(start, start + 500)).encode()
+        yield b"</node></node>"
+
+    parser = rest_vlc._PlaylistItemParser()
+    seen = 0
+    tracemalloc.start()
+    try:
+        for chunk in chunks(100000):
+            for item in parser.feed(chunk):
+                assert item.id == seen
+                seen += 1
+        parser.feed(b"", True)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert seen == 100000
+    assert peak < 2 * 1024 * 1024  # the whole document is about 9 MB
+
+
+URIS = ["file:///music/track%20{}.mp3".format(i) for i in range(200)]
+
+
+def check_append_many(simulator, results, concurrency):
+    assert [result.target for result in results] == URIS
+    assert [result for result in results if not result.ok]
+    accepted = [result.target for result in results if result.ok]
+    queued = [media.uri for media in simulator.playlist]
+    if concurrency == 1:
+        assert queued == accepted
+    else:
+        # a broken connection can lose the answers to requests VLC handled already
+        assert set(accepted) <= set(queued)
+        assert queued == [uri for uri in URIS if uri in set(queued)]
+
+
+@pytest.mark.parametrize("concurrency", [1, 8])
+@pytest.mark.parametrize(
+    "simulator",
+    [{"failure_rate": 0.05, "failure_status": None, "seed": 9}],
+    indirect=True,
+)
+def test_append_many_keeps_order(simulator, concurrency):
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, failure_threshold=len(URIS)
+    ) as vlc:
+        results = vlc.append_many(iter(URIS), concurrency=concurrency)
+    assert any(
+        isinstance(result.error, rest_vlc.requests.exceptions.ConnectionError)
+        for result in results
+    )
+    check_append_many(simulator, results, concurrency)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [1, 8])
+@pytest.mark.parametrize(
+    "simulator",
+    [{"failure_rate": 0.05, "seed": 9, "latency": 0.001}],
+    indirect=True,
+)
+async def test_async_append_many_keeps_order(simulator, concurrency):
+    pytest.importorskip("aiohttp")
+    async with rest_vlc.Async_VLC(
+        simulator.url, simulator.auth, lazy=True, failure_threshold=len(URIS)
+    ) as vlc:
+        results = await vlc.append_many(iter(URIS), concurrency=concurrency)
+    assert any(result.value is False for result in results)
+    check_append_many(simulator, results, concurrency)
+
+
+@pytest.mark.parametrize("simulator", [{"network_delay": 0.005}], indirect=True)
+def test_append_many_overlaps_the_round_trips(simulator):
+    uris = URIS[:60]
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        start = time.perf_counter()
+        assert all(result.ok for result in vlc.append_many(uris, concurrency=1))
+        one_at_a_time = time.perf_counter() - start
+        start = time.perf_counter()
+        assert all(result.ok for result in vlc.append_many(uris, concurrency=8))
+        pipelined = time.perf_counter() - start
+    assert pipelined < one_at_a_time / 3
+    assert [media.uri for media in simulator.playlist] == uris + uris
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("simulator", [{"network_delay": 0.005}], indirect=True)
+async def test_async_append_many_overlaps_the_round_trips(simulator):
+    pytest.importorskip("aiohttp")
+    uris = URIS[:60]
+    async with rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        start = time.perf_counter()
+        results = await vlc.append_many(uris, concurrency=1)
+        one_at_a_time = time.perf_counter() - start
+        assert all(result.ok for result in results)
+        start = time.perf_counter()
+        results = await vlc.append_many(uris, concurrency=8)
+        pipelined = time.perf_counter() - start
+        assert all(result.ok for result in results)
+    assert pipelined < one_at_a_time / 3
+    assert [media.uri for media in simulator.playlist] == uris + uris
@@ -0,0 +1,68 @@
+import sys
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+
+@pytest.fixture
+def simulator(simulator):
+    for i in range(3000):
+        simulator.add("file:///music/track%20{}.mp3".format(i))
+    return simulator
+
+
+@pytest.mark.parametrize("format", ["xml", "json"])
+def test_iter_playlist(simulator, format):
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, format=format, metrics=True
+    ) as vlc:
+        items = vlc.iter_playlist()
+        first = next(items)
+        assert first.uri == "file:///music/track%200.mp3"
+        assert [first] + list(items) == vlc.playlist_items()
+        assert vlc.set_volume(100)  # the connection is usable again
+        stats = vlc.metrics.stats()[simulator.url]["playlist"]
+    assert stats["requests"] == 2 and stats["parse"]["count"] == 2
+    assert stats["bytes"] > 3000 * 50
+
+
+def test_iter_playlist_stopped_early(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        items = vlc.iter_playlist()
+        assert next(items).id == simulator.playlist[0].id
+        items.close()
+        assert len(vlc.playlist_items()) == 3000
+
+
+def test_iter_playlist_ignores_pipeline(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True, pipeline=2) as vlc:
+        assert sum(1 for _ in vlc.iter_playlist()) == 3000
+
+
+def test_iter_playlist_wrong_password(simulator):
+    with rest_vlc.VLC(simulator.url, ("", "wrong"), lazy=True) as vlc:
+        with pytest.raises(rest_vlc.HTTPStatusError, match="HTTP 401"):
+            list(vlc.iter_playlist())
+
+
+@pytest.mark.asyncio
+async def test_async_iter_playlist(simulator):
+    pytest.importorskip("aiohttp")
+    async with rest_vlc.Async_VLC(
+        simulator.url, simulator.auth, lazy=True, format="json", metrics=True
+    ) as vlc:
+        items = [item async for item in vlc.iter_playlist()]
+        assert items == await vlc.playlist_items()
+        assert len(items) == 3000
+        stopped = vlc.iter_playlist()
+        assert (await stopped.__anext__()).id == items[0].id
+        await stopped.aclose()
+        assert await vlc.set_volume(100)
+        with pytest.raises(rest_vlc.HTTPStatusError, match="HTTP 401"):
+            async with rest_vlc.Async_VLC(
+                simulator.url, ("", "wrong"), lazy=True
+            ) as wrong:
+                [item async for item in wrong.iter_playlist()]
+    assert vlc.metrics.stats()[simulator.url]["playlist"]["requests"] == 3
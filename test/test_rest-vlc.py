@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 import os
+import pathlib
 import sys
 import time
 
@@ -10,7 +11,23 @@ import pytest
 sys.path.append("..")  # pytest problem?
 import rest_vlc
 
-vlc = rest_vlc.VLC(auth=("", os.environ["VLC_PASSWORD"]))
+from .vlc_simulator import VLCSimulator
+
+if "VLC_PASSWORD" in os.environ:
+    vlc = rest_vlc.VLC(auth=("", os.environ["VLC_PASSWORD"]))
+    URI, URI2, FOLDER = (
+        os.environ["VLC_URI"],
+        os.environ["VLC_URI2"],
+        os.environ["VLC_FOLDER"],
+    )
+else:  # no VLC configured, run against the simulator
+    simulator = VLCSimulator().start()
+    vlc = rest_vlc.VLC(simulator.url, simulator.auth)
+    URI, URI2, FOLDER = (
+        "file:///music/a.mp3",
+        "file:///music/b.mp3",
+        pathlib.Path(__file__).parent.as_uri(),
+    )
 
 
 @pytest.fixture
@@ -39,11 +56,11 @@ def test_clear_playlist():
 
 
 def test_play():
-    assert vlc.play(os.environ["VLC_URI"]), "Failed to play"
+    assert vlc.play(URI), "Failed to play"
 
 
 def test_append():
-    assert vlc.append_queue(os.environ["VLC_URI2"]), "Failed to append"
+    assert vlc.append_queue(URI2), "Failed to append"
 
 
 def test_random():
@@ -69,7 +86,7 @@ def test_fullscreen():
 
 
 def test_browse():
-    assert vlc.browse(os.environ["VLC_FOLDER"]), "Failed to browse"
+    assert vlc.browse(FOLDER), "Failed to browse"
 
 
 def test_previous():
@@ -81,7 +98,7 @@ def test_next():
 
 
 def test_delete():
-    assert vlc.delete(os.environ["VLC_URI"]), "Failed to delete"
+    assert vlc.delete(URI), "Failed to delete"
 
 
 def test_clear_history():
@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 import os
+import pathlib
 import sys
 import time
 
@@ -10,7 +11,23 @@ import pytest
 sys.path.append("..")  # pytest problem?
 import rest_vlc
 
-vlc = rest_vlc.Async_VLC(auth=("", os.environ["VLC_PASSWORD"]))
+from .vlc_simulator import VLCSimulator
+
+if "VLC_PASSWORD" in os.environ:
+    vlc = rest_vlc.Async_VLC(auth=("", os.environ["VLC_PASSWORD"]))
+    URI, URI2, FOLDER = (
+        os.environ["VLC_URI"],
+        os.environ["VLC_URI2"],
+        os.environ["VLC_FOLDER"],
+    )
+else:  # no VLC configured, run against the simulator
+    simulator = VLCSimulator().start()
+    vlc = rest_vlc.Async_VLC(simulator.url, simulator.auth)
+    URI, URI2, FOLDER = (
+        "file:///music/a.mp3",
+        "file:///music/b.mp3",
+        pathlib.Path(__file__).parent.as_uri(),
+    )
 
 
 @pytest.fixture
@@ -45,12 +62,12 @@ async def test_clear_playlist():
 
 @pytest.mark.asyncio
 async def test_play():
-    assert await vlc.play(os.environ["VLC_URI"]), "Failed to play"
+    assert await vlc.play(URI), "Failed to play"
 
 
 @pytest.mark.asyncio
 async def test_append():
-    assert await vlc.append_queue(os.environ["VLC_URI2"]), "Failed to append"
+    assert await vlc.append_queue(URI2), "Failed to append"
 
 
 @pytest.mark.asyncio
@@ -76,12 +93,12 @@ async def test_fullscreen():
     assert await vlc.fullscreen(), "Failed to set fullscreen"
     assert await vlc.is_fullscreen, "Failed to set fullscreen"
     assert await vlc.fullscreen(), "Failed to set fullscreen"  # revert
-    assert not vlc.is_fullscreen, "Failed to set fullscreen"  # revert
+    assert not await vlc.is_fullscreen, "Failed to set fullscreen"  # revert
 
 
 @pytest.mark.asyncio
 async def test_browse():
-    assert await vlc.browse(os.environ["VLC_FOLDER"]), "Failed to browse"
+    assert await vlc.browse(FOLDER), "Failed to browse"
 
 
 @pytest.mark.asyncio
@@ -96,7 +113,7 @@ async def test_next():
 
 @pytest.mark.asyncio
 async def test_delete():
-    assert await vlc.delete(os.environ["VLC_URI"]), "Failed to delete"
+    assert await vlc.delete(URI), "Failed to delete"
 
 
 @pytest.mark.asyncio
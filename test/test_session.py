@@ -0,0 +1,94 @@
+import asyncio
+import gc
+import sys
+import threading
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+pytest.importorskip("aiohttp")
+
+
+def test_owned_session_closed_with_its_loop(simulator):
+    vlc = rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True)
+    sessions = []
+
+    async def command() -> None:
+        assert await vlc.set_volume(100)
+        assert await vlc.stop()  # over the same session and connection
+        sessions.append(vlc.session)
+
+    for _ in range(3):
+        asyncio.run(command())
+    assert len(set(map(id, sessions))) == 3
+    assert all(session.closed for session in sessions)
+    assert simulator.connections == 3
+    asyncio.run(vlc.close())
+    assert vlc.session is None
+
+
+@pytest.mark.asyncio
+async def test_owned_session_leaves_no_pending_task(simulator):
+    vlc = rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True)
+    assert await vlc.pause()
+    # an application gathering every task at shutdown must not wait for the client
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+    session = vlc.session
+    del vlc
+    gc.collect()
+    for _ in range(100):
+        if session.closed:
+            break
+        await asyncio.sleep(0.01)
+    assert session.closed  # closed on its loop once the client is gone
+
+
+def test_session_of_a_loop_in_another_thread_is_closed(simulator):
+    vlc = rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        future = asyncio.run_coroutine_threadsafe(vlc.pause(), loop)
+        assert future.result(5)
+        session = vlc.session
+
+        async def command() -> None:
+            assert await vlc.pause()
+            await vlc.close()
+
+        asyncio.run(command())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result(5)
+        assert session.closed
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+@pytest.mark.asyncio
+async def test_async_with_closes_the_owned_session(simulator):
+    async with rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        assert await vlc.pause()
+        session = vlc.session
+    assert session.closed and vlc.session is None
+
+
+@pytest.mark.asyncio
+async def test_shared_session(simulator):
+    session = rest_vlc.Async_VLC.create_session(limit_per_host=2)
+    async with session:
+        clients = [
+            rest_vlc.Async_VLC(simulator.url, auth, lazy=True, session=session)
+            for auth in (simulator.auth, ("", "wrong"))
+        ]
+        results = await asyncio.gather(
+            *(clients[i % 2].set_volume(i) for i in range(20))
+        )
+        assert results == [i % 2 == 0 for i in range(20)]
+        for vlc in clients:
+            await vlc.close()
+        assert not session.closed  # a shared session is left to its owner
+    assert simulator.connections <= 2
@@ -0,0 +1,103 @@
+import sys
+import time
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+
+@pytest.mark.parametrize("format", ["xml", "json"])
+def test_both_formats_follow_the_commands(simulator, format):
+    with rest_vlc.VLC(simulator.url, simulator.auth, format=format) as vlc:
+        assert vlc.play("file:///music/a b.mp3")
+        assert vlc.append_queue("file:///music/b.mp3")
+        assert vlc.set_volume(50, percent=True)
+        assert vlc.seek(30)
+        assert vlc.set_loop_queue(True)
+        snapshot = vlc.snapshot()
+        assert snapshot.state == rest_vlc.VLC_State.playing
+        assert (snapshot.time, snapshot.volume, snapshot.duration) == (30, 128, 215)
+        assert snapshot.is_loop_queue and not snapshot.is_random
+        items = vlc.playlist_items()
+        assert [item.uri for item in items] == [
+            "file:///music/a b.mp3",
+            "file:///music/b.mp3",
+        ]
+        assert items[0].current and snapshot.current_id == items[0].id
+        assert vlc.next()
+        assert vlc.next()  # loops back to the first media
+        assert vlc.snapshot().current_id == items[0].id
+        assert vlc.delete(items[0])
+        assert vlc.snapshot().state == rest_vlc.VLC_State.stopped
+
+
+def test_dropped_connections_are_retried(simulator):
+    simulator.failure_status = None
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, retries=2, backoff=0.001
+    ) as vlc:
+        simulator.fail_next(2)
+        assert vlc.stop()
+        simulator.fail_next(1)
+        with pytest.raises(rest_vlc.requests.exceptions.ConnectionError):
+            vlc.pause()  # toggles are sent once
+    assert len(simulator.paths) == 4
+
+
+def test_error_status_is_not_retried(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True, retries=2) as vlc:
+        simulator.fail_next(1)
+        assert not vlc.stop()
+    assert len(simulator.paths) == 1
+
+
+@pytest.mark.parametrize(
+    "simulator", [{"failure_rate": 1, "failure_status": None}], indirect=True
+)
+def test_dropped_connections_open_the_circuit(simulator):
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, failure_threshold=2
+    ) as vlc:
+        for _ in range(2):
+            with pytest.raises(rest_vlc.requests.exceptions.ConnectionError):
+                vlc.stop()
+        with pytest.raises(rest_vlc.CircuitOpenError):
+            vlc.stop()
+    assert len(simulator.paths) == 2
+
+
+@pytest.mark.parametrize("simulator", [{"latency": 0.5}], indirect=True)
+def test_latency_hits_the_read_timeout(simulator):
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, read_timeout=0.05
+    ) as vlc:
+        start = time.perf_counter()
+        with pytest.raises(rest_vlc.requests.exceptions.Timeout):
+            vlc.stop()
+        assert time.perf_counter() - start < 0.4
+
+
+@pytest.mark.parametrize("simulator", [{"latency": 0.2}], indirect=True)
+def test_random_toggle_is_not_resent_after_a_timeout(simulator):
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, read_timeout=0.05, retries=2
+    ) as vlc:
+        with pytest.raises(rest_vlc.requests.exceptions.Timeout):
+            vlc.set_random(True)
+        time.sleep(0.3)  # the request still arrives and toggles
+    assert simulator.paths == ["/requests/status.xml?command=pl_random&state=true"]
+    assert simulator.is_random
+
+
+@pytest.mark.parametrize("simulator", [{"latency": 0.02}], indirect=True)
+def test_random_toggles_are_not_coalesced(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True, coalesce=True) as vlc:
+        futures = [vlc.submit("set_random", state) for state in (True, False, True)]
+        futures += [vlc.submit("set_volume", volume) for volume in range(1, 6)]
+        assert all(future.result() for future in futures)
+        assert vlc.queue_stats()["coalesced"] > 0
+    commands = [path.partition("command=")[2] for path in simulator.paths]
+    assert len([c for c in commands if c.startswith("pl_random")]) == 3
+    assert simulator.is_random  # toggled three times, whatever the states said
+    assert commands[-1] == "volume&val=5" and simulator.volume == 5
@@ -0,0 +1,279 @@
+import queue
+import sys
+import time
+
+import pytest
+import xmltodict
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+STATUS_XML = """<?xml version="1.0" encoding="utf-8" standalone="yes" ?>
+<root>
+<fullscreen>true</fullscreen>
+<aspectratio>default</aspectratio>
+<audiodelay>0</audiodelay>
+<apiversion>3</apiversion>
+<currentplid>4</currentplid>
+<time>42</time>
+<volume>256</volume>
+<length>215</length>
+<random>false</random>
+<audiofilters>
+  <filter_0></filter_0></audiofilters>
+<rate>1</rate>
+<videoeffects>
+<hue>0</hue><saturation>1</saturation><contrast>1</contrast><brightness>1</brightness><gamma>1</gamma></videoeffects>
+<state>paused</state>
+<loop>true</loop>
+<version>3.0.18 Vetinari</version>
+<position>0.19534883720930232</position>
+<repeat>false</repeat>
+<subtitledelay>0</subtitledelay>
+<equalizer></equalizer>
+<information>
+<category name="meta">
+<info name='filename'>song.mp3</info>
+<info name='title'>Song</info>
+</category>
+<category name='Stream 0'><info name='Codec'>MPEG Audio layer 1/2 (mpga)</info><info name='Type'>Audio</info></category>
+</information>
+<stats>
+<lostabuffers>0</lostabuffers><readpackets>120</readpackets><demuxreadbytes>1000</demuxreadbytes>
+</stats>
+</root>"""
+
+
+def test_snapshot_from_dict():
+    snapshot = rest_vlc.StatusSnapshot.from_dict(xmltodict.parse(STATUS_XML))
+    assert snapshot.state is rest_vlc.VLC_State.paused
+    assert snapshot.time == 42
+    assert snapshot.duration == 215
+    assert snapshot.position == 0.19534883720930232
+    assert snapshot.volume == 256
+    assert snapshot.is_fullscreen is True
+    assert snapshot.is_loop_queue is True
+    assert snapshot.is_random is False
+    assert snapshot.is_repeat_media is False
+    assert snapshot.current_id == 4
+    assert snapshot.is_paused
+
+
+def test_status_cache_ttl_and_invalidation():
+    snapshot = rest_vlc.StatusSnapshot.from_dict(xmltodict.parse(STATUS_XML))
+    cache = rest_vlc._StatusCache(60)
+    generation = cache.generation
+    cache.put(snapshot, generation)
+    assert cache.get() is snapshot
+    cache.invalidate()
+    assert cache.get() is None
+    cache.put(snapshot, generation)  # fetched before the invalidating command
+    assert cache.get() is None
+    disabled = rest_vlc._StatusCache(0)
+    disabled.put(snapshot, disabled.generation)
+    assert disabled.get() is None
+
+
+def test_snapshot_from_xml_matches_xmltodict():
+    assert rest_vlc.StatusSnapshot.from_xml(
+        STATUS_XML
+    ) == rest_vlc.StatusSnapshot.from_dict(xmltodict.parse(STATUS_XML))
+    assert rest_vlc.StatusSnapshot.from_xml(
+        STATUS_XML.encode()
+    ) == rest_vlc.StatusSnapshot.from_xml(STATUS_XML)
+
+
+def test_snapshot_from_xml_reads_only_top_level_fields():
+    # a nested <state> must not shadow the real one and the document is
+    # truncated after <repeat> to show that parsing stops early
+    document = STATUS_XML.replace(
+        "<fullscreen>true</fullscreen>",
+        "<audiofilters><state>stopped</state></audiofilters><fullscreen>true</fullscreen>",
+    )
+    document = document[: document.index("<subtitledelay>")] + "<broken"
+    snapshot = rest_vlc.StatusSnapshot.from_xml(document)
+    assert snapshot.state is rest_vlc.VLC_State.paused
+    assert snapshot.is_fullscreen
+
+
+def test_snapshot_from_json_matches_xml():
+    document = """{"fullscreen":true,"aspectratio":"default","audiodelay":0,
+    "apiversion":3,"currentplid":4,"time":42,"volume":256,"length":215,
+    "random":false,"rate":1,"state":"paused","loop":true,"version":"3.0.18 Vetinari",
+    "position":0.19534883720930232,"repeat":false,"subtitledelay":0,"equalizer":[],
+    "information":{"category":{"meta":{"filename":"song.mp3"}}},"stats":{}}"""
+    assert rest_vlc.StatusSnapshot.from_json(
+        document
+    ) == rest_vlc.StatusSnapshot.from_xml(STATUS_XML)
+
+
+def playing(time: int, volume: int = 256, current_id: int = 4, state: str = "playing"):
+    return rest_vlc.StatusSnapshot(
+        rest_vlc.VLC_State(state),
+        time,
+        215,
+        time / 215,
+        volume,
+        False,
+        False,
+        False,
+        False,
+        current_id,
+    )
+
+
+def test_status_events():
+    first = rest_vlc._status_events(None, playing(10))
+    assert [event.kind for event in first] == ["state", "track", "volume", "position"]
+    events = rest_vlc._status_events(playing(10), playing(11, volume=100))
+    assert [type(event) for event in events] == [
+        rest_vlc.VolumeChanged,
+        rest_vlc.PositionTick,
+    ]
+    assert events[0].volume == 100 and events[1].time == 11
+    events = rest_vlc._status_events(playing(11), playing(0, current_id=5))
+    assert events[0].current_id == 5
+    assert rest_vlc._status_events(playing(11), playing(11)) == []
+
+
+def test_poll_delay_adapts():
+    assert rest_vlc._poll_delay(playing(10), playing(11), 1.0, 1.0) == 1.0
+    assert rest_vlc._poll_delay(None, playing(11, state="paused"), 1.0, 1.0) == 4.0
+    assert rest_vlc._poll_delay(playing(10), playing(60), 1.0, 1.0) == 0.25  # seek
+    assert (
+        rest_vlc._poll_delay(playing(212), playing(214), 1.0, 1.0) == 0.25
+    )  # track end
+
+
+@pytest.mark.parametrize("format", ["xml", "json"])
+def test_snapshot_error_status(simulator, format):
+    with rest_vlc.VLC(simulator.url, ("", "wrong"), lazy=True, format=format) as vlc:
+        with pytest.raises(rest_vlc.HTTPStatusError, match="HTTP 401") as error:
+            vlc.volume
+        assert error.value.status_code == 401
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True, format=format) as vlc:
+        simulator.fail_next()
+        with pytest.raises(rest_vlc.HTTPStatusError, match="HTTP 500"):
+            vlc.state
+        assert vlc.state == rest_vlc.VLC_State.stopped
+
+
+@pytest.mark.asyncio
+async def test_async_snapshot_error_status(simulator):
+    pytest.importorskip("aiohttp")
+    async with rest_vlc.Async_VLC(simulator.url, ("", "wrong"), lazy=True) as vlc:
+        with pytest.raises(rest_vlc.HTTPStatusError, match="HTTP 401"):
+            await vlc.volume
+        with pytest.raises(rest_vlc.HTTPStatusError, match="HTTP 401"):
+            await vlc.snapshot(refresh=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("simulator", [{"latency": 0.05}], indirect=True)
+async def test_async_snapshot_single_flight(simulator):
+    pytest.importorskip("aiohttp")
+    async with rest_vlc.Async_VLC(
+        simulator.url, simulator.auth, lazy=True, status_ttl=60
+    ) as vlc:
+        volumes = await rest_vlc.asyncio.gather(*(vlc.volume for _ in range(22)))
+        assert volumes == [256] * 22
+        assert len(simulator.paths) == 1
+        # a cancelled reader leaves the shared refresh to the others
+        vlc.invalidate_status()
+        assert vlc._status_refresh is None
+        first = rest_vlc.asyncio.ensure_future(vlc.snapshot())
+        second = rest_vlc.asyncio.ensure_future(vlc.snapshot())
+        await rest_vlc.asyncio.sleep(0.01)
+        first.cancel()
+        assert (await second).volume == 256
+        assert first.cancelled()
+        assert len(simulator.paths) == 2
+        # the status answered to a command is cached, after invalidation the
+        # next reads share one new request
+        assert await vlc.set_volume(100)
+        assert await vlc.volume == 100
+        assert len(simulator.paths) == 3
+        vlc.invalidate_status()
+        volumes = await rest_vlc.asyncio.gather(*(vlc.volume for _ in range(5)))
+        assert volumes == [100] * 5
+        assert len(simulator.paths) == 4
+
+
+def test_status_cache_keeps_the_newest_command_answer():
+    older, newer = playing(10), playing(20)
+    cache = rest_vlc._StatusCache(60)
+    first = cache.invalidate()  # a command is sent
+    second = cache.invalidate()  # a later command is sent
+    fetch = cache.generation  # a status fetch starts while both are in flight
+    cache.put_answer(newer, second)
+    cache.put_answer(older, first)  # the first command is answered last
+    cache.put(older, fetch)
+    assert cache.get() is newer
+
+
+def test_command_status(simulator):
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, lazy=True, command_status=True
+    ) as vlc:
+        snapshot = vlc.set_volume(100)
+        assert isinstance(snapshot, rest_vlc.StatusSnapshot)
+        assert snapshot.volume == 100
+        simulator.fail_next()
+        assert vlc.stop() is None
+
+
+def test_command_answer_feeds_the_status_cache(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True, status_ttl=60) as vlc:
+        assert vlc.set_volume(100) is True
+        assert vlc.volume == 100
+        assert vlc.state == rest_vlc.VLC_State.stopped
+        simulator.fail_next()
+        assert vlc.stop() is False
+        assert vlc.volume == 100  # fetched again, the failed command dropped the cache
+    assert simulator.paths == [
+        "/requests/status.xml?command=volume&val=100",
+        "/requests/status.xml?command=pl_stop",
+        "/requests/status.xml",
+    ]
+
+
+def test_fullscreen_in_one_round_trip(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        assert vlc.fullscreen() == (True, True)
+        assert vlc.full_screen is True
+        assert vlc.fullscreen() == (True, False)
+    assert simulator.paths == ["/requests/status.xml?command=fullscreen"] * 2
+    assert simulator.is_fullscreen is False
+
+
+def test_subscriber_survives_failed_polls(simulator):
+    events = queue.Queue()
+    with rest_vlc.VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        vlc.subscribe(events.put, interval=0.01)
+        assert events.get(timeout=2).kind == "state"
+        simulator.fail_next(2)
+        time.sleep(0.1)
+        simulator.volume = 100
+        while True:
+            event = events.get(timeout=2)
+            if isinstance(event, rest_vlc.VolumeChanged) and event.previous:
+                break
+        assert event.volume == 100
+        vlc.unsubscribe(events.put)
+
+
+@pytest.mark.asyncio
+async def test_async_subscriber_survives_failed_polls(simulator):
+    pytest.importorskip("aiohttp")
+    async with rest_vlc.Async_VLC(simulator.url, simulator.auth, lazy=True) as vlc:
+        events = vlc.watch(interval=0.01)
+        assert (await events.__anext__()).kind == "state"
+        simulator.fail_next(2)
+        await rest_vlc.asyncio.sleep(0.1)
+        simulator.volume = 100
+        while True:
+            event = await rest_vlc.asyncio.wait_for(events.__anext__(), 2)
+            if isinstance(event, rest_vlc.VolumeChanged) and event.previous:
+                break
+        assert event.volume == 100
+        await events.aclose()
@@ -0,0 +1,126 @@
+import concurrent.futures
+import sys
+import threading
+
+import pytest
+
+sys.path.append("..")  # pytest problem?
+import rest_vlc
+
+from .vlc_simulator import VLCSimulator
+
+
+def test_one_instance_shared_by_threads(simulator):
+    errors = []
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, status_ttl=0.01, metrics=True
+    ) as vlc:
+        assert vlc.play("file:///music/a.mp3")
+
+        def work(worker: int) -> None:
+            try:
+                for i in range(20):
+                    assert vlc.set_volume(worker * 20 + i)
+                    assert 0 <= vlc.snapshot().volume < 160
+                    assert vlc.fullscreen()[0]
+                    vlc.refresh_playlist()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert simulator.is_fullscreen is False  # toggled 160 times
+        assert len(vlc.get_playlist(refresh=False)) == 1
+        stats = vlc.metrics.stats()[simulator.url]
+        assert stats["set_volume"]["requests"] == stats["fullscreen"]["requests"] == 160
+
+
+def test_submit_and_map(simulator):
+    with rest_vlc.VLC(simulator.url, simulator.auth) as vlc:
+        future = vlc.submit("play", "file:///music/a.mp3")
+        assert isinstance(future, concurrent.futures.Future) and future.result()
+        assert list(vlc.map("set_volume", [10, 20, 30])) == [True] * 3
+        snapshots = list(vlc.map("snapshot", [True] * 4))
+        assert all(snapshot.volume in (10, 20, 30) for snapshot in snapshots)
+        simulator.failure_status = None
+        simulator.fail_next()
+        with pytest.raises(rest_vlc.requests.exceptions.ConnectionError):
+            vlc.submit("stop").result()
+
+
+def test_ordered_submit_keeps_the_order(simulator):
+    uris = ["file:///music/{}.mp3".format(i) for i in range(30)]
+    with rest_vlc.VLC(simulator.url, simulator.auth, ordered=True) as vlc:
+        assert all(vlc.map("append_queue", uris))
+        assert [item.uri for item in vlc.playlist_items()] == uris
+
+
+def test_bounded_coalescing_queue_shared_by_threads(simulator):
+    errors = []
+    with rest_vlc.VLC(
+        simulator.url, simulator.auth, coalesce=True, queue_size=2
+    ) as vlc:
+
+        def work(worker: int) -> None:
+            try:
+                for i in range(100):
+                    if (worker + i) % 2:
+                        assert vlc.set_volume(i)
+                    else:
+                        assert vlc.seek(i)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=work, args=(i,), daemon=True) for i in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)  # a writer killed by a released slot leaves them waiting
+            assert not thread.is_alive()
+        assert not errors
+        stats = vlc.queue_stats()
+        assert stats["depth"] == stats["waiting"] == 0
+        assert stats["max_depth"] <= 2
+        assert stats["enqueued"] == 1600
+        assert stats["sent"] + stats["coalesced"] == 1600
+        # every slot is back, a slot released twice would have raised
+        assert all(vlc._queue_slots.acquire(blocking=False) for _ in range(2))
+        assert not vlc._queue_slots.acquire(blocking=False)
+
+
+def test_shared_executor_for_many_endpoints():
+    simulators = [VLCSimulator().start() for _ in range(4)]
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        vlcs = [
+            rest_vlc.VLC(s.url, s.auth, lazy=True, executor=executor)
+            for s in simulators
+        ]
+        futures = [vlc.submit("set_volume", 100) for vlc in vlcs]
+        assert all(future.result() for future in futures)
+        for vlc in vlcs:
+            vlc.close()  # leaves the shared executor running
+        assert executor.submit(lambda: 1).result() == 1
+    assert all(s.volume == 100 for s in simulators)
+    for simulator in simulators:
+        simulator.close()
+
+
+def test_circuit_breaker_counts_every_thread():
+    breaker = rest_vlc.CircuitBreaker(failure_threshold=0)
+
+    def fail() -> None:
+        for _ in range(1000):
+            breaker.record_failure()
+
+    threads = [threading.Thread(target=fail) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert breaker.failures == 8000
@@ -0,0 +1,565 @@
+"""
+An in-process stand-in for VLC's HTTP interface.
+
+It answers `status.xml`/`status.json`, `playlist.xml`/`playlist.json` and `browse.xml`,
+applies the commands `rest_vlc` sends to a small player state and checks Basic Auth
+like VLC does. Latency and failures can be injected to test retries, timeouts and the
+circuit breaker, and the benchmarks use it to measure the client without a real VLC::
+
+    with VLCSimulator(password="secret", latency=0.001) as vlc:
+        client = rest_vlc.VLC(vlc.url, vlc.auth)
+"""
+
+import base64
+import html
+import http.server
+import json
+import pathlib
+import queue
+import random
+import socket
+import threading
+import time
+import typing
+import urllib.parse
+import urllib.request
+
+STATUS = """<?xml version="1.0" encoding="utf-8" standalone="yes" ?>
+<root>
+<fullscreen>{fullscreen}</fullscreen>
+<aspectratio>default</aspectratio>
+<audiodelay>0</audiodelay>
+<apiversion>3</apiversion>
+<currentplid>{currentplid}</currentplid>
+<time>{time}</time>
+<volume>{volume}</volume>
+<length>{length}</length>
+<random>{random}</random>
+<audiofilters>
+  <filter_0></filter_0></audiofilters>
+<rate>1</rate>
+<videoeffects>
+<hue>0</hue><saturation>1</saturation><contrast>1</contrast><brightness>1</brightness><gamma>1</gamma></videoeffects>
+<state>{state}</state>
+<loop>{loop}</loop>
+<version>3.0.18 Vetinari</version>
+<position>{position}</position>
+<repeat>{repeat}</repeat>
+<subtitledelay>0</subtitledelay>
+<equalizer></equalizer>
+<information>
+<category name="meta">
+<info name='filename'>{name}</info>
+</category>
+</information>
+<stats>
+<lostabuffers>0</lostabuffers><readpackets>0</readpackets><lostpictures>0</lostpictures><demuxreadbytes>0</demuxreadbytes>
+</stats>
+</root>"""
+PLAYLIST = """<?xml version="1.0" encoding="utf-8" standalone="yes" ?>
+<node ro="rw" name="Undefined" id="0">
+<node ro="ro" name="Playlist" id="1">
+{leaves}</node>
+<node ro="ro" name="Media Library" id="2">
+</node>
+</node>"""
+LEAF = '<leaf ro="rw" name="{name}" id="{id}" duration="{duration}" uri="{uri}"{current}/>\n'
+ELEMENT = (
+    '<element type="{type}" path="{path}" name="{name}" uri="{uri}" size="{size}"/>\n'
+)
+
+
+class Media:
+    """
+    One media of the simulated playlist
+    """
+
+    __slots__ = ("id", "uri", "name", "duration")
+
+    def __init__(self, id: int, uri: str, duration: int) -> None:
+        self.id = id
+        self.uri = uri
+        self.name = urllib.parse.unquote(uri.rstrip("/").rsplit("/", 1)[-1])
+        self.duration = duration
+
+
+class VLCSimulator:
+    """
+    A fake VLC HTTP interface served from a background thread
+    """
+
+    def __init__(
+        self,
+        password: str = "",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        network_delay: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: typing.Optional[int] = 500,
+        duration: int = 215,
+        seed: typing.Optional[int] = None,
+    ) -> None:
+        """
+        VLCSimulator Class
+        Nothing is served until `start()` is called or the simulator is used as a context manager.
+        :param password: password of the HTTP interface, the user name is ignored like VLC does
+        :param host: address to listen on
+        :param port: port to listen on, 0 picks a free one
+        :param latency: seconds every request waits before it is answered
+        :param network_delay: seconds the bytes take from the client to the simulator and back again,
+        unlike `latency` the requests pipelined on one connection are delayed at the same time
+        :param failure_rate: share of the requests that fail, from 0 to 1
+        :param failure_status: HTTP status of the failed requests, None drops the connection instead
+        :param duration: duration in seconds of the media added by commands
+        :param seed: seed of the failure injection
+        :return: None
+        """
+        self.password = password
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.duration = duration
+        self.paths = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._failures = 0
+        self._next_id = 3  # 0, 1 and 2 are the root, the playlist and the media library
+        self.playlist = []
+        self.current = None
+        self.state = "stopped"
+        self.time = 0
+        self.volume = 256
+        self.is_random = False
+        self.is_loop = False
+        self.is_repeat = False
+        self.is_fullscreen = False
+        self.server = http.server.ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.simulator = self
+        self._thread = None
+        self._network = (
+            _DelayedNetwork(self.server.server_address[:2], network_delay)
+            if network_delay
+            else None
+        )
+
+    def __enter__(self) -> "VLCSimulator":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def url(self) -> str:
+        """
+        Url to give to `VLC` and `Async_VLC`
+        :return: str
+        """
+        if self._network is not None:
+            host, port = self._network.address
+        else:
+            host, port = self.server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    @property
+    def auth(self) -> tuple:
+        """
+        Auth to give to `VLC` and `Async_VLC`
+        :return: tuple
+        """
+        return "", self.password
+
+    def start(self) -> "VLCSimulator":
+        """
+        Serve requests from a daemon thread
+        :return: VLCSimulator
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.server.serve_forever, args=(0.05,), daemon=True
+            )
+            self._thread.start()
+            if self._network is not None:
+                self._network.start()
+        return self
+
+    def close(self) -> None:
+        """
+        Stop serving and close the listening socket
+        :return: None
+        """
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread = None
+        self.server.server_close()
+        if self._network is not None:
+            self._network.close()
+
+    def fail_next(self, count: int = 1) -> None:
+        """
+        Make the next requests fail with `failure_status` whatever the failure rate is
+        :param count: number of requests to fail
+        :return: None
+        """
+        with self.lock:
+            self._failures += count
+
+    def add(self, uri: str, duration: typing.Optional[int] = None) -> Media:
+        """
+        Append a media to the playlist without a request
+        :param uri: media uri
+        :param duration: duration in seconds, `duration` of the simulator by default
+        :return: Media
+        """
+        with self.lock:
+            return self._add(uri, duration)
+
+    def _add(self, uri: str, duration: typing.Optional[int] = None) -> Media:
+        media = Media(
+            self._next_id, uri, self.duration if duration is None else duration
+        )
+        self._next_id += 1
+        self.playlist.append(media)
+        return media
+
+    def _should_fail(self) -> bool:
+        with self.lock:
+            if self._failures:
+                self._failures -= 1
+                return True
+        return bool(self.failure_rate) and self._random.random() < self.failure_rate
+
+    def _authorized(self, header: typing.Optional[str]) -> bool:
+        if not header or not header.startswith("Basic "):
+            return False
+        try:
+            credentials = base64.b64decode(header[6:]).decode("latin1")
+        except ValueError:
+            return False
+        return credentials.partition(":")[2] == self.password
+
+    # player
+
+    def _play(self, media: typing.Optional[Media]) -> None:
+        self.current = media
+        self.time = 0
+        self.state = "stopped" if media is None else "playing"
+
+    def _step(self, offset: int) -> None:
+        if not self.playlist:
+            return self._play(None)
+        if self.current not in self.playlist:
+            return self._play(self.playlist[0])
+        if self.is_random:
+            return self._play(self._random.choice(self.playlist))
+        index = self.playlist.index(self.current) + offset
+        if 0 <= index < len(self.playlist):
+            self._play(self.playlist[index])
+        elif self.is_loop:
+            self._play(self.playlist[index % len(self.playlist)])
+        else:
+            self._play(None)
+
+    @staticmethod
+    def _relative(value: str, current: float, total: float) -> float:
+        # absolute, +/- relative and % values of the volume and seek commands
+        if value.endswith("%"):
+            amount = float(value[:-1].lstrip("+")) * total / 100
+        else:
+            amount = float(value.lstrip("+"))
+        if value[0] in "+-":
+            return current + amount
+        return amount
+
+    def command(self, name: str, query: typing.Dict[str, str]) -> None:
+        """
+        Apply a command of the `status` endpoints to the player state
+        :param name: value of the command parameter
+        :param query: every parameter of the request
+        :return: None
+        """
+        with self.lock:
+            if name == "in_play":
+                self._play(self._add(query["input"]))
+            elif name == "in_enqueue":
+                self._add(query["input"])
+            elif name == "pl_play":
+                self._play(self.current or (self.playlist or [None])[0])
+            elif name == "pl_pause":
+                if self.state == "playing":
+                    self.state = "paused"
+                elif self.current is not None:
+                    self.state = "playing"
+                else:
+                    self._step(0)
+            elif name == "pl_stop":
+                self.state = "stopped"
+                self.time = 0
+            elif name == "pl_next":
+                self._step(1)
+            elif name == "pl_previous":
+                self._step(-1)
+            elif name == "pl_delete":
+                self.playlist = [m for m in self.playlist if m.id != int(query["id"])]
+                if self.current not in self.playlist:
+                    self._play(None)
+            elif name == "pl_empty":
+                self.playlist = []
+                self._play(None)
+            elif name == "volume":
+                volume = self._relative(query["val"], self.volume, 256)
+                self.volume = max(0, min(512, int(volume)))
+            elif name == "seek" and self.current is not None:
+                position = self._relative(query["val"], self.time, self._length())
+                self.time = max(0, min(self._length(), int(position)))
+            # VLC passes the state of these on as a string, which its Lua
+            # playlist functions ignore, so they always toggle
+            elif name == "pl_random":
+                self.is_random = not self.is_random
+            elif name == "pl_repeat":
+                self.is_repeat = not self.is_repeat
+            elif name == "pl_loop":
+                self.is_loop = not self.is_loop
+            elif name == "fullscreen":
+                self.is_fullscreen = not self.is_fullscreen
+
+    # documents
+
+    def _length(self) -> int:
+        return self.current.duration if self.current is not None else 0
+
+    def _status(self) -> dict:
+        length = self._length()
+        return {
+            "fullscreen": self.is_fullscreen,
+            "currentplid": self.current.id if self.current is not None else -1,
+            "time": self.time,
+            "volume": self.volume,
+            "length": length,
+            "random": self.is_random,
+            "state": self.state,
+            "loop": self.is_loop,
+            "position": self.time / length if length else 0.0,
+            "repeat": self.is_repeat,
+            "name": self.current.name if self.current is not None else "",
+        }
+
+    def status_xml(self) -> str:
+        """
+        Give `status.xml` of the current state
+        :return: str
+        """
+        with self.lock:
+            status = self._status()
+        for key, value in status.items():
+            if isinstance(value, bool):
+                status[key] = "true" if value else "false"
+        status["name"] = html.escape(status["name"])
+        return STATUS.format(**status)
+
+    def status_json(self) -> str:
+        """
+        Give `status.json` of the current state
+        :return: str
+        """
+        with self.lock:
+            status = self._status()
+        name = status.pop("name")
+        status.update(
+            apiversion=3,
+            version="3.0.18 Vetinari",
+            information={"category": {"meta": {"filename": name}}},
+        )
+        return json.dumps(status)
+
+    def playlist_xml(self) -> str:
+        """
+        Give `playlist.xml` of the current playlist
+        :return: str
+        """
+        with self.lock:
+            leaves = "".join(
+                LEAF.format(
+                    name=html.escape(media.name),
+                    id=media.id,
+                    duration=media.duration,
+                    uri=html.escape(media.uri),
+                    current=' current="current"' if media is self.current else "",
+                )
+                for media in self.playlist
+            )
+        return PLAYLIST.format(leaves=leaves)
+
+    def playlist_json(self) -> str:
+        """
+        Give `playlist.json` of the current playlist
+        :return: str
+        """
+        with self.lock:
+            children = []
+            for media in self.playlist:
+                leaf = {
+                    "ro": "rw",
+                    "type": "leaf",
+                    "name": media.name,
+                    "id": str(media.id),
+                    "duration": media.duration,
+                    "uri": media.uri,
+                }
+                if media is self.current:
+                    leaf["current"] = "current"
+                children.append(leaf)
+        node = {"ro": "ro", "type": "node", "children": []}
+        return json.dumps(
+            dict(
+                node,
+                ro="rw",
+                name="Undefined",
+                id="0",
+                children=[
+                    dict(node, name="Playlist", id="1", children=children),
+                    dict(node, name="Media Library", id="2"),
+                ],
+            )
+        )
+
+    def browse_xml(self, uri: str) -> typing.Optional[str]:
+        """
+        Give `browse.xml` of a local directory, None when it does not exist
+        :param uri: file uri of the directory
+        :return: str or None
+        """
+        folder = pathlib.Path(
+            urllib.request.url2pathname(urllib.parse.urlparse(uri).path)
+        )
+        if not folder.is_dir():
+            return None
+        elements = "".join(
+            ELEMENT.format(
+                type="dir" if path.is_dir() else "file",
+                path=html.escape(str(path)),
+                name=html.escape(path.name),
+                uri=html.escape(path.as_uri()),
+                size=0 if path.is_dir() else path.stat().st_size,
+            )
+            for path in sorted(folder.iterdir())
+        )
+        return '<?xml version="1.0" encoding="utf-8" standalone="yes" ?>\n<root>\n{}</root>'.format(
+            elements
+        )
+
+
+class _DelayedNetwork:
+    # A proxy in front of the simulator that hands every chunk on `delay` seconds
+    # after it arrived, in both directions, like a network with that one-way latency.
+
+    def __init__(self, target: tuple, delay: float) -> None:
+        self.target = target
+        self.delay = delay
+        self.sockets = []
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.address = self.server.getsockname()
+
+    def start(self) -> None:
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.close()
+        for sock in self.sockets:
+            sock.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client = self.server.accept()[0]
+            except OSError:
+                return
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sockets += [client, upstream]
+            self._link(client, upstream)
+            self._link(upstream, client)
+
+    def _link(self, source: socket.socket, target: socket.socket) -> None:
+        chunks = queue.Queue()
+
+        def receive() -> None:
+            data = True
+            while data:
+                try:
+                    data = source.recv(65536)
+                except OSError:
+                    data = b""
+                chunks.put((time.monotonic() + self.delay, data))
+
+        def send() -> None:
+            while True:
+                due, data = chunks.get()
+                time.sleep(max(0.0, due - time.monotonic()))
+                try:
+                    if not data:
+                        return target.shutdown(socket.SHUT_WR)
+                    target.sendall(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=receive, daemon=True).start()
+        threading.Thread(target=send, daemon=True).start()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.simulator.connections += 1
+
+    def respond(self, status: int, body: str = "", content_type: str = "") -> None:
+        data = body.encode()
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if status == 401:
+            self.send_header("WWW-Authenticate", 'Basic realm="VLC stream"')
+        if self.close_connection:  # the client asked for it with "Connection: close"
+            self.send_header("Connection", "close")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        simulator = self.server.simulator
+        simulator.paths.append(self.path)
+        if simulator.latency:
+            time.sleep(simulator.latency)
+        if simulator._should_fail():
+            if simulator.failure_status is None:
+                self.close_connection = True
+                return
+            return self.respond(simulator.failure_status)
+        if not simulator._authorized(self.headers.get("Authorization")):
+            return self.respond(401)
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if url.path in ("/requests/status.xml", "/requests/status.json"):
+            if "command" in query:
+                simulator.command(query["command"], query)
+            if url.path.endswith(".json"):
+                return self.respond(200, simulator.status_json(), "application/json")
+            return self.respond(200, simulator.status_xml(), "text/xml")
+        if url.path == "/requests/playlist.xml":
+            return self.respond(200, simulator.playlist_xml(), "text/xml")
+        if url.path == "/requests/playlist.json":
+            return self.respond(200, simulator.playlist_json(), "application/json")
+        if url.path == "/requests/browse.xml":
+            body = simulator.browse_xml(query.get("uri", ""))
+            if body is not None:
+                return self.respond(200, body, "text/xml")
+        self.respond(404)